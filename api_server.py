@@ -3,223 +3,142 @@ API Server Bitcoin Market Cycle - Versão de Teste
 Dados simulados realistas para testar o frontend
 """
 
-from flask import Flask, jsonify
+from flask import Flask, jsonify, Response, request
 from flask_cors import CORS
+from werkzeug.middleware.proxy_fix import ProxyFix
 from datetime import datetime
+import gzip
+import hashlib
+import json
+import logging
+import math
+import os
 from zoneinfo import ZoneInfo  # ✅ substitui pytz
 import threading
 import time
 
+import indicator_registry
+import metrics
+import profiler
+from history_store import HistoryLimitError, HistoryStore, RESOLUTIONS
+from indicator_graph import IndicatorGraph
+from indicator_registry import IndicatorValues, RISK_LEVELS, STATUS_LABELS
+from price_indicators import PRICE_BINDINGS, PriceIndicatorEngine
+from change_stream import ChangeLog, diff_snapshots, merge_changes, sse_event
+from shared_snapshot import SharedSnapshot, pack_blobs, unpack_blobs
+from source_schedule import with_overrides
+from update_control import ClientRateLimiter, SingleFlight, forwarded_client
+
+try:
+    import brotli  # opcional: habilita Content-Encoding br
+except ImportError:
+    brotli = None
+
 app = Flask(__name__)
 CORS(app, resources={r"/*": {"origins": "*"}})
 
+logger = logging.getLogger(__name__)
+
 # Fuso horário de São Paulo
 SP_TZ = ZoneInfo("America/Sao_Paulo")
 
-# Dados simulados realistas baseados em valores típicos do mercado
+# Intervalo (segundos) da atualização em segundo plano via scraper; 0 = usar dados simulados.
+# Cada ciclo consulta só as fontes devidas pela agenda, então o ciclo pode vir antes deste prazo
+REFRESH_INTERVAL = int(os.environ.get("REFRESH_INTERVAL", "0"))
+
+# Ajustes da agenda de cada fonte em JSON, sobre os padrões do scraper
+# (ex.: {"dominance": {"interval": 30}, "fear_greed": {"failure_threshold": 5, "open_seconds": 3600}})
+SOURCE_SCHEDULES = json.loads(os.environ.get("SOURCE_SCHEDULES") or "{}")
+
+# Último snapshot coletado (formato do save_data() do scraper), regravado a cada atualização e
+# servido na inicialização, marcado como desatualizado, até a primeira coleta; vazio = desativado
+SNAPSHOT_FILE = os.environ.get("SNAPSHOT_FILE", "indicators_data.json")
+
+# Idade máxima (segundos) do snapshot persistido para ainda ser servido na inicialização
+WARM_START_MAX_AGE = float(os.environ.get("WARM_START_MAX_AGE", str(7 * 86400)))
+
+# Diretório do histórico de snapshots (alimentado pela atualização em segundo plano)
+HISTORY_DIR = os.environ.get("HISTORY_DIR", "history")
+
+# Arquivo local de fechamentos diários do BTC (CSV data,close ou binário .f8); vazio = desativado
+PRICE_HISTORY_FILE = os.environ.get("PRICE_HISTORY_FILE", "")
+
+# Intervalo (segundos) entre heartbeats do /api/stream
+STREAM_HEARTBEAT = float(os.environ.get("STREAM_HEARTBEAT", "15"))
+
+# Arquivo mapeado em memória compartilhado entre workers; vazio = cada processo com seu snapshot
+SHARED_SNAPSHOT_PATH = os.environ.get("SHARED_SNAPSHOT_PATH", "")
+
+# Intervalo (segundos) com que os workers leitores conferem a versão e a eleição do produtor
+SHARED_POLL_INTERVAL = float(os.environ.get("SHARED_POLL_INTERVAL", "1"))
+
+# /api/update: intervalo mínimo (segundos) entre atualizações reais, limite por cliente
+# (requisições por minuto e rajada; 0 = sem limite) e espera máxima pelo ciclo do scraper
+UPDATE_MIN_INTERVAL = float(os.environ.get("UPDATE_MIN_INTERVAL", "10"))
+UPDATE_RATE_PER_MINUTE = float(os.environ.get("UPDATE_RATE_PER_MINUTE", "6"))
+UPDATE_BURST = int(os.environ.get("UPDATE_BURST", "3"))
+UPDATE_WAIT_TIMEOUT = float(os.environ.get("UPDATE_WAIT_TIMEOUT", "30"))
+
+# Proxies reversos confiáveis à frente da API: o cliente do limite do /api/update é o endereço
+# que o mais distante deles registrou no X-Forwarded-For (0 = conexão direta; no Heroku, o
+# roteador é um proxy)
+TRUSTED_PROXY_HOPS = int(os.environ.get("TRUSTED_PROXY_HOPS", "1" if "DYNO" in os.environ else "0"))
+if TRUSTED_PROXY_HOPS > 0:
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_for=TRUSTED_PROXY_HOPS, x_proto=0, x_host=0, x_port=0, x_prefix=0)
+
+# Cache-Control (segundos) de /api/indicators/meta; o ETag só muda quando os metadados mudam
+META_MAX_AGE = int(os.environ.get("META_MAX_AGE", "3600"))
+
+# Dados simulados realistas baseados em valores típicos do mercado: (current, reference)
+SIMULATED_VALUES = {
+    "Bitcoin Ahr999 Index": (0.98, 4.0),
+    "Pi Cycle Top Indicator": (111351.78, 190771),
+    "Puell Multiple": (1.13, 2.2),
+    "Bitcoin Rainbow Chart": (3, 5),
+    "2-Year MA Multiplier": (111312.05, 364280),
+    "MVRV Z-Score": (2.12, 5.0),
+    "Bitcoin Bubble Index": (13.48, 80),
+    "Bitcoin Dominance": (57.8, 40),
+    "Bitcoin MVRV Ratio": (2.1, 3.0),
+    "Mayer Multiple": (1.13, 2.2),
+    "Fear & Greed Index": (55, 80),
+    "Bitcoin Net Unrealized P&L": (54.91, 70),
+    "Bitcoin RHODL Ratio": (2754, 10000),
+    "Bitcoin Macro Oscillator": (0.84, 1.4),
+    "Bitcoin 4-Year Moving Average": (2.13, 3.5),
+    "Crypto Bitcoin Bull Run Index": (74, 90),
+    "Bitcoin Reserve Risk": (0.0024, 0.005),
+    "Golden Ratio Multiplier": (112035.99, 135522),
+    "Bitcoin Terminal Price": (112035.99, 187702),
+    "Smithson Bitcoin Price Forecast": (112035.99, 175000),
+    "Bitcoin Long Term Holder Supply": (15.47, 13.5),
+    "Bitcoin Short Term Holder Supply": (22.31, 30),
+    "Bitcoin AHR999x Top Escape": (3.04, 0.45),
+    "MicroStrategy Avg Bitcoin Cost": (73526, 155655),
+    "Bitcoin Trend Indicator": (6.14, 7),
+    "3-Month Annualized Ratio": (9.95, 30),
+    "Days of ETF Net Outflows": (2, 10),
+    "ETF-to-BTC Ratio": (3.8, 3.5),  # Valor acima da referência para não estar na zona de risco
+    "USDT Flexible Savings": (5.66, 29),
+    "RSI - 22 Day": (47.173, 80),
+    "CMC Altcoin Season Index": (54, 75)
+}
+
+# Descrição e unidade vêm do registro de indicadores
 SIMULATED_DATA = {
-    "Bitcoin Ahr999 Index": {
-        "current": 0.98,
-        "reference": 4.0,
-        "description": "Índice que combina preço e média móvel de 200 dias. Valores acima de 4 indicam possível topo de mercado.",
-        "unit": ""
-    },
-    "Pi Cycle Top Indicator": {
-        "current": 111351.78,
-        "reference": 190771,
-        "description": "Cruzamento de médias móveis de 111 e 350 dias. Quando a 111DMA cruza a 350DMA x2, indica possível topo.",
-        "unit": "$"
-    },
-    "Puell Multiple": {
-        "current": 1.13,
-        "reference": 2.2,
-        "description": "Receita diária dos mineradores vs média de 365 dias. Valores acima de 2.2 sugerem fim de ciclo.",
-        "unit": ""
-    },
-    "Bitcoin Rainbow Chart": {
-        "current": 3,
-        "reference": 5,
-        "description": "Gráfico logarítmico com bandas de preço. Banda 5 (vermelha) indica possível topo de mercado.",
-        "unit": ""
-    },
-    "2-Year MA Multiplier": {
-        "current": 111312.05,
-        "reference": 364280,
-        "description": "Multiplicador da média móvel de 2 anos. Valores próximos a $364k indicam topo histórico.",
-        "unit": "$"
-    },
-    "MVRV Z-Score": {
-        "current": 2.12,
-        "reference": 5.0,
-        "description": "Z-Score do MVRV (Market Value to Realized Value). Valores acima de 5 indicam possível topo.",
-        "unit": ""
-    },
-    "Bitcoin Bubble Index": {
-        "current": 13.48,
-        "reference": 80,
-        "description": "Índice de bolha baseado em desvios de preço. Valores acima de 80 indicam bolha extrema.",
-        "unit": ""
-    },
-    "Bitcoin Dominance": {
-        "current": 57.8,
-        "reference": 40,
-        "description": "Dominância do Bitcoin no mercado cripto. Quando cai para 40%, indica possível fim de ciclo.",
-        "unit": "%"
-    },
-    "Bitcoin MVRV Ratio": {
-        "current": 2.10,
-        "reference": 3.0,
-        "description": "Market Value to Realized Value Ratio. Valores acima de 3 indicam sobrevalorização.",
-        "unit": ""
-    },
-    "Mayer Multiple": {
-        "current": 1.13,
-        "reference": 2.2,
-        "description": "Preço atual vs média móvel de 200 dias. Valores acima de 2.2 indicam sobrevalorização.",
-        "unit": ""
-    },
-    "Fear & Greed Index": {
-        "current": 55,
-        "reference": 80,
-        "description": "Índice de medo e ganância do mercado. Valores acima de 80 indicam ganância extrema.",
-        "unit": ""
-    },
-    "Bitcoin Net Unrealized P&L": {
-        "current": 54.91,
-        "reference": 70,
-        "description": "P&L não realizado líquido (NUPL). Valores acima de 70% indicam euforia extrema.",
-        "unit": "%"
-    },
-    "Bitcoin RHODL Ratio": {
-        "current": 2754,
-        "reference": 10000,
-        "description": "Ratio RHODL (Realized HODL). Valores acima de 10000 indicam possível topo.",
-        "unit": ""
-    },
-    "Bitcoin Macro Oscillator": {
-        "current": 0.84,
-        "reference": 1.4,
-        "description": "Oscilador macro baseado em ciclos. Valores acima de 1.4 indicam fim de ciclo.",
-        "unit": ""
-    },
-    "Bitcoin 4-Year Moving Average": {
-        "current": 2.13,
-        "reference": 3.5,
-        "description": "Média móvel de 4 anos. Valores acima de 3.5 indicam possível topo de ciclo.",
-        "unit": ""
-    },
-    "Crypto Bitcoin Bull Run Index": {
-        "current": 74,
-        "reference": 90,
-        "description": "Índice de bull run cripto (CBBI). Valores acima de 90 indicam fim de bull run.",
-        "unit": ""
-    },
-    "Bitcoin Reserve Risk": {
-        "current": 0.0024,
-        "reference": 0.005,
-        "description": "Risco de reserva baseado em HODL waves. Valores acima de 0.005 indicam alto risco.",
-        "unit": ""
-    },
-    "Golden Ratio Multiplier": {
-        "current": 112035.99,
-        "reference": 135522,
-        "description": "Multiplicador da proporção áurea. Valores próximos a $135k indicam resistência forte.",
-        "unit": "$"
-    },
-    "Bitcoin Terminal Price": {
-        "current": 112035.99,
-        "reference": 187702,
-        "description": "Preço terminal baseado em modelos. Valores próximos a $187k indicam topo teórico.",
-        "unit": "$"
-    },
-    "Smithson Bitcoin Price Forecast": {
-        "current": 112035.99,
-        "reference": 175000,
-        "description": "Previsão de preço Smithson. Modelo baseado em análise técnica e fundamentalista.",
-        "unit": "$"
-    },
-    "Bitcoin Long Term Holder Supply": {
-        "current": 15.47,
-        "reference": 13.5,
-        "description": "Suprimento de holders de longo prazo. Valores abaixo de 13.5M indicam distribuição.",
-        "unit": "M"
-    },
-    "Bitcoin Short Term Holder Supply": {
-        "current": 22.31,
-        "reference": 30,
-        "description": "Suprimento de holders de curto prazo (%). Valores acima de 30% indicam especulação.",
-        "unit": "%"
-    },
-    "Bitcoin AHR999x Top Escape": {
-        "current": 3.04,
-        "reference": 0.45,
-        "description": "Indicador de escape do topo AHR999x. Valores abaixo de 0.45 indicam momento de venda.",
-        "unit": ""
-    },
-    "MicroStrategy Avg Bitcoin Cost": {
-        "current": 73526,
-        "reference": 155655,
-        "description": "Custo médio do Bitcoin da MicroStrategy. Referência baseada em compras históricas.",
-        "unit": "$"
-    },
-    "Bitcoin Trend Indicator": {
-        "current": 6.14,
-        "reference": 7,
-        "description": "Indicador de tendência baseado em momentum. Valores acima de 7 indicam possível reversão.",
-        "unit": ""
-    },
-    "3-Month Annualized Ratio": {
-        "current": 9.95,
-        "reference": 30,
-        "description": "Ratio anualizado de 3 meses. Valores acima de 30% indicam crescimento insustentável.",
-        "unit": "%"
-    },
-    "Days of ETF Net Outflows": {
-        "current": 2,
-        "reference": 10,
-        "description": "Dias consecutivos de saídas líquidas de ETFs. Mais de 10 dias pode indicar fim de ciclo.",
-        "unit": " dias"
-    },
-    "ETF-to-BTC Ratio": {
-        "current": 3.8,  # Valor acima da referência para não estar na zona de risco
-        "reference": 3.5,
-        "description": "Relação entre ETFs de Bitcoin e Bitcoin. Valores baixos indicam possível fim de ciclo.",
-        "unit": ""
-    },
-    "USDT Flexible Savings": {
-        "current": 5.66,
-        "reference": 29,
-        "description": "Taxa de poupança flexível USDT. Taxas acima de 29% indicam alta demanda por stablecoins.",
-        "unit": "%"
-    },
-    "RSI - 22 Day": {
-        "current": 47.173,
-        "reference": 80,
-        "description": "Índice de Força Relativa de 22 dias. Valores acima de 80 indicam sobrecompra extrema.",
-        "unit": ""
-    },
-    "CMC Altcoin Season Index": {
-        "current": 54,
-        "reference": 75,
-        "description": "Índice de temporada de altcoins. Valores acima de 75 indicam altseason extrema.",
-        "unit": ""
-    }
+    name: dict(current=current, reference=reference, **indicator_registry.metadata(name))
+    for name, (current, reference) in SIMULATED_VALUES.items()
 }
 
+# Indicadores onde menor valor = mais próximo do fim de ciclo (nomes canônicos e apelidos)
+INVERSE_INDICATORS = indicator_registry.REGISTRY.inverse_names()
+
 def calculate_proximity(indicator_name, current, reference):
     """Calcula proximidade ao fim de ciclo (0-100%)"""
     if current is None or reference is None or reference == 0:
         return 0
     
-    # Indicadores onde menor valor = mais próximo do fim de ciclo
-    inverse_indicators = [
-        "Bitcoin Dominance", 
-        "Bitcoin Long Term Holder Supply", 
-        "Bitcoin AHR999x Top Escape",
-        "ETF-to-BTC Ratio"  # CORRIGIDO: Adicionado ETF-to-BTC Ratio como indicador inverso
-    ]
-    
-    if indicator_name in inverse_indicators:
+    if indicator_name in INVERSE_INDICATORS:
         # Para estes, quanto menor o valor atual, maior a proximidade
         proximity = ((reference - current) / reference) * 100
         proximity = max(0, proximity)  # Não pode ser negativo
@@ -234,14 +153,7 @@ def is_in_risk_zone(indicator_name, current, reference):
     if current is None or reference is None:
         return False
     
-    inverse_indicators = [
-        "Bitcoin Dominance", 
-        "Bitcoin Long Term Holder Supply", 
-        "Bitcoin AHR999x Top Escape",
-        "ETF-to-BTC Ratio"  # CORRIGIDO: Adicionado ETF-to-BTC Ratio como indicador inverso
-    ]
-    
-    if indicator_name in inverse_indicators:
+    if indicator_name in INVERSE_INDICATORS:
         return current <= reference
     else:
         return current >= reference
@@ -257,55 +169,39 @@ def get_risk_level(proximity):
     else:
         return "BAIXO"
 
-def process_indicators():
-    """Processa todos os indicadores e calcula métricas"""
-    indicators = {}
-    total_proximity = 0
-    valid_count = 0
-    in_risk_zone_count = 0
-    risk_distribution = {"BAIXO": 0, "MÉDIO": 0, "ALTO": 0, "CRÍTICO": 0}
-    
-    for name, data in SIMULATED_DATA.items():
-        current = data["current"]
-        reference = data["reference"]
-        
-        proximity = calculate_proximity(name, current, reference)
-        in_risk = is_in_risk_zone(name, current, reference)
-        risk_level = get_risk_level(proximity)
-        
-        indicators[name] = {
-            "current": current,
-            "reference": reference,
-            "proximity": round(proximity, 1),
-            "in_risk_zone": in_risk,
-            "risk_level": risk_level,
-            "description": data["description"],
-            "unit": data["unit"]
-        }
-        
-        total_proximity += proximity
-        valid_count += 1
-        
-        if in_risk:
-            in_risk_zone_count += 1
-        
-        risk_distribution[risk_level] += 1
+def evaluate_indicator(name, entry):
+    """Campos calculados de um indicador; retorna (registro, proximidade sem arredondamento)"""
+    current = entry["current"]
+    reference = entry["reference"]
     
-    # Calcular métricas de resumo
+    proximity = calculate_proximity(name, current, reference)
+    record = {
+        "current": current,
+        "reference": reference,
+        "proximity": round(proximity, 1),
+        "in_risk_zone": is_in_risk_zone(name, current, reference),
+        "risk_level": get_risk_level(proximity),
+        "description": entry["description"],
+        "unit": entry["unit"]
+    }
+    return record, proximity
+
+def summarize_indicators(total_proximity, valid_count, in_risk_zone_count, risk_distribution):
+    """Resumo da análise a partir dos agregados (soma das proximidades, contagens por nível)"""
     avg_proximity = total_proximity / valid_count if valid_count > 0 else 0
     risk_zone_percentage = (in_risk_zone_count / valid_count) * 100 if valid_count > 0 else 0
     
     # Status geral
     if avg_proximity >= 80:
-        status = "🔴 ALTO RISCO - Possível fim de ciclo"
+        status = STATUS_LABELS[3]
     elif avg_proximity >= 60:
-        status = "🟡 MÉDIO RISCO - Monitorar de perto"
+        status = STATUS_LABELS[2]
     elif avg_proximity >= 40:
-        status = "🟠 BAIXO-MÉDIO RISCO - Meio do ciclo"
+        status = STATUS_LABELS[1]
     else:
-        status = "🟢 BAIXO RISCO - Início do ciclo"
+        status = STATUS_LABELS[0]
     
-    summary = {
+    return {
         "total_indicators": valid_count,
         "in_risk_zone": in_risk_zone_count,
         "avg_proximity": round(avg_proximity, 1),
@@ -314,72 +210,1098 @@ def process_indicators():
         "risk_distribution": risk_distribution,
         "last_update": datetime.now(SP_TZ).isoformat()
     }
+
+def process_indicators(data=None):
+    """Processa todos os indicadores e calcula métricas"""
+    if data is None:
+        data = SIMULATED_DATA
+    
+    indicators = {}
+    total_proximity = 0
+    in_risk_zone_count = 0
+    risk_distribution = dict.fromkeys(RISK_LEVELS, 0)
+    
+    for name, entry in data.items():
+        record, proximity = evaluate_indicator(name, entry)
+        indicators[name] = record
+        total_proximity += proximity
+        
+        if record["in_risk_zone"]:
+            in_risk_zone_count += 1
+        
+        risk_distribution[record["risk_level"]] += 1
     
-    return indicators, summary
+    return indicators, summarize_indicators(total_proximity, len(indicators), in_risk_zone_count, risk_distribution)
 
-@app.route('/')
-def home():
-    return jsonify({
+# Campos de cada indicador aceitos em ?fields=; os estáticos também são servidos por /api/indicators/meta
+INDICATOR_FIELDS = ("current", "reference", "proximity", "in_risk_zone", "risk_level", "description", "unit")
+META_FIELDS = ("description", "unit", "reference")
+
+# ?risk_level= aceita os níveis com ou sem acento
+RISK_LEVEL_ALIASES = {
+    "BAIXO": "BAIXO",
+    "MÉDIO": "MÉDIO",
+    "MEDIO": "MÉDIO",
+    "ALTO": "ALTO",
+    "CRÍTICO": "CRÍTICO",
+    "CRITICO": "CRÍTICO"
+}
+
+# Visões filtradas (já serializadas e comprimidas) mantidas por snapshot
+VIEW_CACHE_SIZE = 64
+# Visões são montadas no caminho da requisição, com chaves escolhidas pelo cliente: compressão
+# mais barata que a dos corpos principais, que só acontece uma vez por versão
+VIEW_GZIP_LEVEL = 6
+VIEW_BROTLI_QUALITY = 5
+_views_lock = threading.Lock()
+
+def _split_param(value):
+    return [item.strip() for item in (value or "").split(",") if item.strip()]
+
+def parse_indicator_filters(args):
+    """Normaliza ?fields, ?names, ?risk_level e ?in_risk_zone em uma chave de visão
+    (None = payload completo); retorna (chave, mensagem de erro)"""
+    fields = _split_param(args.get("fields"))
+    names = _split_param(args.get("names"))
+    levels = _split_param(args.get("risk_level"))
+    in_risk = (args.get("in_risk_zone") or "").strip().lower()
+    
+    unknown = [field for field in fields if field not in INDICATOR_FIELDS]
+    if unknown:
+        return None, f"fields deve conter apenas: {', '.join(INDICATOR_FIELDS)}"
+    try:
+        levels = sorted({RISK_LEVEL_ALIASES[level.upper()] for level in levels})
+    except KeyError:
+        return None, f"risk_level deve ser um de: {', '.join(sorted(set(RISK_LEVEL_ALIASES.values())))}"
+    if in_risk in ("", "all"):
+        in_risk = None
+    elif in_risk in ("true", "1", "yes"):
+        in_risk = True
+    elif in_risk in ("false", "0", "no"):
+        in_risk = False
+    else:
+        return None, "in_risk_zone deve ser true ou false"
+    
+    key = (
+        tuple(field for field in INDICATOR_FIELDS if field in fields) or None,
+        tuple(sorted(set(names))) or None,
+        tuple(levels) or None,
+        in_risk
+    )
+    return (None if key == (None, None, None, None) else key), None
+
+def parse_since(args):
+    """Lê ?since=<versão>; retorna (versão ou None, mensagem de erro)"""
+    value = args.get("since")
+    if value is None or value == "":
+        return None, None
+    try:
+        since = int(value)
+    except ValueError:
+        since = -1
+    if since < 0:
+        return None, "since deve ser uma versão (inteiro não negativo)"
+    if any(args.get(name) for name in ("fields", "names", "risk_level", "in_risk_zone")):
+        return None, "since não pode ser combinado com fields, names, risk_level ou in_risk_zone"
+    return since, None
+
+def _dump_json(payload):
+    """Serializa no mesmo formato do jsonify (chaves ordenadas, compacto, ASCII)"""
+    return (json.dumps(payload, ensure_ascii=True, sort_keys=True, separators=(",", ":")) + "\n").encode("utf-8")
+
+def _encode_bodies(raw):
+    """Comprime o corpo uma única vez por versão em todas as codificações suportadas"""
+    bodies = {
+        "identity": raw,
+        "gzip": gzip.compress(raw, compresslevel=9, mtime=0)
+    }
+    if brotli is not None:
+        bodies["br"] = brotli.compress(raw, quality=11)
+    return bodies
+
+def _content_etag(raw, prefix=""):
+    """ETag forte a partir só dos bytes do corpo: corpos iguais têm a mesma ETag em qualquer
+    versão ou processo. Sem SHARED_SNAPSHOT_PATH cada worker processa a própria coleta e o
+    last_update do corpo difere entre workers, então o 304 só vale dentro do mesmo worker"""
+    return prefix + hashlib.blake2b(raw, digest_size=8).hexdigest()
+
+class _LazyBodies(dict):
+    """Corpos de uma visão: cada codificação é comprimida só quando um cliente a negocia"""
+    
+    def __init__(self, raw):
+        super().__init__(identity=raw)
+    
+    def __contains__(self, encoding):
+        return encoding in ("identity", "gzip") or (encoding == "br" and brotli is not None)
+    
+    def __missing__(self, encoding):
+        raw = dict.__getitem__(self, "identity")
+        if encoding == "gzip":
+            body = gzip.compress(raw, compresslevel=VIEW_GZIP_LEVEL, mtime=0)
+        elif encoding == "br" and brotli is not None:
+            body = brotli.compress(raw, quality=VIEW_BROTLI_QUALITY)
+        else:
+            raise KeyError(encoding)
+        self[encoding] = body
+        return body
+
+class IndicatorSnapshot:
+    """Snapshot imutável dos indicadores processados, criado uma vez por versão dos dados"""
+    
+    __slots__ = ("version", "source", "values", "summary", "last_update",
+                 "indicators_json", "summary_json", "indicators_bodies", "summary_bodies",
+                 "indicators_etag", "summary_etag", "stream_event",
+                 "meta_bodies", "meta_etag", "by_risk_level", "in_risk_names", "views")
+    
+    def __init__(self, version, source_data, source="simulated", processed=None, stale_since=None):
+        # processed: (indicators, summary) já calculados incrementalmente pelo indicator_graph
+        indicators, summary = processed or process_indicators(source_data)
+        if stale_since is not None:
+            # Warm start: o last_update é o da coleta original, não o do reprocessamento
+            summary = dict(summary, last_update=stale_since)
+        last_update = summary["last_update"]
+        # Marcador de dados desatualizados, só presente nos corpos do snapshot de warm start
+        stale = {"stale": True} if stale_since is not None else {}
+        
+        object.__setattr__(self, "version", version)
+        object.__setattr__(self, "source", source)
+        # Valores retidos em arrays por ID do registro; os dicionários só existem durante a serialização
+        object.__setattr__(self, "values", IndicatorValues.from_records(indicators, RISK_LEVELS))
+        object.__setattr__(self, "summary", summary)
+        object.__setattr__(self, "last_update", last_update)
+        
+        # Respostas já serializadas: os endpoints apenas devolvem estes bytes
+        object.__setattr__(self, "indicators_json", _dump_json({
+            "indicators": indicators,
+            "last_update": last_update,
+            "version": version,
+            **stale
+        }))
+        object.__setattr__(self, "summary_json", _dump_json({
+            "summary": summary,
+            "last_update": last_update,
+            **stale
+        }))
+        
+        # Corpos pré-comprimidos e ETags fortes derivadas só do conteúdo
+        object.__setattr__(self, "indicators_bodies", _encode_bodies(self.indicators_json))
+        object.__setattr__(self, "summary_bodies", _encode_bodies(self.summary_json))
+        object.__setattr__(self, "indicators_etag", _content_etag(self.indicators_json))
+        object.__setattr__(self, "summary_etag", _content_etag(self.summary_json))
+        
+        # Evento SSE com o estado completo, enviado na conexão ou quando o resume não é possível
+        object.__setattr__(self, "stream_event", sse_event("snapshot", version, _dump_json({
+            "version": version,
+            "indicators": indicators,
+            "summary": summary,
+            **stale
+        }).rstrip(b"\n")))
+        
+        # Metadados estáticos: ETag sem a versão, para continuar válido entre snapshots
+        meta_json = _dump_json({"indicators": {
+            name: {field: values[field] for field in META_FIELDS} for name, values in indicators.items()
+        }})
+        object.__setattr__(self, "meta_bodies", _encode_bodies(meta_json))
+        object.__setattr__(self, "meta_etag", _content_etag(meta_json, "m-"))
+        self._build_indexes()
+    
+    @property
+    def indicators(self):
+        """Registros processados ({nome: registro}), reconstruídos a partir dos arrays a cada acesso"""
+        return self.values.records()
+    
+    @property
+    def source_data(self):
+        return self.values.source_data()
+    
+    @property
+    def stale(self):
+        """True no snapshot carregado do disco na inicialização, até a primeira coleta"""
+        return self.source == "persisted"
+    
+    def _build_indexes(self):
+        """Índices usados pelos filtros de /api/indicators, montados uma vez por snapshot"""
+        values = self.values
+        by_risk_level = {}
+        for id in values.ids:
+            by_risk_level.setdefault(values.risk_level(id), set()).add(indicator_registry.REGISTRY[id].name)
+        object.__setattr__(self, "by_risk_level", {level: frozenset(names) for level, names in by_risk_level.items()})
+        object.__setattr__(self, "in_risk_names", frozenset(
+            indicator_registry.REGISTRY[id].name for id in values.ids if values.in_risk_zone(id)
+        ))
+        object.__setattr__(self, "views", {})
+    
+    def cached_view(self, key, build):
+        """Corpos e ETag de uma visão derivada deste snapshot, serializada uma única vez e
+        comprimida sob demanda em cada codificação pedida"""
+        cached = self.views.get(key)
+        if cached is not None:
+            return cached
+        
+        raw = build()
+        cached = (_LazyBodies(raw), _content_etag(raw))
+        with _views_lock:
+            if len(self.views) >= VIEW_CACHE_SIZE:
+                del self.views[next(iter(self.views))]
+            self.views[key] = cached
+        return cached
+    
+    def indicators_view(self, key):
+        """Visão filtrada de /api/indicators (chave de parse_indicator_filters)"""
+        return self.cached_view(key, lambda: self._filtered_json(key))
+    
+    def _filtered_json(self, key):
+        fields, names, levels, in_risk = key
+        records = self.indicators
+        selected = records.keys() if names is None else records.keys() & set(names)
+        if levels is not None:
+            selected = selected & frozenset().union(*(self.by_risk_level.get(level, ()) for level in levels))
+        if in_risk is not None:
+            selected = selected & self.in_risk_names if in_risk else selected - self.in_risk_names
+        
+        indicators = {
+            name: records[name] if fields is None else {field: records[name][field] for field in fields}
+            for name in selected
+        }
+        return _dump_json({"indicators": indicators, "last_update": self.last_update, "version": self.version})
+    
+    def to_shared(self):
+        """Serializa o snapshot (já processado e comprimido) para o arquivo compartilhado"""
+        meta = {
+            "source": self.source,
+            "last_update": self.last_update,
+            "indicators_etag": self.indicators_etag,
+            "summary_etag": self.summary_etag,
+            "meta_etag": self.meta_etag
+        }
+        blobs = {"stream_event": self.stream_event}
+        for encoding, body in self.indicators_bodies.items():
+            blobs["indicators." + encoding] = body
+        for encoding, body in self.summary_bodies.items():
+            blobs["summary." + encoding] = body
+        for encoding, body in self.meta_bodies.items():
+            blobs["meta." + encoding] = body
+        return pack_blobs(meta, blobs)
+    
+    @classmethod
+    def from_shared(cls, version, payload):
+        """Reconstrói um snapshot publicado por outro processo sem reprocessar nem recomprimir"""
+        meta, blobs = unpack_blobs(payload)
+        indicators_bodies = {}
+        summary_bodies = {}
+        meta_bodies = {}
+        for name, body in blobs.items():
+            kind, _, encoding = name.partition(".")
+            if kind == "indicators":
+                indicators_bodies[encoding] = body
+            elif kind == "summary":
+                summary_bodies[encoding] = body
+            elif kind == "meta":
+                meta_bodies[encoding] = body
+        
+        snapshot = object.__new__(cls)
+        fields = {
+            "version": version,
+            "source": meta["source"],
+            "values": IndicatorValues.from_records(json.loads(indicators_bodies["identity"])["indicators"], RISK_LEVELS),
+            "summary": json.loads(summary_bodies["identity"])["summary"],
+            "last_update": meta["last_update"],
+            "indicators_json": indicators_bodies["identity"],
+            "summary_json": summary_bodies["identity"],
+            "indicators_bodies": indicators_bodies,
+            "summary_bodies": summary_bodies,
+            "indicators_etag": meta["indicators_etag"],
+            "summary_etag": meta["summary_etag"],
+            "stream_event": blobs["stream_event"],
+            "meta_bodies": meta_bodies,
+            "meta_etag": meta["meta_etag"]
+        }
+        for name, value in fields.items():
+            object.__setattr__(snapshot, name, value)
+        snapshot._build_indexes()
+        return snapshot
+    
+    def __setattr__(self, name, value):
+        raise AttributeError("IndicatorSnapshot é imutável")
+
+_snapshot_lock = threading.Lock()
+_snapshot_version = 0
+_snapshot = None
+
+# Snapshot compartilhado entre processos (SHARED_SNAPSHOT_PATH); None = snapshot só deste processo
+shared_snapshot = None
+
+# Mudanças recentes por versão, consumidas pelo /api/stream
+change_log = ChangeLog()
+
+def _install_snapshot(snapshot):
+    """Torna o snapshot o atual e registra a mudança no change_log (chamar com _snapshot_lock)"""
+    global _snapshot
+    
+    previous = _snapshot
+    # Troca de referência única: leitores veem o snapshot antigo ou o novo, nunca um meio-termo
+    _snapshot = snapshot
+    
+    if snapshot.version == 0:
+        # Dados locais de um worker leitor enquanto o produtor não publica: nenhum cliente
+        # recebe esta versão pelo log
+        return
+    if previous is None or previous.version == 0:
+        change_log.start(snapshot.version)
+    else:
+        changed, removed, summary_changes = diff_snapshots(
+            previous.indicators, snapshot.indicators, previous.summary, snapshot.summary
+        )
+        event = sse_event("update", snapshot.version, _dump_json({
+            "version": snapshot.version,
+            "changed": changed,
+            "removed": removed,
+            "summary": summary_changes
+        }).rstrip(b"\n"))
+        change_log.append(snapshot.version, (changed, removed, summary_changes), event)
+
+def publish_snapshot(data, source="simulated", processed=None, stale_since=None):
+    """Cria um novo snapshot a partir dos dados e o torna o snapshot atual"""
+    global _snapshot_version
+    
+    with _snapshot_lock:
+        if shared_snapshot is not None:
+            # A versão vem do arquivo compartilhado, única entre todos os workers
+            def build(version):
+                snapshot = IndicatorSnapshot(version, data, source, processed, stale_since)
+                return snapshot, snapshot.to_shared()
+            snapshot = shared_snapshot.publish(build)
+        else:
+            _snapshot_version += 1
+            snapshot = IndicatorSnapshot(_snapshot_version, data, source, processed, stale_since)
+        _install_snapshot(snapshot)
+    
+    return snapshot
+
+# Estado incremental dos dados coletados: entradas compartilhadas (preço, médias, RSI) e
+# valores de cada indicador; só o que mudou é recalculado a cada coleta ou novo valor de entrada
+indicator_graph = IndicatorGraph(
+    evaluate_indicator,
+    summarize_indicators,
+    bindings=PRICE_BINDINGS,
+    metadata=indicator_registry.metadata,
+    risk_levels=RISK_LEVELS
+)
+# Idade (s) dos valores que a última coleta reaproveitou da agenda em vez de buscar de novo.
+# Fica fora das entradas do grafo: a idade muda a cada ciclo e não pode recalcular os indicadores
+# nem aparecer como mudança em todos os deltas; vai para o resumo (stale_indicators)
+_indicator_ages = {}
+
+def publish_graph(source="coinmarketcap", sources=None, inputs=None):
+    """Atualiza o indicator_graph (valores coletados e/ou entradas) e publica o resultado;
+    sem mudanças nas entradas (e sem nova coleta), mantém o snapshot atual"""
+    global _indicator_ages
+    
+    with indicator_graph.lock:
+        changed = set()
+        if sources is not None:
+            _indicator_ages = {name: entry["age_seconds"] for name, entry in sources.items() if "age_seconds" in entry}
+            sources = {
+                name: {field: value for field, value in entry.items() if field != "age_seconds"}
+                for name, entry in sources.items()
+            }
+            changed |= indicator_graph.set_sources(sources)
+        if inputs:
+            changed |= indicator_graph.set_inputs(inputs)
+        if sources is None and not changed:
+            return get_snapshot()
+        indicators, summary = indicator_graph.results()
+        ages = {name: age for name, age in _indicator_ages.items() if name in indicators}
+        if ages:
+            summary = dict(summary, stale_indicators=ages)
+        return publish_snapshot(dict(indicator_graph.data), source, (indicators, summary))
+
+def sync_shared_snapshot():
+    """Carrega a versão publicada por outro processo quando ela é mais nova que a atual"""
+    version = shared_snapshot.version
+    if not version or (_snapshot is not None and version <= _snapshot.version):
+        return False
+    
+    with _snapshot_lock:
+        result = shared_snapshot.read()
+        if result is None:
+            return False
+        version, payload = result
+        if _snapshot is not None and version <= _snapshot.version:
+            return False
+        _install_snapshot(IndicatorSnapshot.from_shared(version, payload))
+    return True
+
+def indicators_delta(snapshot, since):
+    """Corpo de /api/indicators?since=N: só o que mudou depois da versão N ("delta": true) ou o
+    estado completo ("delta": false, o mesmo corpo para qualquer N) quando N já saiu do
+    change_log ou é desconhecida.
+    Descrição e unidade ficam de fora das mudanças: vêm de /api/indicators/meta."""
+    cached = snapshot.views.get(("since", since))
+    if cached is not None:
+        return cached
+    
+    entries = change_log.entries_since(since) if since <= snapshot.version else None
+    if entries is not None:
+        # O log pode já ter versões mais novas que o snapshot obtido pela requisição
+        entries = [entry for entry in entries if entry[0] <= snapshot.version]
+        if since < snapshot.version and (not entries or entries[-1][0] != snapshot.version):
+            entries = None
+    if entries is None:
+        # Todo ?since= sem cobertura no log recebe o mesmo corpo, serializado uma vez por snapshot
+        return snapshot.cached_view(("since", None), lambda: _dump_json({
+            "version": snapshot.version,
+            "delta": False,
+            "indicators": snapshot.indicators,
+            "summary": snapshot.summary,
+            "last_update": snapshot.last_update
+        }))
+    
+    changed, removed, summary_changes = merge_changes(entries)
+    return snapshot.cached_view(("since", since), lambda: _dump_json({
+        "version": snapshot.version,
+        "since": since,
+        "delta": True,
+        "changed": {
+            name: {field: value for field, value in values.items() if field not in ("description", "unit")}
+            for name, values in changed.items()
+        },
+        "removed": removed,
+        "summary": summary_changes,
+        "last_update": snapshot.last_update
+    }))
+
+# Com False, get_snapshot só devolve o snapshot já instalado e a sincronização com o arquivo
+# compartilhado fica só com a thread shared-snapshot-follower: o asgi_server desliga, pois ler
+# o arquivo (seqlock, lock do snapshot, parse do JSON) bloquearia o event loop
+sync_on_get = True
+
+def get_snapshot():
+    """Retorna o snapshot atual; no modo compartilhado, antes confere a versão publicada"""
+    if shared_snapshot is not None and sync_on_get:
+        sync_shared_snapshot()
+    return _snapshot
+
+# Ordem de preferência quando o cliente aceita mais de uma codificação
+ENCODING_PREFERENCE = ("br", "gzip")
+
+def _choose_encoding(bodies):
+    """Escolhe a melhor codificação aceita pelo cliente entre as disponíveis"""
+    for encoding in ENCODING_PREFERENCE:
+        if encoding in bodies and request.accept_encodings.quality(encoding) > 0:
+            return encoding
+    return "identity"
+
+def _snapshot_response(bodies, base_etag):
+    """Responde com o corpo pré-serializado, tratando If-None-Match e Accept-Encoding"""
+    encoding = _choose_encoding(bodies)
+    etag = base_etag if encoding == "identity" else f"{base_etag}-{encoding}"
+    
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+    else:
+        response = Response(bodies[encoding], mimetype="application/json")
+        if encoding != "identity":
+            response.headers["Content-Encoding"] = encoding
+    
+    response.set_etag(etag)
+    response.vary.add("Accept-Encoding")
+    return response
+
+def normalize_scraped_data(scraped):
+    """Converte a saída do CoinMarketCapScraper para o formato usado pela API; nomes fora do
+    registro são descartados (registrá-los faria os arrays de valores crescerem a cada linha
+    renomeada na origem, pela vida inteira do processo)"""
+    data = {}
+    unknown = []
+    
+    for name, entry in scraped.items():
+        current = entry.get("current")
+        reference = entry.get("reference")
+        if current is None or reference is None:
+            continue
+        
+        # Nome canônico, descrição e unidade do registro
+        definition = indicator_registry.resolve(name)
+        if definition is None:
+            unknown.append(name)
+            continue
+        data[definition.name] = {
+            "current": current,
+            "reference": reference,
+            "description": definition.description,
+            "unit": definition.unit
+        }
+        if "age_seconds" in entry:
+            # Último valor bom reaproveitado pela agenda de coleta, com a idade em segundos
+            data[definition.name]["age_seconds"] = entry["age_seconds"]
+    
+    if unknown:
+        logger.warning(f"⚠️ Indicadores fora do registro ignorados: {', '.join(sorted(unknown))}")
+    return data
+
+def persist_snapshot(snapshot, path=None):
+    """Grava os valores do snapshot no formato do save_data() do scraper (troca atômica do arquivo)"""
+    path = path or SNAPSHOT_FILE
+    payload = {
+        "indicators": snapshot.source_data,
+        "last_update": snapshot.last_update,
+        "source": snapshot.source,
+        "total_indicators": len(snapshot.values),
+        "version": snapshot.version
+    }
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(payload, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+
+def load_persisted_snapshot(path=None, max_age=None):
+    """(dados normalizados, last_update, versão) do último snapshot gravado, ou None se não
+    existir, for inválido ou mais velho que max_age"""
+    path = path or SNAPSHOT_FILE
+    max_age = WARM_START_MAX_AGE if max_age is None else max_age
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            payload = json.load(f)
+        last_update = payload["last_update"]
+        # O save_data() grava horário local sem fuso; os snapshots da API, com fuso
+        age = time.time() - datetime.fromisoformat(last_update).timestamp()
+    except (OSError, ValueError, KeyError, TypeError) as e:
+        if not isinstance(e, FileNotFoundError):
+            logger.warning(f"⚠️ Snapshot persistido inválido em {path}: {e}")
+        return None
+    
+    if age > max_age:
+        logger.info(f"🕰️ Snapshot persistido em {path} tem {age / 3600:.1f}h; ignorado")
+        return None
+    data = normalize_scraped_data(payload.get("indicators") or {})
+    if not data:
+        return None
+    return data, last_update, int(payload.get("version") or 0)
+
+def initial_snapshot_data():
+    """Dados do primeiro snapshot do processo: (dados, fonte, stale_since, versão). Com a coleta
+    em segundo plano ativa, o último snapshot persistido é servido como desatualizado até a
+    primeira coleta terminar; sem ele, os dados simulados"""
+    persisted = load_persisted_snapshot() if REFRESH_INTERVAL > 0 and SNAPSHOT_FILE else None
+    if persisted is None:
+        return SIMULATED_DATA, "simulated", None, 0
+    data, last_update, version = persisted
+    logger.info(f"♻️ Warm start com {len(data)} indicadores persistidos em {SNAPSHOT_FILE} ({last_update})")
+    return data, "persisted", last_update, version
+
+def publish_initial_snapshot():
+    global _snapshot_version
+    data, source, stale_since, version = initial_snapshot_data()
+    if shared_snapshot is None:
+        # As versões continuam as do processo anterior: ?since= antigo recebe o estado completo
+        with _snapshot_lock:
+            _snapshot_version = max(_snapshot_version, version)
+    return publish_snapshot(data, source, stale_since=stale_since)
+
+class BackgroundRefresher:
+    """Executa o scraper periodicamente fora do caminho das requisições e publica novos snapshots"""
+    
+    def __init__(self, interval):
+        self.interval = interval
+        self.scraper = None
+        self.price_engine = None
+        self.last_error = None
+        self._wake = threading.Event()
+        # Ciclo antecipado por /api/update: consulta todas as fontes cujo circuito não está aberto
+        self._forced = False
+        self._stopped = False
+        self._thread = None
+        # Ciclos concluídos, para quem precisa esperar pelo próximo resultado
+        self._cycle_done = threading.Condition()
+        self._cycles = 0
+        self._running = False
+    
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="indicator-refresher", daemon=True)
+            self._thread.start()
+    
+    def stop(self):
+        self._stopped = True
+        self._wake.set()
+    
+    def trigger(self):
+        """Antecipa o próximo ciclo sem bloquear quem chamou"""
+        self._forced = True
+        self._wake.set()
+    
+    def refresh_now(self, timeout):
+        """Antecipa o ciclo (ou aproveita o que já está rodando) e espera ele terminar"""
+        with self._cycle_done:
+            target = self._cycles + 1
+            if not self._running:
+                self._forced = True
+                self._wake.set()
+            self._cycle_done.wait_for(lambda: self._cycles >= target, timeout=timeout)
+        return get_snapshot()
+    
+    def refresh_once(self, force=False):
+        """Executa um ciclo de scraping e troca o snapshot atual atomicamente"""
+        if self.scraper is None:
+            from coinmarketcap_scraper_v2 import CoinMarketCapScraper
+            self.scraper = CoinMarketCapScraper(
+                schedules=with_overrides(CoinMarketCapScraper.SOURCE_SCHEDULES, SOURCE_SCHEDULES)
+            )
+            current = get_snapshot()
+            if current.stale:
+                # Warm start: fontes que falharem no primeiro ciclo seguem com os valores persistidos
+                self.scraper.seed_last_good(current.source_data, max(0.0, _snapshot_age()))
+        
+        if sampling_profiler is not None and sampling_profiler.sampled():
+            # Pilhas da thread de atualização e das threads do scraper (fontes em paralelo)
+            sampler = sampling_profiler.sample_section("scrape", ("scraper",))
+            try:
+                scraped = self.scraper.scrape_indicators(force) or {}
+            finally:
+                sampling_profiler.write(sampler.stop())
+        else:
+            scraped = self.scraper.scrape_indicators(force) or {}
+        
+        # Dados fixos de fallback não são medições: não entram no histórico nem no arquivo de
+        # snapshot. No warm start, o snapshot persistido segue servido até alguma fonte responder
+        fallback = self.scraper.last_cycle_result == "fallback"
+        if get_snapshot().stale and (fallback or not self.scraper.last_cycle_fetched):
+            logger.warning("⚠️ Nenhuma fonte respondeu; mantendo o snapshot persistido")
+            return None
+        data = normalize_scraped_data(scraped)
+        
+        # Preço, médias e RSI do histórico local são entradas do grafo: os indicadores derivados
+        # só do preço são calculados localmente, sem depender do scraping
+        inputs = None
+        if PRICE_HISTORY_FILE:
+            if self.price_engine is None:
+                self.price_engine = PriceIndicatorEngine()
+            self.price_engine.sync_file(PRICE_HISTORY_FILE)
+            inputs = self.price_engine.inputs()
+        
+        if not data and not any(value is not None for value in (inputs or {}).values()):
+            logger.warning("⚠️ Scraping não retornou indicadores; mantendo snapshot atual")
+            return None
+        
+        snapshot = publish_graph("coinmarketcap", sources=data, inputs=inputs)
+        if fallback:
+            return snapshot
+        history_store.append(time.time(), snapshot.source_data)
+        if SNAPSHOT_FILE:
+            try:
+                persist_snapshot(snapshot)
+            except OSError as e:
+                logger.warning(f"⚠️ Não foi possível gravar o snapshot em {SNAPSHOT_FILE}: {e}")
+        return snapshot
+    
+    def _run(self):
+        while not self._stopped:
+            started = time.monotonic()
+            with self._cycle_done:
+                self._running = True
+            force, self._forced = self._forced, False
+            try:
+                snapshot = self.refresh_once(force)
+                self.last_error = None
+                metrics.REFRESH_CYCLES.labels("published" if snapshot is not None else "empty").inc()
+                if snapshot is not None:
+                    logger.info(f"✅ Snapshot v{snapshot.version} publicado com {len(snapshot.values)} indicadores")
+            except Exception as e:
+                self.last_error = str(e)
+                metrics.REFRESH_CYCLES.labels("error").inc()
+                logger.error(f"❌ Erro na atualização em segundo plano: {e}")
+            
+            with self._cycle_done:
+                self._running = False
+                self._cycles += 1
+                self._cycle_done.notify_all()
+            
+            elapsed = time.monotonic() - started
+            self._wait(self._next_wait(elapsed))
+    
+    def _next_wait(self, elapsed):
+        """Até o prazo do ciclo ou até a próxima fonte devida, o que vier antes (no mínimo 1 s,
+        para uma fonte sempre devida não virar laço ocupado)"""
+        timeout = max(0, self.interval - elapsed)
+        if self.scraper is not None:
+            timeout = min(timeout, max(1.0, self.scraper.schedule.seconds_until_due()))
+        return timeout
+    
+    def _wait(self, timeout):
+        """Espera o próximo ciclo; no modo compartilhado também atende pedidos dos outros workers"""
+        if shared_snapshot is None:
+            self._wake.wait(timeout)
+        else:
+            requests = shared_snapshot.refresh_requests
+            deadline = time.monotonic() + timeout
+            while not self._wake.wait(min(SHARED_POLL_INTERVAL, max(0, deadline - time.monotonic()))):
+                if time.monotonic() >= deadline or shared_snapshot.refresh_requests != requests:
+                    break
+        self._wake.clear()
+
+def _start_producer():
+    """Este processo passa a publicar os snapshots compartilhados"""
+    global refresher
+    
+    logger.info(f"🏭 Processo {os.getpid()} é o produtor do snapshot compartilhado")
+    # None: o produtor anterior morreu no meio de uma escrita e deixou o seq ímpar; a nova
+    # publicação conserta o seqlock (sem ela os leitores esgotariam as tentativas a cada leitura)
+    if shared_snapshot.version in (0, None):
+        publish_initial_snapshot()
+    if REFRESH_INTERVAL > 0:
+        refresher = BackgroundRefresher(REFRESH_INTERVAL)
+        refresher.start()
+
+def _follow_shared_snapshot():
+    """Acompanha o arquivo compartilhado fora das requisições: acorda os streams SSE com novas
+    versões e assume a produção se o produtor atual morrer"""
+    while True:
+        time.sleep(SHARED_POLL_INTERVAL)
+        try:
+            sync_shared_snapshot()
+            if not shared_snapshot.is_producer and shared_snapshot.try_become_producer():
+                _start_producer()
+        except Exception as e:
+            logger.error(f"❌ Erro ao acompanhar o snapshot compartilhado: {e}")
+
+# Profiling opcional (PROFILE_SAMPLE_RATE, PROFILE_TOKEN e limites de disco em profiler.py);
+# desativado, nenhum hook é registrado
+sampling_profiler = profiler.from_environment()
+
+history_store = HistoryStore(HISTORY_DIR)
+
+refresher = None
+if SHARED_SNAPSHOT_PATH:
+    shared_snapshot = SharedSnapshot(SHARED_SNAPSHOT_PATH)
+    if shared_snapshot.try_become_producer():
+        _start_producer()
+    if _snapshot is None and not sync_shared_snapshot():
+        # Produtor ainda não publicou: dados locais (persistidos ou simulados) até a primeira versão compartilhada
+        data, source, stale_since, _ = initial_snapshot_data()
+        with _snapshot_lock:
+            _install_snapshot(IndicatorSnapshot(0, data, source, stale_since=stale_since))
+    threading.Thread(target=_follow_shared_snapshot, name="shared-snapshot-follower", daemon=True).start()
+else:
+    publish_initial_snapshot()
+    if REFRESH_INTERVAL > 0:
+        refresher = BackgroundRefresher(REFRESH_INTERVAL)
+        refresher.start()
+
+def _snapshot_age():
+    """Segundos desde o processamento do snapshot servido (no modo compartilhado, pelo produtor)"""
+    snapshot = get_snapshot()
+    return time.time() - datetime.fromisoformat(snapshot.last_update).timestamp()
+
+metrics.gauge_function("btc_snapshot_age_seconds", "Idade do snapshot servido", _snapshot_age)
+metrics.gauge_function("btc_snapshot_version", "Versão do snapshot servido", lambda: get_snapshot().version)
+
+def source_status():
+    """Agenda e circuit breaker de cada fonte (só no processo que executa o scraper)"""
+    if refresher is None or refresher.scraper is None:
+        return {}
+    return refresher.scraper.schedule.status()
+
+metrics.gauge_function(
+    "btc_scraper_source_age_seconds", "Idade do último valor bom de cada fonte",
+    lambda: {(name,): status["age_seconds"] for name, status in source_status().items()}, ("source",))
+metrics.gauge_function(
+    "btc_scraper_source_circuit_open", "1 enquanto o circuito da fonte está aberto",
+    lambda: {(name,): status["state"] == "open" for name, status in source_status().items()}, ("source",))
+
+@app.before_request
+def _start_request_timer():
+    request.environ["metrics.started"] = time.perf_counter()
+
+@app.after_request
+def _observe_request(response):
+    """Latência e tamanho por rota; respostas em stream (SSE) entram só na contagem"""
+    route = request.url_rule.rule if request.url_rule is not None else "unmatched"
+    if response.is_streamed and response.content_length is None:
+        metrics.observe_request(route, response.status_code, None)
+    else:
+        elapsed = time.perf_counter() - request.environ["metrics.started"]
+        metrics.observe_request(route, response.status_code, elapsed, response.content_length)
+    return response
+
+if sampling_profiler is not None:
+    @app.before_request
+    def _start_profile():
+        token = request.args.get("profile") or request.headers.get("X-Profile-Token")
+        if sampling_profiler.sampled() or sampling_profiler.authorized(token):
+            route = request.url_rule.rule if request.url_rule is not None else "unmatched"
+            request.environ["profiler.trace"] = sampling_profiler.trace_request(f"request:{route}")
+    
+    @app.teardown_request
+    def _finish_profile(exc):
+        trace = request.environ.pop("profiler.trace", None)
+        if trace is not None:
+            sampling_profiler.write(trace.stop())
+
+def home_payload():
+    """Corpo do endpoint raiz (compartilhado com o servidor ASGI)"""
+    snapshot = get_snapshot()
+    
+    return {
         "message": "🚀 Bitcoin Market Cycle API - Versão de Teste",
         "status": "online",
         "version": "TEST-1.0.0",
         "last_update": datetime.now(SP_TZ).isoformat(),
-        "data_source": "Dados Simulados Realistas",
-        "total_indicators": len(SIMULATED_DATA),
+        "data_source": "Dados Simulados Realistas" if snapshot.source == "simulated" else "CoinMarketCap",
+        "stale": snapshot.stale,
+        "total_indicators": len(snapshot.values),
         "note": "Esta é uma versão de teste com dados simulados para validar o frontend"
-    })
+    }
+
+# Uma atualização real por vez, no máximo uma a cada UPDATE_MIN_INTERVAL, e limite por cliente
+update_flight = SingleFlight(UPDATE_MIN_INTERVAL)
+update_rate_limiter = ClientRateLimiter(UPDATE_RATE_PER_MINUTE / 60, UPDATE_BURST)
+
+def _refresh_for_update():
+    if refresher is not None:
+        # O scraping fica na thread de atualização; espera o ciclo terminar
+        return refresher.refresh_now(UPDATE_WAIT_TIMEOUT)
+    if shared_snapshot is not None and REFRESH_INTERVAL > 0:
+        # Só o produtor faz scraping: os demais workers apenas pedem a antecipação do ciclo
+        shared_snapshot.request_refresh()
+        return get_snapshot()
+    return publish_snapshot(SIMULATED_DATA)
+
+def update_payload(client_id=None):
+    """Executa a atualização forçada; retorna (status HTTP, corpo da resposta)"""
+    allowed, retry_after = update_rate_limiter.allow(client_id)
+    if not allowed:
+        return 429, {
+            "error": "Muitas atualizações solicitadas; tente novamente mais tarde",
+            "retry_after": math.ceil(retry_after)
+        }
+    
+    # started = esta chamada fez a atualização; joined = aproveitou uma em andamento;
+    # recent = a última terminou há menos de UPDATE_MIN_INTERVAL segundos
+    refresh = update_flight.run(_refresh_for_update)
+    # O snapshot atual, não o da última atualização forçada: o refresher pode ter publicado depois
+    snapshot = get_snapshot()
+    summary = snapshot.summary
+    
+    return 200, {
+        "message": "✅ Dados atualizados com sucesso!",
+        "refresh": refresh,
+        "last_update": snapshot.last_update,
+        "total_indicators": len(snapshot.values),
+        "avg_proximity": summary['avg_proximity'],
+        "in_risk_zone": summary['in_risk_zone'],
+        "risk_zone_percentage": summary['risk_zone_percentage'],
+        "note": "Dados simulados para teste" if snapshot.source == "simulated" else "Atualização agendada em segundo plano"
+    }
+
+def health_payload():
+    """Corpo do health check (compartilhado com o servidor ASGI)"""
+    snapshot = get_snapshot()
+    
+    payload = {
+        "status": "healthy",
+        "last_update": datetime.now(SP_TZ).isoformat(),
+        "indicators_count": len(snapshot.values),
+        "version": "TEST-1.0.0",
+        "data_source": "Simulated Data" if snapshot.source == "simulated" else "CoinMarketCap",
+        # Warm start: dados do snapshot persistido, com a idade, até a primeira coleta
+        "stale": snapshot.stale,
+        "data_age_seconds": round(_snapshot_age(), 1)
+    }
+    sources = source_status()
+    if sources:
+        payload["sources"] = sources
+    return payload
+
+@app.route('/')
+def home():
+    return jsonify(home_payload())
 
 @app.route('/api/indicators')
 def get_indicators():
-    """Retorna todos os indicadores processados"""
-    indicators, summary = process_indicators()
+    """Retorna os indicadores processados, opcionalmente filtrados (?fields, ?names, ?risk_level,
+    ?in_risk_zone) ou só as mudanças desde uma versão (?since)"""
+    since, error = parse_since(request.args)
+    if error is None and since is None:
+        key, error = parse_indicator_filters(request.args)
+    if error:
+        return jsonify({"error": error}), 400
     
-    return jsonify({
-        "indicators": indicators,
-        "last_update": datetime.now(SP_TZ).isoformat()
-    })
+    snapshot = get_snapshot()
+    if since is not None:
+        return _snapshot_response(*indicators_delta(snapshot, since))
+    if key is None:
+        return _snapshot_response(snapshot.indicators_bodies, snapshot.indicators_etag)
+    return _snapshot_response(*snapshot.indicators_view(key))
+
+@app.route('/api/indicators/meta')
+def get_indicators_meta():
+    """Metadados estáticos (descrição, unidade, referência), para cache de longa duração no cliente"""
+    snapshot = get_snapshot()
+    response = _snapshot_response(snapshot.meta_bodies, snapshot.meta_etag)
+    response.headers["Cache-Control"] = f"public, max-age={META_MAX_AGE}"
+    return response
 
 @app.route('/api/summary')
 def get_summary():
     """Retorna resumo da análise"""
-    indicators, summary = process_indicators()
-    
-    return jsonify({
-        "summary": summary,
-        "last_update": datetime.now(SP_TZ).isoformat()
-    })
+    snapshot = get_snapshot()
+    return _snapshot_response(snapshot.summary_bodies, snapshot.summary_etag)
 
 @app.route('/api/update')
 def force_update():
     """Força atualização imediata dos dados"""
-    indicators, summary = process_indicators()
-    
-    return jsonify({
-        "message": "✅ Dados atualizados com sucesso!",
-        "last_update": datetime.now(SP_TZ).isoformat(),
-        "total_indicators": len(indicators),
-        "avg_proximity": summary['avg_proximity'],
-        "in_risk_zone": summary['in_risk_zone'],
-        "risk_zone_percentage": summary['risk_zone_percentage'],
-        "note": "Dados simulados para teste"
-    })
+    status, payload = update_payload(request.remote_addr)
+    response = jsonify(payload)
+    response.status_code = status
+    if status == 429:
+        response.headers["Retry-After"] = str(payload["retry_after"])
+    return response
 
 @app.route('/health')
 def health_check():
     """Verifica status da API"""
-    return jsonify({
-        "status": "healthy",
-        "last_update": datetime.now(SP_TZ).isoformat(),
-        "indicators_count": len(SIMULATED_DATA),
-        "version": "TEST-1.0.0",
-        "data_source": "Simulated Data"
-    })
+    return jsonify(health_payload())
+
+@app.route('/metrics')
+def get_metrics():
+    """Métricas no formato texto do Prometheus (por processo)"""
+    return Response(metrics.REGISTRY.render(), content_type=metrics.CONTENT_TYPE)
+
+def initial_stream_events(last_event_id):
+    """Primeiros eventos de uma conexão SSE: resume pelo Last-Event-ID ou snapshot completo"""
+    entries = None
+    if last_event_id is not None and last_event_id <= change_log.latest_version:
+        entries = change_log.entries_since(last_event_id)
+    if entries is None:
+        snapshot = get_snapshot()
+        return snapshot.version, [snapshot.stream_event]
+    
+    # Resume: apenas o que mudou depois do Last-Event-ID
+    return (entries[-1][0] if entries else last_event_id), [event for _, _, event in entries]
+
+def pending_stream_events(version):
+    """Eventos posteriores a `version`; se o log já os descartou, o snapshot completo"""
+    entries = change_log.entries_since(version)
+    if entries is None:
+        # O cliente ficou para trás do log: reenviar o estado completo
+        snapshot = get_snapshot()
+        return snapshot.version, [snapshot.stream_event]
+    if not entries:
+        return version, []
+    return entries[-1][0], [event for _, _, event in entries]
+
+def _stream_events(last_event_id):
+    """Gera os eventos SSE de uma conexão: estado inicial, mudanças e heartbeats"""
+    yield f"retry: {int(STREAM_HEARTBEAT * 1000)}\n\n".encode()
+    
+    version, events = initial_stream_events(last_event_id)
+    yield from events
+    
+    while True:
+        if not change_log.wait_for_change(version, STREAM_HEARTBEAT):
+            yield b": heartbeat\n\n"
+            continue
+        
+        version, events = pending_stream_events(version)
+        yield from events
+
+@app.route('/api/stream')
+def stream_indicators():
+    """Server-Sent Events: snapshot inicial e, depois, só os indicadores que mudaram"""
+    if not request.environ.get("wsgi.multithread"):
+        # Worker sync (gunicorn padrão): cada conexão SSE prenderia o worker inteiro até o timeout.
+        # Streams são servidos pelo asgi_server ou por servidores WSGI com threads
+        return jsonify({"error": "/api/stream não é servido por workers sync; use o asgi_server"}), 501
+    last_event_id = request.headers.get("Last-Event-ID") or request.args.get("last_event_id")
+    try:
+        last_event_id = int(last_event_id) if last_event_id else None
+    except ValueError:
+        last_event_id = None
+    
+    response = Response(_stream_events(last_event_id), mimetype="text/event-stream")
+    response.headers["Cache-Control"] = "no-cache"
+    response.headers["X-Accel-Buffering"] = "no"
+    return response
+
+# Tamanho (segundos) dos buckets aceitos em ?interval=
+HISTORY_INTERVALS = {"1m": 60, "5m": 300, "15m": 900, "1h": 3600, "4h": 14400, "1d": 86400, "1w": 604800}
+
+# Máximo de pontos por série em uma resposta do /api/history; acima disso, 400
+HISTORY_MAX_POINTS = int(os.environ.get("HISTORY_MAX_POINTS", "5000"))
+
+def _parse_history_time(value):
+    """Aceita epoch em segundos ou data ISO (sem fuso = horário de São Paulo)"""
+    if value is None or value == "":
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        moment = datetime.fromisoformat(value)
+        if moment.tzinfo is None:
+            moment = moment.replace(tzinfo=SP_TZ)
+        return moment.timestamp()
+
+def history_payload(args):
+    """Histórico dos indicadores com filtros e reamostragem (?from, ?to, ?names, ?resolution,
+    ?interval); retorna (status HTTP, corpo da resposta)
+
+    Sem parâmetros, devolve o último valor de cada dia: a série bruta só sai com resolution=raw
+    e dentro de HISTORY_MAX_POINTS pontos.
+    """
+    resolution = args.get("resolution", "last")
+    interval_name = args.get("interval", "1d")
+    names = [name.strip() for name in args.get("names", "").split(",") if name.strip()]
+    
+    try:
+        start = _parse_history_time(args.get("from"))
+        end = _parse_history_time(args.get("to"))
+    except ValueError:
+        return 400, {"error": "Parâmetros from/to devem ser epoch em segundos ou data ISO"}
+    
+    if resolution not in RESOLUTIONS:
+        return 400, {"error": f"resolution deve ser um de: {', '.join(RESOLUTIONS)}"}
+    if interval_name not in HISTORY_INTERVALS:
+        return 400, {"error": f"interval deve ser um de: {', '.join(HISTORY_INTERVALS)}"}
+    
+    # Buckets diários alinhados ao dia de São Paulo
+    utc_offset = int(datetime.now(SP_TZ).utcoffset().total_seconds())
+    try:
+        timestamps, series = history_store.query(
+            start=start,
+            end=end,
+            names=names or None,
+            resolution=resolution,
+            interval=HISTORY_INTERVALS[interval_name],
+            utc_offset=utc_offset,
+            max_points=HISTORY_MAX_POINTS
+        )
+    except HistoryLimitError as e:
+        return 400, {
+            "error": f"{e}: reduza o período (from/to) ou use uma resolução reamostrada com interval maior",
+            "max_points": e.max_points
+        }
+    
+    return 200, {
+        "timestamps": timestamps,
+        "series": series,
+        "resolution": resolution,
+        "interval": interval_name if resolution != "raw" else None,
+        "total_indicators": len(series),
+        "last_update": datetime.now(SP_TZ).isoformat()
+    }
+
+@app.route('/api/history')
+def get_history():
+    """Retorna o histórico dos indicadores com filtros e reamostragem"""
+    status, payload = history_payload(request.args)
+    return jsonify(payload), status
 
 if __name__ == '__main__':
     print("🚀 Iniciando Bitcoin Market Cycle API - Versão de Teste")
     print(f"📊 {len(SIMULATED_DATA)} indicadores simulados carregados")
     
-    indicators, summary = process_indicators()
+    summary = get_snapshot().summary
     print(f"✅ Proximidade média: {summary['avg_proximity']:.1f}%")
     print(f"🔴 Na zona de risco: {summary['in_risk_zone']}/{summary['total_indicators']}")
     
@@ -0,0 +1,296 @@
+"""
+Servidor ASGI da Bitcoin Market Cycle API
+Mesmas rotas e o mesmo JSON do api_server (Flask), servidos de forma assíncrona a partir
+do mesmo snapshot. Conexões lentas e streams SSE ociosos não prendem workers.
+
+Uso:
+    uvicorn asgi_server:app --host 0.0.0.0 --port 5003
+    gunicorn -k uvicorn.workers.UvicornWorker asgi_server:app      # no lugar da linha web do Procfile
+
+A produção segue com o Flask (Procfile); este modo é uma alternativa para muitas conexões
+simultâneas e para o /api/stream, que os workers sync não servem. Os hooks de profiling e os
+error handlers do Flask não existem neste modo.
+"""
+
+import asyncio
+import time
+from urllib.parse import parse_qs
+
+import api_server
+import metrics
+from api_server import (
+    ENCODING_PREFERENCE,
+    _dump_json,
+    change_log,
+    get_snapshot,
+    health_payload,
+    history_payload,
+    home_payload,
+    indicators_delta,
+    initial_stream_events,
+    parse_indicator_filters,
+    parse_since,
+    pending_stream_events,
+    update_payload
+)
+from update_control import forwarded_client
+
+# Novas versões do snapshot compartilhado chegam pela thread que acompanha o arquivo, nunca
+# pelas requisições no event loop
+api_server.sync_on_get = False
+
+CORS_HEADERS = [(b"access-control-allow-origin", b"*")]
+
+# Rotas com série própria nas métricas; outros caminhos ficam em "unmatched"
+ROUTES = frozenset(("/", "/api/indicators", "/api/indicators/meta", "/api/summary", "/api/update", "/api/history",
+                    "/health", "/api/stream", "/metrics"))
+
+class _ChangeSignal:
+    """Acorda as conexões SSE do event loop quando o change_log recebe uma nova versão"""
+    
+    def __init__(self):
+        self.loop = None
+        self.event = None
+    
+    def ensure_bound(self):
+        if self.loop is None:
+            self.loop = asyncio.get_running_loop()
+            self.event = asyncio.Event()
+            change_log.add_listener(self.notify)
+    
+    def notify(self, version):
+        # Chamado na thread de quem publicou o snapshot
+        self.loop.call_soon_threadsafe(self._fire)
+    
+    def _fire(self):
+        event, self.event = self.event, asyncio.Event()
+        event.set()
+
+_change_signal = _ChangeSignal()
+
+def _header(scope, name):
+    for key, value in scope["headers"]:
+        if key == name:
+            return value.decode("latin-1")
+    return ""
+
+def _query(scope):
+    """Parâmetros da query string (primeiro valor de cada), como request.args.get"""
+    return {name: values[0] for name, values in parse_qs(scope.get("query_string", b"").decode("latin-1")).items()}
+
+def _choose_encoding(bodies, accept_encoding):
+    """Mesma escolha do api_server._choose_encoding, a partir do cabeçalho Accept-Encoding"""
+    qualities = {}
+    for part in accept_encoding.split(","):
+        coding, _, params = part.strip().partition(";")
+        quality = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if coding:
+            qualities[coding.strip().lower()] = quality
+    
+    for encoding in ENCODING_PREFERENCE:
+        if encoding in bodies and qualities.get(encoding, qualities.get("*", 0)) > 0:
+            return encoding
+    return "identity"
+
+def _etag_matches(if_none_match, etag):
+    """Comparação forte, como werkzeug.ETags.contains"""
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag == "*" or tag == f'"{etag}"':
+            return True
+    return False
+
+async def _send(send, status, body=b"", headers=(), head=False):
+    response_headers = list(CORS_HEADERS) + list(headers)
+    response_headers.append((b"content-length", str(len(body)).encode()))
+    await send({"type": "http.response.start", "status": status, "headers": response_headers})
+    await send({"type": "http.response.body", "body": b"" if head else body})
+
+async def _send_json(send, payload, head=False, status=200, headers=()):
+    await _send(send, status, _dump_json(payload), [(b"content-type", b"application/json")] + list(headers), head)
+
+async def _send_snapshot_body(scope, send, bodies, base_etag, head=False, headers=()):
+    """Corpo pré-serializado com negociação de codificação e If-None-Match"""
+    encoding = _choose_encoding(bodies, _header(scope, b"accept-encoding"))
+    etag = base_etag if encoding == "identity" else f"{base_etag}-{encoding}"
+    headers = [(b"etag", f'"{etag}"'.encode()), (b"vary", b"Accept-Encoding")] + list(headers)
+    
+    if _etag_matches(_header(scope, b"if-none-match"), etag):
+        await send({"type": "http.response.start", "status": 304, "headers": list(CORS_HEADERS) + headers})
+        await send({"type": "http.response.body", "body": b""})
+        return
+    
+    headers.append((b"content-type", b"application/json"))
+    if encoding != "identity":
+        headers.append((b"content-encoding", encoding.encode()))
+    if dict.__contains__(bodies, encoding):
+        body = bodies[encoding]
+    else:
+        # Primeira compressão desta visão nesta codificação: fora do event loop
+        body = await asyncio.to_thread(bodies.__getitem__, encoding)
+    await _send(send, 200, body, headers, head)
+
+async def _snapshot_view(snapshot, key, build, *args):
+    """Visão já em cache no snapshot, ou build(*args) fora do event loop (serializa o JSON)"""
+    cached = snapshot.views.get(key)
+    if cached is not None:
+        return cached
+    return await asyncio.to_thread(build, *args)
+
+async def _stream_loop(send, last_event_id):
+    _change_signal.ensure_bound()
+    heartbeat = api_server.STREAM_HEARTBEAT
+    
+    await send({
+        "type": "http.response.start",
+        "status": 200,
+        "headers": list(CORS_HEADERS) + [
+            (b"content-type", b"text/event-stream"),
+            (b"cache-control", b"no-cache"),
+            (b"x-accel-buffering", b"no")
+        ]
+    })
+    await send({"type": "http.response.body", "body": f"retry: {int(heartbeat * 1000)}\n\n".encode(), "more_body": True})
+    
+    version, events = initial_stream_events(last_event_id)
+    for event in events:
+        await send({"type": "http.response.body", "body": event, "more_body": True})
+    
+    while True:
+        if change_log.latest_version <= version:
+            try:
+                await asyncio.wait_for(_change_signal.event.wait(), heartbeat)
+            except asyncio.TimeoutError:
+                await send({"type": "http.response.body", "body": b": heartbeat\n\n", "more_body": True})
+                continue
+        
+        version, events = pending_stream_events(version)
+        for event in events:
+            await send({"type": "http.response.body", "body": event, "more_body": True})
+
+async def _serve_stream(scope, receive, send):
+    """Mantém o stream até o cliente desconectar; cada conexão ociosa é só uma corrotina"""
+    last_event_id = _header(scope, b"last-event-id")
+    if not last_event_id:
+        last_event_id = parse_qs(scope.get("query_string", b"").decode("latin-1")).get("last_event_id", [""])[0]
+    try:
+        last_event_id = int(last_event_id) if last_event_id else None
+    except ValueError:
+        last_event_id = None
+    
+    task = asyncio.ensure_future(_stream_loop(send, last_event_id))
+    try:
+        while True:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                break
+    finally:
+        task.cancel()
+
+async def _lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message["type"] == "lifespan.startup":
+            _change_signal.ensure_bound()
+            await send({"type": "lifespan.startup.complete"})
+        elif message["type"] == "lifespan.shutdown":
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+
+async def app(scope, receive, send):
+    if scope["type"] == "lifespan":
+        await _lifespan(receive, send)
+        return
+    if scope["type"] != "http":
+        return
+    
+    route = scope["path"] if scope["path"] in ROUTES else "unmatched"
+    if route == "/api/stream":
+        # Conexões longas: só a contagem, sem latência nem tamanho
+        metrics.observe_request(route, 200, None)
+        await _dispatch(scope, receive, send)
+        return
+    
+    started = time.perf_counter()
+    response = [0, 0]
+    
+    async def measured_send(message):
+        if message["type"] == "http.response.start":
+            response[0] = message["status"]
+        else:
+            response[1] += len(message.get("body", b""))
+        await send(message)
+    
+    await _dispatch(scope, receive, measured_send)
+    metrics.observe_request(route, response[0], time.perf_counter() - started, response[1])
+
+async def _dispatch(scope, receive, send):
+    path = scope["path"]
+    method = scope["method"]
+    
+    if method == "OPTIONS":
+        await _send(send, 200, headers=[
+            (b"access-control-allow-methods", b"GET, HEAD, OPTIONS"),
+            (b"access-control-allow-headers", _header(scope, b"access-control-request-headers").encode() or b"*")
+        ])
+        return
+    if method not in ("GET", "HEAD"):
+        await _send(send, 405, b"", [(b"allow", b"GET, HEAD, OPTIONS")])
+        return
+    head = method == "HEAD"
+    
+    if path == "/":
+        await _send_json(send, home_payload(), head)
+    elif path == "/api/indicators":
+        query = _query(scope)
+        since, error = parse_since(query)
+        if error is None and since is None:
+            key, error = parse_indicator_filters(query)
+        if error:
+            await _send_json(send, {"error": error}, head, 400)
+            return
+        snapshot = get_snapshot()
+        if since is not None:
+            view = await _snapshot_view(snapshot, ("since", since), indicators_delta, snapshot, since)
+            await _send_snapshot_body(scope, send, *view, head)
+        elif key is None:
+            await _send_snapshot_body(scope, send, snapshot.indicators_bodies, snapshot.indicators_etag, head)
+        else:
+            view = await _snapshot_view(snapshot, key, snapshot.indicators_view, key)
+            await _send_snapshot_body(scope, send, *view, head)
+    elif path == "/api/indicators/meta":
+        snapshot = get_snapshot()
+        await _send_snapshot_body(scope, send, snapshot.meta_bodies, snapshot.meta_etag, head, [
+            (b"cache-control", f"public, max-age={api_server.META_MAX_AGE}".encode())
+        ])
+    elif path == "/api/summary":
+        snapshot = get_snapshot()
+        await _send_snapshot_body(scope, send, snapshot.summary_bodies, snapshot.summary_etag, head)
+    elif path == "/api/update":
+        # Recalcular o snapshot (ou esperar o scraper) não pode bloquear o event loop
+        client = scope.get("client")
+        # Cabeçalhos X-Forwarded-For repetidos valem como uma lista só, como no WSGI
+        forwarded_for = ",".join(value.decode("latin-1") for key, value in scope["headers"] if key == b"x-forwarded-for")
+        client_id = forwarded_client(client[0] if client else None, forwarded_for, api_server.TRUSTED_PROXY_HOPS)
+        status, payload = await asyncio.to_thread(update_payload, client_id)
+        headers = [(b"retry-after", str(payload["retry_after"]).encode())] if status == 429 else []
+        await _send_json(send, payload, head, status, headers)
+    elif path == "/api/history":
+        # Leitura dos arquivos do histórico fora do event loop
+        status, payload = await asyncio.to_thread(history_payload, _query(scope))
+        await _send_json(send, payload, head, status)
+    elif path == "/health":
+        await _send_json(send, health_payload(), head)
+    elif path == "/api/stream":
+        await _serve_stream(scope, receive, send)
+    elif path == "/metrics":
+        await _send(send, 200, metrics.REGISTRY.render(), [(b"content-type", metrics.CONTENT_TYPE.encode())], head)
+    else:
+        await _send(send, 404, _dump_json({"error": "Not Found"}), [(b"content-type", b"application/json")], head)
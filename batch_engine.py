@@ -0,0 +1,114 @@
+"""
+Cálculo vetorizado de proximidade, zona de risco e nível de risco
+Processa uma matriz (indicadores x timestamps) de uma vez, com os mesmos resultados
+das funções escalares calculate_proximity / is_in_risk_zone / get_risk_level do api_server.
+current NaN = indicador ausente naquele timestamp (como nas linhas do HistoryStore anteriores
+à criação da coluna): fica fora do resumo, como fora do dicionário do process_indicators.
+"""
+
+import numpy as np
+
+from indicator_registry import RISK_LEVELS, STATUS_LABELS
+
+def to_matrix(rows):
+    """Converte listas aninhadas com None em matriz float64 com NaN"""
+    return np.array([[np.nan if value is None else value for value in row] for row in rows], dtype=np.float64)
+
+def direction_vector(names, inverse_names):
+    """Vetor booleano: True onde menor valor = mais próximo do fim de ciclo"""
+    return np.array([name in inverse_names for name in names], dtype=bool)
+
+class BatchResult:
+    """Resultados por indicador e agregados por timestamp de um cálculo em lote"""
+    
+    def __init__(self, proximity, in_risk_zone, risk_level, total_proximity, in_risk_zone_count, present):
+        count = present.sum(axis=0)
+        
+        self.proximity = proximity                  # (indicadores, timestamps), sem arredondamento
+        self.in_risk_zone = in_risk_zone            # (indicadores, timestamps), bool
+        self.risk_level = risk_level                # (indicadores, timestamps), índice em RISK_LEVELS
+        self.present = present                      # (indicadores, timestamps), bool
+        self.total_proximity = total_proximity      # (timestamps,)
+        self.in_risk_zone_count = in_risk_zone_count
+        self.valid_count = count                    # (timestamps,)
+        
+        with np.errstate(divide="ignore", invalid="ignore"):
+            self.avg_proximity = np.where(count > 0, total_proximity / count, 0.0)
+            self.risk_zone_percentage = np.where(count > 0, (in_risk_zone_count / count) * 100, 0.0)
+        
+        # Contagem por nível (4, timestamps), só dos indicadores presentes, e status geral por timestamp
+        self.risk_distribution = np.stack([
+            ((risk_level == level) & present).sum(axis=0) for level in range(len(RISK_LEVELS))
+        ])
+        self.status = np.select(
+            [self.avg_proximity >= 80, self.avg_proximity >= 60, self.avg_proximity >= 40],
+            [3, 2, 1],
+            default=0
+        )
+    
+    def summary(self, column):
+        """Resumo de um timestamp no mesmo formato do process_indicators (sem last_update)"""
+        return {
+            "total_indicators": int(self.valid_count[column]),
+            "in_risk_zone": int(self.in_risk_zone_count[column]),
+            "avg_proximity": round(float(self.avg_proximity[column]), 1),
+            "risk_zone_percentage": round(float(self.risk_zone_percentage[column]), 1),
+            "general_status": STATUS_LABELS[self.status[column]],
+            "risk_distribution": {
+                level: int(self.risk_distribution[index, column]) for index, level in enumerate(RISK_LEVELS)
+            }
+        }
+    
+    def summaries(self):
+        return [self.summary(column) for column in range(self.proximity.shape[1])]
+    
+    def indicators(self, column, names):
+        """Campos calculados de cada indicador presente em um timestamp"""
+        return {
+            name: {
+                "proximity": round(float(self.proximity[row, column]), 1),
+                "in_risk_zone": bool(self.in_risk_zone[row, column]),
+                "risk_level": RISK_LEVELS[self.risk_level[row, column]]
+            }
+            for row, name in enumerate(names)
+            if self.present[row, column]
+        }
+
+def compute_batch(current, reference, inverse):
+    """
+    current: matriz (indicadores, timestamps) com NaN para indicadores ausentes
+    reference: vetor (indicadores,) ou matriz (indicadores, timestamps)
+    inverse: vetor booleano (indicadores,)
+    """
+    current = np.asarray(current, dtype=np.float64)
+    if current.ndim == 1:
+        current = current[:, np.newaxis]
+    reference = np.asarray(reference, dtype=np.float64)
+    if reference.ndim == 1:
+        reference = reference[:, np.newaxis]
+    reference = np.broadcast_to(reference, current.shape)
+    inverse = np.asarray(inverse, dtype=bool)[:, np.newaxis]
+    
+    present = ~np.isnan(current)
+    missing = ~present | np.isnan(reference)
+    usable = ~missing & (reference != 0)
+    
+    # Mesma ordem de operações das funções escalares para resultados bit a bit iguais
+    with np.errstate(divide="ignore", invalid="ignore"):
+        direct = (current / reference) * 100
+        inverted = np.maximum(((reference - current) / reference) * 100, 0)
+    proximity = np.where(usable, np.minimum(100, np.maximum(0, np.where(inverse, inverted, direct))), 0.0)
+    
+    with np.errstate(invalid="ignore"):
+        in_risk_zone = ~missing & np.where(inverse, current <= reference, current >= reference)
+    
+    risk_level = np.select([proximity >= 90, proximity >= 70, proximity >= 50], [3, 2, 1], default=0)
+    
+    # cumsum acumula na ordem dos indicadores, como o loop do process_indicators
+    if proximity.shape[0] > 0:
+        total_proximity = np.cumsum(proximity, axis=0)[-1]
+    else:
+        total_proximity = np.zeros(proximity.shape[1])
+    in_risk_zone_count = in_risk_zone.sum(axis=0)
+    
+    return BatchResult(proximity, in_risk_zone, risk_level, total_proximity, in_risk_zone_count, present)
@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+"""
+Suíte de benchmarks da API e do pipeline de indicadores (sem rede)
+Micro-benchmarks do cálculo e da serialização, requisições pelo test client do Flask e por um
+servidor WSGI local, com resultados em JSON e comparação contra uma execução anterior.
+
+Uso:
+    python benchmarks/bench_api.py --json baseline.json
+    python benchmarks/bench_api.py --json atual.json --compare baseline.json --threshold 0.15
+    python benchmarks/bench_api.py --quick --filter route.
+
+Na comparação, a métrica principal de cada benchmark (p50 em µs) é comparada com a da base;
+pioras acima do limite são listadas e o processo sai com código 1.
+"""
+
+import argparse
+import http.client
+import itertools
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# Ambiente isolado e determinístico: sem scraper, sem snapshot compartilhado, sem limite no /api/update
+os.environ["REFRESH_INTERVAL"] = "0"
+os.environ["SHARED_SNAPSHOT_PATH"] = ""
+os.environ["UPDATE_RATE_PER_MINUTE"] = "0"
+os.environ["UPDATE_MIN_INTERVAL"] = "0"
+os.environ.setdefault("HISTORY_DIR", tempfile.mkdtemp(prefix="bench-history-"))
+
+import numpy as np
+from flask import jsonify
+from werkzeug.serving import make_server
+
+import api_server
+import batch_engine
+
+# /api/stream fica de fora: é uma conexão longa, medida pelo benchmarks/load_compare.py
+ROUTES = ("/", "/api/indicators", "/api/summary", "/api/update", "/health", "/api/history?resolution=ohlc&interval=1h")
+
+def percentile(sorted_values, fraction):
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+def summarize(per_op_seconds):
+    """Estatísticas em microssegundos de uma lista de tempos por operação"""
+    values = sorted(per_op_seconds)
+    total = sum(values)
+    return {
+        "samples": len(values),
+        "mean_us": round(total / len(values) * 1e6, 3),
+        "p50_us": round(percentile(values, 0.50) * 1e6, 3),
+        "p95_us": round(percentile(values, 0.95) * 1e6, 3),
+        "p99_us": round(percentile(values, 0.99) * 1e6, 3),
+        "ops_per_s": round(len(values) / total, 1) if total else None
+    }
+
+def bench(func, samples, inner=1):
+    """Executa `inner` chamadas por amostra (operações muito curtas) e retorna o tempo por operação"""
+    for _ in range(min(samples, 10)):
+        func()
+    timings = []
+    for _ in range(samples):
+        started = time.perf_counter()
+        for _ in range(inner):
+            func()
+        timings.append((time.perf_counter() - started) / inner)
+    return summarize(timings)
+
+def seed_history(rows=2000):
+    """Histórico sintético (um ponto por minuto) para o /api/history"""
+    base = time.time() - rows * 60
+    rng = np.random.default_rng(7)
+    for row in range(rows):
+        data = {
+            name: {"current": values["current"] * (1 + rng.normal(0, 0.01)), "reference": values["reference"]}
+            for name, values in api_server.SIMULATED_DATA.items()
+        }
+        api_server.history_store.append(base + row * 60, data)
+
+def micro_benchmarks(samples):
+    data = api_server.SIMULATED_DATA
+    snapshot = api_server.get_snapshot()
+    indicators_payload = {"indicators": snapshot.indicators, "last_update": snapshot.last_update}
+    
+    def proximity_all():
+        for name, values in data.items():
+            api_server.calculate_proximity(name, values["current"], values["reference"])
+    
+    def flask_jsonify():
+        with api_server.app.app_context():
+            jsonify(indicators_payload).get_data()
+    
+    # Grafo com os dados simulados; cada chamada muda só o preço (4 indicadores dependentes)
+    graph = api_server.IndicatorGraph(
+        api_server.evaluate_indicator,
+        api_server.summarize_indicators,
+        bindings=api_server.PRICE_BINDINGS,
+        risk_levels=api_server.RISK_LEVELS
+    )
+    graph.set_sources(data)
+    prices = itertools.cycle([100000.0 + step for step in range(1000)])
+    
+    def graph_price_update():
+        graph.set_inputs({"btc_price": next(prices)})
+        graph.results()
+    
+    names = list(data)
+    current = np.array([[data[name]["current"]] * 1000 for name in names])
+    reference = np.array([data[name]["reference"] for name in names])
+    inverse = batch_engine.direction_vector(names, api_server.INVERSE_INDICATORS)
+    
+    return {
+        "micro.calculate_proximity_all": bench(proximity_all, samples, inner=20),
+        "micro.process_indicators": bench(lambda: api_server.process_indicators(data), samples, inner=5),
+        "micro.graph_price_update": bench(graph_price_update, samples, inner=5),
+        "micro.snapshot_build": bench(lambda: api_server.IndicatorSnapshot(1, data), max(samples // 10, 10)),
+        "serialize.jsonify_indicators": bench(flask_jsonify, samples, inner=5),
+        "serialize.dump_json_indicators": bench(lambda: api_server._dump_json(indicators_payload), samples, inner=5),
+        "serialize.encode_bodies": bench(lambda: api_server._encode_bodies(snapshot.indicators_json), max(samples // 10, 10)),
+        "batch.compute_batch_31x1000": bench(lambda: batch_engine.compute_batch(current, reference, inverse), samples)
+    }
+
+def test_client_benchmarks(samples):
+    client = api_server.app.test_client()
+    results = {}
+    for route in ROUTES:
+        response = client.get(route)
+        assert response.status_code == 200, (route, response.status_code)
+        results[f"route.test_client {route}"] = bench(lambda: client.get(route).get_data(), samples)
+    return results
+
+def wsgi_server_benchmarks(samples):
+    """Servidor WSGI local (werkzeug, HTTP/1.1 keep-alive) e um cliente sequencial"""
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)
+    server = make_server("127.0.0.1", 0, api_server.app, threaded=True)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    results = {}
+    
+    try:
+        connection = http.client.HTTPConnection("127.0.0.1", server.server_port, timeout=10)
+        for route in ROUTES:
+            def request():
+                connection.request("GET", route)
+                response = connection.getresponse()
+                response.read()
+                if response.getheader("Connection", "").lower() == "close":
+                    connection.close()
+            
+            results[f"route.wsgi {route}"] = bench(request, samples)
+        connection.close()
+    finally:
+        server.shutdown()
+    
+    return results
+
+def git_revision():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def compare(results, baseline, threshold, metric="p50_us"):
+    """Lista (nome, base, atual, variação) dos benchmarks que pioraram além do limite"""
+    regressions = []
+    for name, stats in results.items():
+        previous = baseline.get(name)
+        if not previous or not previous.get(metric):
+            continue
+        change = stats[metric] / previous[metric] - 1
+        if change > threshold:
+            regressions.append((name, previous[metric], stats[metric], change))
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--samples", type=int, default=300)
+    parser.add_argument("--quick", action="store_true", help="Menos amostras, para conferência rápida")
+    parser.add_argument("--filter", help="Manter no relatório só benchmarks cujo nome contém este texto")
+    parser.add_argument("--json", help="Salvar resultados em JSON neste arquivo")
+    parser.add_argument("--compare", help="JSON de uma execução anterior para comparação")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Piora máxima aceita (0.10 = 10%%)")
+    args = parser.parse_args()
+    
+    samples = 50 if args.quick else args.samples
+    seed_history()
+    
+    results = {}
+    for group in (micro_benchmarks, test_client_benchmarks, wsgi_server_benchmarks):
+        results.update(group(samples))
+    if args.filter:
+        results = {name: stats for name, stats in results.items() if args.filter in name}
+    
+    print(f"{'benchmark':<52} {'p50 µs':>10} {'p95 µs':>10} {'p99 µs':>10} {'ops/s':>10}")
+    for name, stats in results.items():
+        print(f"{name:<52} {stats['p50_us']:>10.1f} {stats['p95_us']:>10.1f} {stats['p99_us']:>10.1f} {stats['ops_per_s']:>10.0f}")
+    
+    report = {
+        "meta": {
+            "revision": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "samples": samples
+        },
+        "results": results
+    }
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline["results"], args.threshold)
+        print(f"\n📊 Comparação com {args.compare} (revisão {baseline['meta'].get('revision')}), limite {args.threshold:.0%}")
+        if not regressions:
+            print("✅ Nenhuma regressão")
+            return 0
+        for name, previous, current, change in regressions:
+            print(f"❌ {name}: {previous:.1f} → {current:.1f} µs (+{change:.0%})")
+        return 1
+    
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
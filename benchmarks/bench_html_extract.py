@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Benchmark dos backends de extração de HTML (html_extract)
+Mede tempo de parse e pico de memória para a tabela de indicadores e o bloco de dominância
+
+Uso:
+    python benchmarks/bench_html_extract.py                     # página sintética
+    python benchmarks/bench_html_extract.py --table page.html --charts charts.html
+
+O pico de memória é o crescimento do pico de RSS (VmHWM; ru_maxrss fora do Linux) de uma única
+chamada em um processo novo, por backend: inclui a árvore nativa do libxml2 (lxml), que o
+tracemalloc não vê.
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import html_extract
+
+# Executado no processo filho: aquece imports e estruturas do backend com um documento mínimo
+# e mede o quanto uma chamada sobre a página eleva o pico de RSS (KiB). No Linux o ru_maxrss
+# herda o pico do processo pai através do fork, então o pico vem do VmHWM do próprio processo
+_RSS_CHILD = """
+import resource, sys
+sys.path.insert(0, %r)
+import html_extract
+
+def peak_kib():
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss // (1024 if sys.platform == "darwin" else 1)
+
+function = getattr(html_extract, sys.argv[1])
+backend = sys.argv[3]
+with open(sys.argv[2], "rb") as f:
+    page = f.read()
+function(b"<html><body><table><tr><td>1</td></tr></table><span>Bitcoin: 1%%</span></body></html>", backend)
+before = peak_kib()
+function(page, backend)
+print(peak_kib() - before)
+""" % (ROOT,)
+
+def synthetic_cycle_page(rows=31, noise_blocks=4000):
+    """Gera uma página parecida com a da CMC: muito markup irrelevante e uma tabela pequena"""
+    noise = "".join(
+        f'<div class="sc-{i}"><span>Item {i}</span><a href="/currencies/coin-{i}/">Coin {i}</a></div>'
+        for i in range(noise_blocks)
+    )
+    table_rows = "".join(
+        f"<tr><td>{i}</td><td><span>Indicator {i}</span></td><td>${i * 1234.5:,.2f}</td><td>≥ ${i * 2000:,}</td></tr>"
+        for i in range(1, rows + 1)
+    )
+    script = '<script>window.__DATA__ = ' + json.dumps({"items": list(range(20000))}) + '</script>'
+    return (
+        "<html><head>" + script + "</head><body>" + noise
+        + "<table><thead><tr><th>#</th><th>Name</th><th>Current</th><th>Reference</th></tr></thead>"
+        + "<tbody>" + table_rows + "</tbody></table>" + noise + "</body></html>"
+    ).encode("utf-8")
+
+def synthetic_charts_page(noise_blocks=4000):
+    """Gera uma página de gráficos com o bloco de dominância no meio do conteúdo"""
+    noise = "".join(f'<div><span>Metric {i}</span><span>{i}.5</span></div>' for i in range(noise_blocks))
+    return ("<html><body>" + noise + "<div><span>Bitcoin Dominance: 57.32%</span></div>" + noise
+            + "</body></html>").encode("utf-8")
+
+def measure(func, repeat):
+    """Melhor tempo (ms) em `repeat` execuções"""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - started) * 1000)
+    return min(timings)
+
+def peak_rss_kib(function, page, backend):
+    """Crescimento do pico de RSS (KiB) de html_extract.<function>(page, backend) em um processo novo"""
+    with tempfile.NamedTemporaryFile(suffix=".html", delete=False) as f:
+        f.write(page)
+    try:
+        output = subprocess.run([sys.executable, "-c", _RSS_CHILD, function, f.name, backend],
+                                capture_output=True, text=True, check=True).stdout
+    finally:
+        os.remove(f.name)
+    return float(output)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--table", help="HTML salvo da página de indicadores de ciclo")
+    parser.add_argument("--charts", help="HTML salvo da página /charts/")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--json", help="Salvar resultados em JSON neste arquivo")
+    args = parser.parse_args()
+    
+    table_page = open(args.table, "rb").read() if args.table else synthetic_cycle_page()
+    charts_page = open(args.charts, "rb").read() if args.charts else synthetic_charts_page()
+    
+    results = []
+    for backend in html_extract.BACKENDS:
+        if html_extract.resolve_backend(backend) != backend:
+            print(f"⚠️ Backend {backend} indisponível (lxml não instalado), ignorando")
+            continue
+        
+        rows = html_extract.extract_table_rows(table_page, backend)
+        dominance = html_extract.extract_dominance(charts_page, backend)
+        table_ms = measure(lambda: html_extract.extract_table_rows(table_page, backend), args.repeat)
+        dom_ms = measure(lambda: html_extract.extract_dominance(charts_page, backend), args.repeat)
+        table_kib = peak_rss_kib("extract_table_rows", table_page, backend)
+        dom_kib = peak_rss_kib("extract_dominance", charts_page, backend)
+        
+        results.append({
+            "backend": backend,
+            "table_rows": len(rows),
+            "table_ms": round(table_ms, 2),
+            "table_peak_kib": round(table_kib, 1),
+            "dominance": dominance,
+            "dominance_ms": round(dom_ms, 2),
+            "dominance_peak_kib": round(dom_kib, 1)
+        })
+    
+    print(f"📄 Tabela: {len(table_page) / 1024:.0f} KiB | Gráficos: {len(charts_page) / 1024:.0f} KiB")
+    print(f"{'backend':<12} {'linhas':>6} {'tabela ms':>10} {'pico KiB':>10} {'dom %':>7} {'dom ms':>8} {'pico KiB':>10}")
+    for r in results:
+        print(f"{r['backend']:<12} {r['table_rows']:>6} {r['table_ms']:>10.2f} {r['table_peak_kib']:>10.1f} "
+              f"{r['dominance'] if r['dominance'] is not None else '-':>7} {r['dominance_ms']:>8.2f} {r['dominance_peak_kib']:>10.1f}")
+    
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == "__main__":
+    main()
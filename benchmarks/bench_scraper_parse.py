@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Benchmark por etapa do parsing do CoinMarketCapScraper sobre um corpus de fixtures
+Reproduz as respostas gravadas (scraper_fixtures) e mede tempo e pico de memória de cada etapa:
+fetch (replay pela sessão requests), JSON embutido, parse do DOM, extração das linhas,
+parse_value e o scrape_indicators completo.
+
+Uso:
+    python benchmarks/bench_scraper_parse.py                          # corpus mais recente ou sintético
+    python benchmarks/bench_scraper_parse.py --corpus fixtures/scraper/20261017-120000 --json parse.json
+
+Sem corpus gravado, um corpus sintético (páginas do bench_html_extract) é gerado em um diretório
+temporário. Com corpus gravado, o resultado do replay também é comparado com o esperado.
+
+O pico das etapas que montam o DOM (dom.parse, dominance) é o crescimento do RSS em um processo
+novo, que inclui a árvore nativa do lxml; nas demais o tracemalloc basta, pois só há alocações
+do Python.
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from requests.utils import iter_slices
+
+import html_extract
+import indicator_registry
+import scraper_fixtures
+from bench_html_extract import peak_rss_kib, synthetic_charts_page, synthetic_cycle_page
+from coinmarketcap_scraper_v2 import CoinMarketCapScraper
+
+def synthetic_corpus(directory):
+    """Corpus com as três fontes: página de ciclo (tabela + JSON embutido), gráficos e Fear & Greed"""
+    scraper = CoinMarketCapScraper(cache_dir=None)
+    # Nomes do registro: o JSON embutido só aceita indicadores conhecidos
+    embedded = {"props": {"pageProps": {"indicators": [
+        {"indicatorName": definition.name, "currentValue": i * 1234.5, "targetValue": f"≥ ${i * 2000:,}"}
+        for i, definition in enumerate(indicator_registry.REGISTRY, 1)
+    ]}}}
+    cycle_page = synthetic_cycle_page().replace(
+        b"<head>",
+        b'<head><script id="__NEXT_DATA__" type="application/json">' + json.dumps(embedded).encode() + b"</script>",
+        1
+    )
+    html_headers = {"Content-Type": "text/html; charset=utf-8"}
+    entries = [
+        (scraper.base_url, 200, html_headers, cycle_page),
+        (scraper.charts_url, 200, html_headers, synthetic_charts_page()),
+        (scraper.fear_greed_url, 200, {"Content-Type": "application/json"},
+         json.dumps({"data": [{"value": "72", "value_classification": "Greed"}]}).encode())
+    ]
+    scraper_fixtures.save_corpus(directory, entries, synthetic=True)
+    return directory
+
+def measure(func, repeat, peak_kib=None):
+    """Mediana e melhor tempo (ms) em `repeat` execuções e pico de memória (KiB) de uma execução
+
+    Com `peak_kib` informado (medido fora do processo), o tracemalloc não é usado.
+    """
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - started) * 1000)
+    timings.sort()
+    
+    if peak_kib is None:
+        tracemalloc.start()
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        peak_kib = peak / 1024
+    
+    return {
+        "median_ms": round(timings[len(timings) // 2], 3),
+        "best_ms": round(timings[0], 3),
+        "peak_kib": round(peak_kib, 1)
+    }
+
+def run_stages(directory, backends, repeat):
+    responses = scraper_fixtures.load_corpus(directory)
+    scraper = scraper_fixtures.replay_scraper(directory, responses)
+    cycle_page = responses[scraper.base_url][2]
+    charts_page = responses[scraper.charts_url][2] if scraper.charts_url in responses else None
+    stages = {}
+    
+    def fetch_all():
+        for url in responses:
+            scraper.session.get(url).content
+    
+    stages["fetch.replay_all"] = measure(fetch_all, repeat)
+    
+    payload = html_extract.read_embedded_json(iter_slices(cycle_page, 16384))
+    if payload is not None:
+        embedded = json.loads(payload)
+        stages["embedded.read"] = measure(lambda: html_extract.read_embedded_json(iter_slices(cycle_page, 16384)), repeat)
+        stages["embedded.loads"] = measure(lambda: json.loads(payload), repeat)
+        stages["embedded.map"] = measure(lambda: html_extract.map_embedded_indicators(embedded), repeat)
+    
+    rows = []
+    for backend in backends:
+        if html_extract.resolve_backend(backend) != backend:
+            print(f"⚠️ Backend {backend} indisponível, ignorando")
+            continue
+        document = html_extract.parse_table_document(cycle_page, backend)
+        rows = html_extract.table_rows(document, backend)
+        stages[f"dom.parse[{backend}]"] = measure(lambda: html_extract.parse_table_document(cycle_page, backend), repeat,
+                                                  peak_rss_kib("parse_table_document", cycle_page, backend))
+        stages[f"dom.extract[{backend}]"] = measure(lambda: html_extract.table_rows(document, backend), repeat)
+        if charts_page is not None:
+            stages[f"dominance[{backend}]"] = measure(lambda: html_extract.extract_dominance(charts_page, backend), repeat,
+                                                      peak_rss_kib("extract_dominance", charts_page, backend))
+    
+    texts = [text for _, current, reference in rows for text in (current, reference)]
+    
+    def parse_values():
+        for text in texts:
+            html_extract.parse_value(text)
+    
+    stages["parse_value"] = measure(parse_values, repeat)
+    # force: todas as fontes em todas as repetições, ignorando os intervalos da agenda
+    stages["scrape_indicators"] = measure(lambda: scraper.scrape_indicators(force=True), repeat)
+    dom_scraper = scraper_fixtures.replay_scraper(directory, responses, embedded_json=False)
+    stages["scrape_indicators[dom]"] = measure(lambda: dom_scraper.scrape_indicators(force=True), repeat)
+    
+    return stages, scraper.scrape_indicators(force=True), len(rows)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--corpus", help="Diretório do corpus (padrão: o mais recente em fixtures/scraper)")
+    parser.add_argument("--backend", action="append", choices=html_extract.BACKENDS,
+                        help="Backends do DOM a medir (padrão: todos)")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--json", help="Salvar resultados em JSON neste arquivo")
+    args = parser.parse_args()
+    
+    # Os logs por indicador do scraper distorceriam as medições
+    logging.disable(logging.INFO)
+    
+    directory = args.corpus or scraper_fixtures.latest_corpus()
+    if directory is None:
+        directory = synthetic_corpus(tempfile.mkdtemp(prefix="scraper-corpus-"))
+        print(f"ℹ️ Nenhum corpus gravado; usando corpus sintético em {directory}")
+    
+    stages, result, row_count = run_stages(directory, args.backend or html_extract.BACKENDS, args.repeat)
+    
+    print(f"📦 Corpus {directory}: {row_count} linhas de tabela, {len(result)} indicadores no resultado")
+    print(f"{'etapa':<28} {'mediana ms':>11} {'melhor ms':>10} {'pico KiB':>10}")
+    for name, stats in stages.items():
+        print(f"{name:<28} {stats['median_ms']:>11.3f} {stats['best_ms']:>10.3f} {stats['peak_kib']:>10.1f}")
+    
+    status = 0
+    expected = scraper_fixtures.load_expected(directory)
+    if expected is not None:
+        differences = scraper_fixtures.diff_results(expected, result)
+        if differences:
+            print("❌ Resultado do replay difere do gravado:")
+            print("\n".join(differences))
+            status = 1
+        else:
+            print("✅ Resultado do replay idêntico ao gravado")
+    
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"corpus": directory, "stages": stages, "indicators": len(result)}, f, indent=2)
+    return status
+
+if __name__ == "__main__":
+    sys.exit(main())
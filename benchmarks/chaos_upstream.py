@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""
+Servidor local que imita as três fontes do scraper (tabela de ciclo, gráficos e Fear & Greed)
+Serve as respostas de um corpus de fixtures (scraper_fixtures) e injeta falhas configuráveis:
+latência, conexões resetadas, 429, 5xx, respostas que travam e corpos truncados.
+
+Uso:
+    python benchmarks/chaos_upstream.py --port 8099 --latency lognormal:300,0.8 --reset 0.02 --truncate 0.05
+
+Especificação de latência (ms): fixed:MS | uniform:MIN,MAX | lognormal:MEDIANA,SIGMA
+"""
+
+import argparse
+import math
+import os
+import random
+import socket
+import struct
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import scraper_fixtures
+
+FAULTS = ("reset", "throttle", "server_error", "stall", "truncate")
+
+def parse_latency(spec):
+    """Converte a especificação em uma função que sorteia a latência (segundos)"""
+    kind, _, params = spec.partition(":")
+    values = [float(value) for value in params.split(",") if value]
+    if kind == "fixed":
+        return lambda rng: values[0] / 1000
+    if kind == "uniform":
+        return lambda rng: rng.uniform(values[0], values[1]) / 1000
+    if kind == "lognormal":
+        mu = math.log(values[0])
+        return lambda rng: rng.lognormvariate(mu, values[1]) / 1000
+    raise ValueError(f"Latência desconhecida: {spec} (use fixed:, uniform: ou lognormal:)")
+
+class FaultProfile:
+    """Probabilidade de cada falha por requisição e distribuição de latência"""
+    
+    def __init__(self, latency="fixed:0", reset=0.0, throttle=0.0, server_error=0.0, stall=0.0,
+                 truncate=0.0, stall_seconds=30.0, seed=None):
+        self.latency_spec = latency
+        self._latency = parse_latency(latency)
+        self.probabilities = {
+            "reset": reset,
+            "throttle": throttle,
+            "server_error": server_error,
+            "stall": stall,
+            "truncate": truncate
+        }
+        if sum(self.probabilities.values()) > 1:
+            raise ValueError("A soma das probabilidades de falha passa de 1")
+        self.stall_seconds = stall_seconds
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+    
+    def draw(self):
+        """Sorteia (latência em segundos, falha ou None, fração do corpo para truncamento)"""
+        with self._lock:
+            latency = self._latency(self._rng)
+            roll = self._rng.random()
+            fraction = self._rng.uniform(0.1, 0.9)
+        for fault, probability in self.probabilities.items():
+            if roll < probability:
+                return latency, fault, fraction
+            roll -= probability
+        return latency, None, fraction
+    
+    def describe(self):
+        return {"latency": self.latency_spec, "stall_seconds": self.stall_seconds, **self.probabilities}
+
+class ChaosHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    
+    def setup(self):
+        super().setup()
+        self.server.count("connections")
+    
+    def log_message(self, format, *args):
+        pass
+    
+    def _send(self, status, body, headers=()):
+        self.send_response(status)
+        for name, value in headers:
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def do_GET(self):
+        server = self.server
+        server.count("requests")
+        route = server.routes.get(urlsplit(self.path).path)
+        latency, fault, fraction = server.profile.draw()
+        time.sleep(latency)
+        
+        if route is None:
+            self._send(404, b"not found")
+            return
+        if fault is not None:
+            server.count(fault)
+        
+        if fault == "reset":
+            # RST imediato, sem resposta
+            self.connection.setsockopt(socket.SOL_SOCKET, socket.SO_LINGER, struct.pack("ii", 1, 0))
+            self.close_connection = True
+            self.connection.close()
+            return
+        if fault == "throttle":
+            self._send(429, b"rate limited", [("Retry-After", "30")])
+            return
+        if fault == "server_error":
+            self._send((500, 502, 503)[int(fraction * 3) % 3], b"upstream error")
+            return
+        if fault == "stall":
+            time.sleep(server.profile.stall_seconds)
+        
+        headers, body = route
+        if fault == "truncate":
+            # Página parcial com Content-Length coerente: o cliente recebe um HTML/JSON cortado
+            body = body[:int(len(body) * fraction)]
+        self._send(200, body, headers.items())
+
+class ChaosServer(ThreadingHTTPServer):
+    daemon_threads = True
+    
+    def __init__(self, address, routes, profile):
+        super().__init__(address, ChaosHandler)
+        self.routes = routes
+        self.profile = profile
+        self.stats = dict.fromkeys(("connections", "requests", "socket_errors") + FAULTS, 0)
+        self._stats_lock = threading.Lock()
+    
+    def count(self, name):
+        with self._stats_lock:
+            self.stats[name] += 1
+    
+    def handle_error(self, request, client_address):
+        # Conexões encerradas de propósito (reset) ou pelo timeout do cliente não são erros do servidor
+        self.count("socket_errors")
+    
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+def load_routes(corpus=None):
+    """Rotas (caminho → (cabeçalhos, corpo)) a partir de um corpus; sem corpus, usa o sintético"""
+    if corpus is None:
+        corpus = scraper_fixtures.latest_corpus()
+    if corpus is None:
+        from bench_scraper_parse import synthetic_corpus
+        corpus = synthetic_corpus(tempfile.mkdtemp(prefix="chaos-corpus-"))
+    routes = {}
+    for url, (status, headers, body) in scraper_fixtures.load_corpus(corpus).items():
+        routes[urlsplit(url).path] = (headers, body)
+    return corpus, routes
+
+def start_server(profile, corpus=None, host="127.0.0.1", port=0):
+    """Sobe o servidor em uma thread; retorna (servidor, diretório do corpus)"""
+    corpus, routes = load_routes(corpus)
+    server = ChaosServer((host, port), routes, profile)
+    threading.Thread(target=server.serve_forever, name="chaos-upstream", daemon=True).start()
+    return server, corpus
+
+def point_scraper(scraper, base_url):
+    """Aponta as três fontes do scraper para o servidor local, mantendo os caminhos originais"""
+    for attribute in ("base_url", "charts_url", "fear_greed_url"):
+        setattr(scraper, attribute, base_url + urlsplit(getattr(scraper, attribute)).path)
+    return scraper
+
+def add_profile_arguments(parser):
+    parser.add_argument("--corpus", help="Corpus de fixtures (padrão: o mais recente ou um sintético)")
+    parser.add_argument("--latency", default="fixed:0", help="fixed:MS | uniform:MIN,MAX | lognormal:MEDIANA,SIGMA")
+    parser.add_argument("--reset", type=float, default=0.0, help="Probabilidade de reset da conexão")
+    parser.add_argument("--throttle", type=float, default=0.0, help="Probabilidade de 429")
+    parser.add_argument("--server-error", type=float, default=0.0, help="Probabilidade de 500/502/503")
+    parser.add_argument("--stall", type=float, default=0.0, help="Probabilidade de a resposta travar")
+    parser.add_argument("--stall-seconds", type=float, default=30.0)
+    parser.add_argument("--truncate", type=float, default=0.0, help="Probabilidade de corpo truncado")
+    parser.add_argument("--seed", type=int)
+
+def profile_from_args(args):
+    return FaultProfile(
+        latency=args.latency,
+        reset=args.reset,
+        throttle=args.throttle,
+        server_error=args.server_error,
+        stall=args.stall,
+        truncate=args.truncate,
+        stall_seconds=args.stall_seconds,
+        seed=args.seed
+    )
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8099)
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+    
+    server, corpus = start_server(profile_from_args(args), args.corpus, args.host, args.port)
+    print(f"🌪️ Servidor de caos em {server.base_url} (corpus {corpus})")
+    for path in server.routes:
+        print(f"   {server.base_url}{path}")
+    try:
+        while True:
+            time.sleep(60)
+            print(f"📊 {server.stats}")
+    except KeyboardInterrupt:
+        server.shutdown()
+
+if __name__ == "__main__":
+    main()
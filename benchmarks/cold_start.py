@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Tempo de partida da API: do spawn do processo até a primeira resposta 200 de /api/indicators
+Cada rodada sobe um processo novo (werkzeug em porta livre) e mede o tempo de import do
+api_server, o tempo até a primeira resposta e quais dependências pesadas (requests, bs4,
+numpy) já estavam carregadas quando o servidor começou a aceitar conexões.
+
+Modos:
+- simulated: sem coleta em segundo plano (REFRESH_INTERVAL=0), dados simulados
+- cold: coleta ativa sem snapshot persistido; serve os simulados até a primeira coleta
+- warm: coleta ativa com snapshot persistido; serve o último snapshot marcado como stale
+
+A rede fica bloqueada por um proxy inexistente: a coleta falha sem atrasar a partida.
+
+Uso:
+    python benchmarks/cold_start.py --runs 10
+    python benchmarks/cold_start.py --runs 20 --modes warm --json cold_start.json
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY_MODULES = ("requests", "bs4", "numpy")
+
+# Executado no processo filho: importa a API, informa a porta e passa a atender
+CHILD = """
+import json, sys, time
+started = time.perf_counter()
+import api_server
+imported = time.perf_counter() - started
+from werkzeug.serving import make_server
+server = make_server("127.0.0.1", 0, api_server.app, threaded=True)
+print(json.dumps({
+    "port": server.server_port,
+    "import_seconds": imported,
+    "loaded": [name for name in %r if name in sys.modules]
+}), flush=True)
+server.serve_forever()
+""" % (HEAVY_MODULES,)
+
+# Grava o snapshot persistido usado pelo modo warm
+PERSIST = """
+import sys, api_server
+api_server.persist_snapshot(api_server.get_snapshot(), sys.argv[1])
+"""
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+def child_environment(mode, snapshot_path):
+    env = dict(os.environ, PYTHONPATH=ROOT, HISTORY_DIR=os.path.join(os.path.dirname(snapshot_path), "history"))
+    # Nenhuma fonte é alcançável: a primeira coleta falha rápido e não interfere na medição
+    env.update(HTTP_PROXY="http://127.0.0.1:9", HTTPS_PROXY="http://127.0.0.1:9", NO_PROXY="")
+    env.pop("SHARED_SNAPSHOT_PATH", None)
+    if mode == "simulated":
+        env.update(REFRESH_INTERVAL="0", SNAPSHOT_FILE="")
+    elif mode == "cold":
+        env.update(REFRESH_INTERVAL="3600", SNAPSHOT_FILE=snapshot_path + ".missing")
+    else:
+        env.update(REFRESH_INTERVAL="3600", SNAPSHOT_FILE=snapshot_path)
+    return env
+
+def run_once(mode, snapshot_path, timeout):
+    started = time.perf_counter()
+    process = subprocess.Popen([sys.executable, "-c", CHILD], cwd=ROOT, env=child_environment(mode, snapshot_path),
+                               stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+    try:
+        info = json.loads(process.stdout.readline())
+        url = f"http://127.0.0.1:{info['port']}/api/indicators"
+        deadline = started + timeout
+        while time.perf_counter() < deadline:
+            try:
+                with urllib.request.urlopen(url, timeout=timeout) as response:
+                    body = json.loads(response.read())
+                break
+            except (urllib.error.URLError, ConnectionError):
+                time.sleep(0.005)
+        else:
+            raise TimeoutError(f"{mode}: sem resposta em {timeout}s")
+        return {
+            "first_response_seconds": time.perf_counter() - started,
+            "import_seconds": info["import_seconds"],
+            "loaded": info["loaded"],
+            "stale": bool(body.get("stale")),
+            "indicators": len(body.get("data", {}))
+        }
+    finally:
+        process.kill()
+        process.wait()
+
+def summarize(results):
+    first = sorted(result["first_response_seconds"] for result in results)
+    imports = sorted(result["import_seconds"] for result in results)
+    return {
+        "runs": len(results),
+        "first_response_ms": {"p50": percentile(first, 0.5) * 1000, "p95": percentile(first, 0.95) * 1000},
+        "import_ms": {"p50": percentile(imports, 0.5) * 1000, "p95": percentile(imports, 0.95) * 1000},
+        "loaded_at_serve": sorted({name for result in results for name in result["loaded"]}),
+        "stale": all(result["stale"] for result in results),
+        "indicators": results[-1]["indicators"]
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--modes", nargs="+", choices=("simulated", "cold", "warm"), default=["simulated", "cold", "warm"])
+    parser.add_argument("--timeout", type=float, default=30)
+    parser.add_argument("--json", help="Salvar o resultado em JSON neste arquivo")
+    args = parser.parse_args()
+    
+    with tempfile.TemporaryDirectory(prefix="cold-start-") as directory:
+        snapshot_path = os.path.join(directory, "indicators_data.json")
+        subprocess.run([sys.executable, "-c", PERSIST, snapshot_path], cwd=ROOT, check=True,
+                       env=child_environment("simulated", snapshot_path), stderr=subprocess.DEVNULL)
+        
+        report = {}
+        for mode in args.modes:
+            report[mode] = summarize([run_once(mode, snapshot_path, args.timeout) for _ in range(args.runs)])
+    
+    print(f"{'modo':<10} {'1ª resp p50':>12} {'p95':>8} {'import p50':>11} {'stale':>6}  carregados")
+    for mode, result in report.items():
+        print(f"{mode:<10} {result['first_response_ms']['p50']:>10.1f}ms {result['first_response_ms']['p95']:>6.1f}ms "
+              f"{result['import_ms']['p50']:>9.1f}ms {str(result['stale']):>6}  {', '.join(result['loaded_at_serve']) or '-'}")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Teste de carga HTTP para comparar o modo sync (gunicorn + Flask) com o modo ASGI (uvicorn)
+Clientes keep-alive em asyncio, sem dependências externas, medindo req/s e percentis de latência.
+Opcionalmente mantém N conexões /api/stream abertas durante a medição.
+
+Uso:
+    gunicorn -w 4 -b 127.0.0.1:5002 api_server:app
+    uvicorn --workers 4 --port 5003 asgi_server:app
+    python benchmarks/load_compare.py --url http://127.0.0.1:5002 --concurrency 200 --idle-streams 500
+    python benchmarks/load_compare.py --url http://127.0.0.1:5003 --concurrency 200 --idle-streams 500
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from urllib.parse import urlsplit
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+async def _read_response(reader):
+    """Lê uma resposta HTTP/1.1 com Content-Length; retorna (status, conexão reaproveitável)"""
+    head = await reader.readuntil(b"\r\n\r\n")
+    lines = head.decode("latin-1").split("\r\n")
+    status = int(lines[0].split(" ", 2)[1])
+    length = 0
+    keep_alive = True
+    for line in lines[1:]:
+        name, _, value = line.partition(":")
+        name = name.lower()
+        if name == "content-length":
+            length = int(value.strip())
+        elif name == "connection" and value.strip().lower() == "close":
+            keep_alive = False
+    if length:
+        await reader.readexactly(length)
+    return status, keep_alive
+
+async def _client(host, port, path, headers, deadline, latencies, errors):
+    request = (f"GET {path} HTTP/1.1\r\nHost: {host}\r\n{headers}Connection: keep-alive\r\n\r\n").encode()
+    reader = writer = None
+    while time.perf_counter() < deadline:
+        try:
+            # Servidores sem keep-alive (gunicorn sync) pagam a reconexão dentro da latência
+            started = time.perf_counter()
+            if writer is None:
+                reader, writer = await asyncio.open_connection(host, port)
+            writer.write(request)
+            status, keep_alive = await _read_response(reader)
+            latencies.append(time.perf_counter() - started)
+            if status >= 400:
+                errors["status"] = errors.get("status", 0) + 1
+            if not keep_alive:
+                writer.close()
+                writer = None
+        except (OSError, asyncio.IncompleteReadError, ValueError):
+            errors["connection"] = errors.get("connection", 0) + 1
+            if writer is not None:
+                writer.close()
+            writer = None
+            await asyncio.sleep(0.01)
+    if writer is not None:
+        writer.close()
+
+async def _idle_stream(host, port, opened, timeout):
+    """Abre um /api/stream e espera o primeiro evento; depois apenas mantém a conexão"""
+    try:
+        reader, writer = await asyncio.wait_for(asyncio.open_connection(host, port), timeout)
+        writer.write(f"GET /api/stream HTTP/1.1\r\nHost: {host}\r\nAccept: text/event-stream\r\n\r\n".encode())
+        await asyncio.wait_for(reader.readuntil(b"event: snapshot"), timeout)
+        opened.append(writer)
+    except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+        pass
+
+async def run(args):
+    url = urlsplit(args.url)
+    host, port = url.hostname, url.port or 80
+    headers = "".join(f"{header}\r\n" for header in args.header)
+    
+    streams = []
+    if args.idle_streams:
+        await asyncio.gather(*(_idle_stream(host, port, streams, args.stream_timeout) for _ in range(args.idle_streams)))
+    
+    latencies = []
+    errors = {}
+    started = time.perf_counter()
+    deadline = started + args.duration
+    await asyncio.gather(*(
+        _client(host, port, args.path, headers, deadline, latencies, errors) for _ in range(args.concurrency)
+    ))
+    elapsed = time.perf_counter() - started
+    
+    for writer in streams:
+        writer.close()
+    
+    latencies.sort()
+    return {
+        "url": args.url + args.path,
+        "concurrency": args.concurrency,
+        "duration_s": round(elapsed, 2),
+        "requests": len(latencies),
+        "requests_per_s": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 2) if latencies else None,
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 2) if latencies else None,
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 2) if latencies else None,
+        "idle_streams_requested": args.idle_streams,
+        "idle_streams_open": len(streams),
+        "errors": errors
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://127.0.0.1:5002")
+    parser.add_argument("--path", default="/api/indicators")
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--idle-streams", type=int, default=0)
+    parser.add_argument("--stream-timeout", type=float, default=5)
+    parser.add_argument("--header", action="append", default=[], help="Cabeçalho extra, ex.: 'Accept-Encoding: gzip'")
+    parser.add_argument("--json", help="Salvar o resultado em JSON neste arquivo")
+    args = parser.parse_args()
+    
+    result = asyncio.run(run(args))
+    print(json.dumps(result, indent=2))
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+
+if __name__ == "__main__":
+    main()
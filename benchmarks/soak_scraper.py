@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+Teste de longa duração do CoinMarketCapScraper contra o servidor de caos local
+Executa ciclos de scrape_indicators seguidos (ou a cada --interval segundos) e reporta
+percentis da latência do ciclo, taxa de fallback e de falha por fonte, reaproveitamento de
+conexões, circuit breakers e crescimento de memória.
+
+Uso:
+    python benchmarks/soak_scraper.py --duration 3600 --latency lognormal:400,0.7 --reset 0.02 \\
+        --throttle 0.02 --server-error 0.03 --truncate 0.05 --stall 0.01 --json soak.json
+    python benchmarks/soak_scraper.py --duration 600 --stall 0.05 --cycle-table-timeout 5 --budget 8
+    python benchmarks/soak_scraper.py --duration 900 --interval 5 --scheduled --server-error 0.3
+
+O servidor de caos roda no mesmo processo; a memória medida (RSS) inclui os dois.
+"""
+
+import argparse
+import json
+import logging
+import os
+import resource
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import chaos_upstream
+from coinmarketcap_scraper_v2 import CoinMarketCapScraper
+
+def rss_kib():
+    """RSS atual (Linux); em outros sistemas, o pico informado pelo getrusage"""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+def slope_per_hour(samples):
+    """Inclinação (KiB/hora) da regressão linear de (segundos, KiB)"""
+    if len(samples) < 2:
+        return 0.0
+    count = len(samples)
+    mean_t = sum(t for t, _ in samples) / count
+    mean_v = sum(v for _, v in samples) / count
+    variance = sum((t - mean_t) ** 2 for t, _ in samples)
+    if variance == 0:
+        return 0.0
+    return sum((t - mean_t) * (v - mean_v) for t, v in samples) / variance * 3600
+
+class SoakRecorder:
+    """Instrumenta o scraper: fontes que falharam em cada ciclo e uso do fallback"""
+    
+    def __init__(self, scraper):
+        self.source_failures = dict.fromkeys(scraper.SOURCE_TIMEOUTS, 0)
+        self.source_fetches = dict.fromkeys(scraper.SOURCE_TIMEOUTS, 0)
+        self.fallbacks = 0
+        # Ciclos que serviram algum valor de um ciclo anterior (fonte fora de hora ou com circuito aberto)
+        self.stale_cycles = 0
+        self._fallback_in_cycle = False
+        
+        fetch_sources = scraper.fetch_sources
+        get_fallback_data = scraper.get_fallback_data
+        
+        def recorded_fetch_sources(*args, **kwargs):
+            results = fetch_sources(*args, **kwargs)
+            for name, value in results.items():
+                self.source_fetches[name] += 1
+                if not value:
+                    self.source_failures[name] += 1
+            return results
+        
+        def recorded_fallback(*args, **kwargs):
+            self._fallback_in_cycle = True
+            return get_fallback_data(*args, **kwargs)
+        
+        scraper.fetch_sources = recorded_fetch_sources
+        scraper.get_fallback_data = recorded_fallback
+    
+    def run_cycle(self, scraper, scheduled=False):
+        self._fallback_in_cycle = False
+        started = time.perf_counter()
+        # Sem a agenda, toda fonte com circuito fechado é consultada em todo ciclo
+        result = scraper.scrape_indicators(force=not scheduled)
+        elapsed = time.perf_counter() - started
+        if self._fallback_in_cycle:
+            self.fallbacks += 1
+        if any("age_seconds" in entry for entry in result.values()):
+            self.stale_cycles += 1
+        return elapsed
+
+def summarize(latencies, recorder, server, memory, warmup, elapsed, profile, scraper):
+    ordered = sorted(latencies)
+    cycles = len(ordered)
+    stats = dict(server.stats)
+    # Caches, pools e imports preguiçosos crescem no começo: só a memória após o aquecimento conta
+    measured = [sample for sample in memory if sample[0] >= warmup] or memory[-1:]
+    return {
+        "duration_s": round(elapsed, 1),
+        "cycles": cycles,
+        "profile": profile.describe(),
+        "timeouts": dict(scraper.SOURCE_TIMEOUTS, cycle_budget=scraper.CYCLE_BUDGET),
+        "cycle_latency_ms": {
+            "p50": round(percentile(ordered, 0.50) * 1000, 1) if ordered else None,
+            "p95": round(percentile(ordered, 0.95) * 1000, 1) if ordered else None,
+            "p99": round(percentile(ordered, 0.99) * 1000, 1) if ordered else None,
+            "max": round(ordered[-1] * 1000, 1) if ordered else None
+        },
+        "fallback_rate": round(recorder.fallbacks / cycles, 4) if cycles else None,
+        "stale_rate": round(recorder.stale_cycles / cycles, 4) if cycles else None,
+        # Falhas por consulta realmente feita (fontes fora de hora ou com circuito aberto não contam)
+        "source_failure_rate": {
+            name: round(count / recorder.source_fetches[name], 4) if recorder.source_fetches[name] else None
+            for name, count in recorder.source_failures.items()
+        },
+        "source_fetches": dict(recorder.source_fetches),
+        "sources": scraper.schedule.status(),
+        "upstream": stats,
+        # Requisições por conexão TCP: 1.0 = nenhum reaproveitamento do pool
+        "requests_per_connection": round(stats["requests"] / stats["connections"], 2) if stats["connections"] else None,
+        "memory": {
+            "warmup_s": warmup,
+            "rss_after_warmup_kib": measured[0][1] if measured else None,
+            "rss_end_kib": measured[-1][1] if measured else None,
+            "growth_kib_per_hour": round(slope_per_hour(measured), 1)
+        }
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--duration", type=float, default=300, help="Duração total (segundos)")
+    parser.add_argument("--interval", type=float, default=0, help="Intervalo mínimo entre ciclos (segundos)")
+    parser.add_argument("--report-every", type=float, default=60, help="Relatório parcial a cada N segundos")
+    parser.add_argument("--warmup", type=float, help="Segundos iniciais fora da medição de memória "
+                        "(padrão: 20%% da duração, no máximo 60)")
+    parser.add_argument("--cycle-table-timeout", type=float)
+    parser.add_argument("--fear-greed-timeout", type=float)
+    parser.add_argument("--dominance-timeout", type=float)
+    parser.add_argument("--budget", type=float, help="Orçamento total do ciclo (CYCLE_BUDGET)")
+    parser.add_argument("--http-cache", action="store_true", help="Usar o cache HTTP em disco do scraper")
+    parser.add_argument("--scheduled", action="store_true",
+                        help="Respeitar os intervalos por fonte (padrão: todas as fontes a cada ciclo)")
+    parser.add_argument("--json", help="Salvar o relatório final em JSON neste arquivo")
+    chaos_upstream.add_profile_arguments(parser)
+    args = parser.parse_args()
+    
+    logging.disable(logging.ERROR)
+    
+    profile = chaos_upstream.profile_from_args(args)
+    server, corpus = chaos_upstream.start_server(profile, args.corpus)
+    
+    cache_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".soak_http_cache") if args.http_cache else None
+    scraper = chaos_upstream.point_scraper(CoinMarketCapScraper(cache_dir=cache_dir), server.base_url)
+    # Prazos ajustados só nesta instância
+    scraper.SOURCE_TIMEOUTS = dict(scraper.SOURCE_TIMEOUTS)
+    for name, value in (("cycle_table", args.cycle_table_timeout), ("fear_greed", args.fear_greed_timeout),
+                        ("dominance", args.dominance_timeout)):
+        if value is not None:
+            scraper.SOURCE_TIMEOUTS[name] = value
+    if args.budget is not None:
+        scraper.CYCLE_BUDGET = args.budget
+    
+    recorder = SoakRecorder(scraper)
+    print(f"🌪️ Soak contra {server.base_url} (corpus {corpus}) por {args.duration:.0f}s")
+    
+    latencies = []
+    memory = []
+    warmup = args.warmup if args.warmup is not None else min(60, args.duration * 0.2)
+    started = time.monotonic()
+    next_report = started + args.report_every
+    
+    while time.monotonic() - started < args.duration:
+        cycle_started = time.monotonic()
+        latencies.append(recorder.run_cycle(scraper, args.scheduled))
+        memory.append((time.monotonic() - started, rss_kib()))
+        
+        if time.monotonic() >= next_report:
+            next_report += args.report_every
+            partial = summarize(latencies, recorder, server, memory, warmup, time.monotonic() - started, profile, scraper)
+            print(f"⏱️ {partial['duration_s']:.0f}s | ciclos {partial['cycles']} | p50 {partial['cycle_latency_ms']['p50']} ms "
+                  f"| p99 {partial['cycle_latency_ms']['p99']} ms | fallback {partial['fallback_rate']:.1%} "
+                  f"| req/conexão {partial['requests_per_connection']} | RSS {memory[-1][1]} KiB")
+        
+        if args.interval:
+            time.sleep(max(0, args.interval - (time.monotonic() - cycle_started)))
+    
+    report = summarize(latencies, recorder, server, memory, warmup, time.monotonic() - started, profile, scraper)
+    print(json.dumps(report, indent=2))
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    server.shutdown()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Log de mudanças entre versões de snapshot e distribuição de eventos Server-Sent Events
+Cada mudança é serializada uma única vez e compartilhada por todas as conexões abertas
+"""
+
+import threading
+from collections import deque
+
+def diff_snapshots(previous_indicators, indicators, previous_summary, summary):
+    """Indicadores alterados/removidos e campos do resumo que mudaram entre duas versões"""
+    changed = {
+        name: values for name, values in indicators.items()
+        if previous_indicators.get(name) != values
+    }
+    removed = [name for name in previous_indicators if name not in indicators]
+    summary_changes = {
+        key: value for key, value in summary.items()
+        if previous_summary.get(key) != value
+    }
+    return changed, removed, summary_changes
+
+def merge_changes(entries):
+    """Combina entradas consecutivas do log em uma única mudança (a mais recente prevalece)"""
+    changed = {}
+    removed = set()
+    summary_changes = {}
+    for _, (entry_changed, entry_removed, entry_summary), _ in entries:
+        for name, values in entry_changed.items():
+            changed[name] = values
+            removed.discard(name)
+        for name in entry_removed:
+            changed.pop(name, None)
+            removed.add(name)
+        summary_changes.update(entry_summary)
+    return changed, sorted(removed), summary_changes
+
+def sse_event(event, version, data):
+    """Formata um evento SSE (data já serializada em uma linha)"""
+    return b"event: " + event.encode() + b"\nid: " + str(version).encode() + b"\ndata: " + data + b"\n\n"
+
+class ChangeLog:
+    """Últimas N mudanças por versão, com espera bloqueante por novas versões"""
+    
+    def __init__(self, max_entries=256):
+        self._entries = deque(maxlen=max_entries)
+        self._condition = threading.Condition()
+        self._listeners = []
+        self.latest_version = 0
+        # Primeira versão instalada neste processo; mudanças anteriores a ela não estão no log
+        self.base_version = None
+    
+    def start(self, version):
+        """Marca `version` como o estado inicial do log (primeiro snapshot deste processo)"""
+        with self._condition:
+            self._entries.clear()
+            self.base_version = version
+            self.latest_version = version
+            self._condition.notify_all()
+        
+        for callback in self._listeners:
+            callback(version)
+    
+    def add_listener(self, callback):
+        """Registra um callback chamado (na thread de quem publica) a cada nova versão"""
+        self._listeners.append(callback)
+    
+    def append(self, version, changes, event_bytes):
+        with self._condition:
+            self._entries.append((version, changes, event_bytes))
+            self.latest_version = version
+            self._condition.notify_all()
+        
+        for callback in self._listeners:
+            callback(version)
+    
+    def entries_since(self, version):
+        """Entradas posteriores a `version`, ou None se parte delas já saiu do log (ou é
+        anterior ao primeiro snapshot deste processo)"""
+        with self._condition:
+            entries = list(self._entries)
+            base_version = self.base_version
+        if base_version is None or version < base_version:
+            return None
+        if version >= self.latest_version:
+            return []
+        if not entries or entries[0][0] > version + 1:
+            return None
+        return [entry for entry in entries if entry[0] > version]
+    
+    def wait_for_change(self, version, timeout):
+        """Bloqueia até existir versão mais nova que `version` ou o timeout expirar"""
+        with self._condition:
+            return self._condition.wait_for(lambda: self.latest_version > version, timeout=timeout)
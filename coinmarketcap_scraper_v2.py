@@ -5,21 +5,105 @@ Versão 2.0 - Com dados dinâmicos e lógica corrigida para dominância do BTC
 """
 
 import requests
-from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+import hashlib
 import json
 import time
-import re
+from concurrent.futures import ThreadPoolExecutor, wait
 from datetime import datetime
 import logging
+from http_cache import HttpCache
+import html_extract
+import indicator_registry
+import metrics
+from source_schedule import OPEN, SourcePolicy, SourceScheduler
 
 # Configurar logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Marca fontes ainda não consultadas no ciclo atual
+_NOT_FETCHED = object()
+
+def _recorded(chunks, received):
+    """Repassa os chunks guardando cada um em `received`, para reaproveitar o que já foi baixado"""
+    for chunk in chunks:
+        received.append(chunk)
+        yield chunk
+
 class CoinMarketCapScraper:
-    def __init__(self):
+    # Prazo (segundos) de cada fonte e orçamento total de um ciclo de coleta
+    SOURCE_TIMEOUTS = {
+        "cycle_table": 15,
+        "fear_greed": 10,
+        "dominance": 10
+    }
+    CYCLE_BUDGET = 20
+    # Mínimo de indicadores conhecidos no JSON embutido; abaixo disso o payload mudou de formato
+    # (ou só trouxe objetos parecidos) e a tabela vem do parser DOM
+    EMBEDDED_MIN_INDICATORS = 10
+    
+    # Cadência de cada fonte: a tabela de ciclo muda poucas vezes por dia, o Fear & Greed é
+    # diário e a dominância varia a cada minuto. Após failure_threshold falhas seguidas o
+    # circuito abre e o último valor bom continua sendo usado
+    SOURCE_SCHEDULES = {
+        "cycle_table": SourcePolicy(interval=1800, backoff_base=30, failure_threshold=3, open_seconds=900),
+        "fear_greed": SourcePolicy(interval=3600, backoff_base=60, failure_threshold=3, open_seconds=1800),
+        "dominance": SourcePolicy(interval=60, backoff_base=10, failure_threshold=5, open_seconds=300)
+    }
+    
+    # Valores de fallback (current, reference) caso o scraping da tabela falhe
+    FALLBACK_VALUES = (
+        ("Bitcoin Ahr999 Index", 1.06, 4.0),
+        ("Pi Cycle Top Indicator", 110165.49, 186976.0),
+        ("Puell Multiple", 1.39, 2.2),
+        ("Bitcoin Rainbow Chart", 3.0, 5.0),
+        ("Days of ETF Net Outflows", 7.0, 10.0),
+        ("ETF-to-BTC Ratio", 5.09, 3.5),
+        ("2-Year MA Multiplier", 112654.42, 356781.0),
+        ("MVRV Z-Score", 2.30, 5.0),
+        ("Bitcoin Bubble Index", 13.48, 80.0),
+        ("USDT Flexible Savings", 8.41, 29.0),
+        ("RSI - 22 Day", 44.289, 80.0),
+        ("CMC Altcoin Season Index", 47.0, 75.0),
+        ("Bitcoin Long Term Holder Supply", 15.59, 13.5),
+        ("Bitcoin Short Term Holder Supply", 21.71, 30.0),
+        ("Bitcoin Reserve Risk", 0.0025, 0.005),
+        ("Bitcoin Net Unrealized P&L", 54.91, 70.0),
+        ("Bitcoin RHODL Ratio", 3006.0, 10000.0),
+        ("Bitcoin Macro Oscillator", 0.91, 1.4),
+        ("Bitcoin MVRV Ratio", 2.17, 3.0),
+        ("Bitcoin 4-Year Moving Average", 2.20, 3.5),
+        ("Crypto Bitcoin Bull Run Index", 77.0, 90.0),
+        ("Mayer Multiple", 1.13, 2.2),
+        ("Bitcoin AHR999x Top Escape", 2.85, 0.45),
+        ("MicroStrategy Avg Bitcoin Cost", 73271.0, 155655.0),
+        ("Bitcoin Trend Indicator", 6.14, 7.0),
+        ("3-Month Annualized Ratio", 9.95, 30.0),
+        ("Bitcoin Terminal Price", 112654.42, 187702.0),
+        ("Golden Ratio Multiplier", 112654.42, 135522.0),
+        ("Smithson Bitcoin Price Forecast", 112654.42, 175000.0)
+    )
+    
+    def __init__(self, cache_dir=".http_cache", html_backend=None, embedded_json=True, schedules=None):
         self.base_url = "https://coinmarketcap.com/charts/crypto-market-cycle-indicators/"
+        self.charts_url = "https://coinmarketcap.com/charts/"
+        self.fear_greed_url = "https://api.alternative.me/fng/"
+        # Cache em disco das páginas da CMC (None desativa)
+        self.http_cache = HttpCache(cache_dir) if cache_dir else None
+        self.html_backend = html_extract.resolve_backend(html_backend)
+        # Ler primeiro o JSON embutido na página, com o parser DOM como reserva
+        self.embedded_json = embedded_json
         self.session = requests.Session()
+        # Pool compartilhado: as três fontes são buscadas em paralelo reaproveitando conexões
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=8)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.executor = ThreadPoolExecutor(max_workers=len(self.SOURCE_TIMEOUTS), thread_name_prefix="scraper")
+        self.schedule = SourceScheduler(schedules or self.SOURCE_SCHEDULES)
+        # Resultado do último ciclo (success, fallback) e fontes efetivamente coletadas nele
+        self.last_cycle_result = None
+        self.last_cycle_fetched = frozenset()
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
             'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
@@ -28,412 +112,351 @@ class CoinMarketCapScraper:
             'Connection': 'keep-alive',
             'Upgrade-Insecure-Requests': '1',
         })
+    
+    def fetch_parsed(self, url, timeout, parse, source=None):
+        """GET condicional: em 304 ou corpo idêntico reaproveita o resultado parseado do cache"""
+        entry = self.http_cache.lookup(url) if self.http_cache else None
+        headers = self.http_cache.conditional_headers(url) if entry else {}
+        
+        response = self.session.get(url, timeout=timeout, headers=headers)
+        
+        if response.status_code == 304 and entry is not None:
+            logger.info(f"   ♻️ {url} não modificado (304), usando cache")
+            self.http_cache.revalidate(url, response.headers)
+            return entry["parsed"]
+        
+        if response.status_code != 200:
+            logger.error(f"❌ Erro HTTP {response.status_code} ao acessar {url}")
+            return None
         
-    def get_fear_greed_index(self):
+        return self.parse_body(url, entry, response.headers, response.content, parse, source)
+    
+    def parse_body(self, url, entry, response_headers, body, parse, source=None):
+        """Parseia um corpo já baixado; corpo idêntico ao da entrada do cache reaproveita o resultado"""
+        digest = hashlib.sha256(body).hexdigest()
+        if entry is not None and entry["sha256"] == digest:
+            logger.info(f"   ♻️ {url} com conteúdo idêntico, usando cache")
+            self.http_cache.revalidate(url, response_headers)
+            return entry["parsed"]
+        
+        parse_started = time.perf_counter()
+        parsed = parse(body)
+        metrics.SOURCE_PARSE_SECONDS.labels(source or url).observe(time.perf_counter() - parse_started)
+        if self.http_cache is not None and parsed is not None:
+            self.http_cache.store(url, response_headers, digest, parsed)
+        return parsed
+    
+    def get_fear_greed_index(self, timeout=None):
         """Coleta o Fear & Greed Index da API"""
         try:
             logger.info("📊 Coletando Fear & Greed Index...")
-            url = "https://api.alternative.me/fng/"
-            response = self.session.get(url, timeout=10)
+            response = self.session.get(self.fear_greed_url, timeout=timeout or self.SOURCE_TIMEOUTS["fear_greed"])
             if response.status_code == 200:
+                parse_started = time.perf_counter()
                 data = response.json()
                 value = float(data['data'][0]['value'])
+                metrics.SOURCE_PARSE_SECONDS.labels("fear_greed").observe(time.perf_counter() - parse_started)
                 logger.info(f"   Fear & Greed Index: {value}")
                 return value
         except Exception as e:
             logger.error(f"❌ Erro ao coletar Fear & Greed Index: {e}")
         return None
     
-    def get_bitcoin_dominance(self):
+    def get_bitcoin_dominance(self, timeout=None):
         """Coleta a dominância do Bitcoin da CoinMarketCap"""
         try:
             logger.info("📊 Coletando Bitcoin Dominance...")
-            url = "https://coinmarketcap.com/charts/"
-            response = self.session.get(url, timeout=10)
-            if response.status_code == 200:
-                soup = BeautifulSoup(response.content, 'html.parser')
-                # Procurar por elementos que contenham a dominância do Bitcoin
-                dominance_elements = soup.find_all(text=re.compile(r'Bitcoin.*%|BTC.*%'))
-                for element in dominance_elements:
-                    match = re.search(r'(\d+\.?\d*)%', element)
-                    if match:
-                        dominance = float(match.group(1))
-                        logger.info(f"   Bitcoin Dominance: {dominance}%")
-                        return dominance
+            dominance = self.fetch_parsed(
+                self.charts_url,
+                timeout or self.SOURCE_TIMEOUTS["dominance"],
+                self.parse_dominance,
+                source="dominance"
+            )
+            if dominance is not None:
+                logger.info(f"   Bitcoin Dominance: {dominance}%")
+                return dominance
         except Exception as e:
             logger.error(f"❌ Erro ao coletar Bitcoin Dominance: {e}")
         return None
     
-    def scrape_indicators(self):
-        """Faz scraping dos indicadores da página da CoinMarketCap"""
-        try:
-            logger.info("🚀 Iniciando scraping da CoinMarketCap...")
-            response = self.session.get(self.base_url, timeout=15)
+    def parse_dominance(self, content):
+        """Extrai a dominância do Bitcoin do HTML da página de gráficos"""
+        return html_extract.extract_dominance(content, self.html_backend)
+    
+    def get_cycle_table(self, timeout=None):
+        """Coleta a tabela de indicadores de ciclo da CoinMarketCap"""
+        timeout = timeout or self.SOURCE_TIMEOUTS["cycle_table"]
+        
+        if self.embedded_json:
+            return self.fetch_embedded_table(self.base_url, timeout)
+        
+        return self.fetch_parsed(self.base_url, timeout, self.parse_cycle_table, source="cycle_table")
+    
+    def fetch_embedded_table(self, url, timeout):
+        """Lê só o JSON embutido via streaming, parando de baixar a página quando o payload termina
+
+        Sem JSON embutido utilizável, o restante da mesma resposta é lido e vai para o parser DOM:
+        a página nunca é pedida duas vezes no mesmo ciclo.
+        """
+        cache_key = url + "#embedded-json"
+        entry = self.http_cache.lookup(cache_key) if self.http_cache else None
+        headers = self.http_cache.conditional_headers(cache_key) if entry else {}
+        
+        with self.session.get(url, timeout=timeout, headers=headers, stream=True) as response:
+            if response.status_code == 304 and entry is not None:
+                logger.info(f"   ♻️ {url} não modificado (304), usando cache")
+                self.http_cache.revalidate(cache_key, response.headers)
+                return entry["parsed"]
             
             if response.status_code != 200:
-                logger.error(f"❌ Erro HTTP {response.status_code} ao acessar {self.base_url}")
+                logger.error(f"❌ Erro HTTP {response.status_code} ao acessar {url}")
                 return None
             
-            soup = BeautifulSoup(response.content, 'html.parser')
-            indicators_data = {}
-            
-            # Procurar pela tabela de indicadores
-            table_rows = soup.find_all('tr')
+            chunks = response.iter_content(chunk_size=16384)
+            received = []
+            payload = html_extract.read_embedded_json(_recorded(chunks, received))
+            indicators_data = self.embedded_indicators(cache_key, entry, response.headers, payload)
+            if indicators_data is not None:
+                return indicators_data
             
-            for row in table_rows:
-                cells = row.find_all(['td', 'th'])
-                if len(cells) >= 4:  # Número, Indicador, Current, Reference
-                    try:
-                        # Extrair dados da linha
-                        indicator_cell = cells[1] if len(cells) > 1 else None
-                        current_cell = cells[2] if len(cells) > 2 else None
-                        reference_cell = cells[3] if len(cells) > 3 else None
-                        
-                        if indicator_cell and current_cell and reference_cell:
-                            indicator_name = indicator_cell.get_text(strip=True)
-                            current_text = current_cell.get_text(strip=True)
-                            reference_text = reference_cell.get_text(strip=True)
-                            
-                            # Limpar e converter valores
-                            current_value = self.parse_value(current_text)
-                            reference_value = self.parse_value(reference_text)
-                            
-                            if indicator_name and current_value is not None and reference_value is not None:
-                                indicators_data[indicator_name] = {
-                                    "current": current_value,
-                                    "reference": reference_value,
-                                    "compare": ">=" if "≥" in reference_text or ">=" in reference_text else ">=",
-                                    "source": "coinmarketcap",
-                                    "description": self.get_indicator_description(indicator_name)
-                                }
-                                logger.info(f"   ✅ {indicator_name}: {current_value} (ref: {reference_value})")
-                    
-                    except Exception as e:
-                        logger.warning(f"⚠️ Erro ao processar linha da tabela: {e}")
-                        continue
+            logger.warning("⚠️ JSON embutido não encontrado, usando parser DOM")
+            received.extend(chunks)
+            body = b"".join(received)
+        
+        return self.parse_body(url, self.http_cache.lookup(url) if self.http_cache else None, response.headers, body,
+                               self.parse_cycle_table, source="cycle_table")
+    
+    def embedded_indicators(self, cache_key, entry, response_headers, payload):
+        """Indicadores do payload do JSON embutido, ou None se ausente, inválido ou incompleto"""
+        if payload is None:
+            return None
+        
+        digest = hashlib.sha256(payload).hexdigest()
+        if entry is not None and entry["sha256"] == digest:
+            logger.info(f"   ♻️ {cache_key} com JSON embutido idêntico, usando cache")
+            self.http_cache.revalidate(cache_key, response_headers)
+            return entry["parsed"]
+        
+        parse_started = time.perf_counter()
+        try:
+            embedded = json.loads(payload)
+        except ValueError as e:
+            logger.warning(f"⚠️ JSON embutido inválido: {e}")
+            return None
+        
+        indicators_data = {}
+        for indicator_name, current_value, reference_value in html_extract.map_embedded_indicators(embedded):
+            self.add_table_indicator(indicators_data, indicator_name, current_value, reference_value)
+        metrics.SOURCE_PARSE_SECONDS.labels("cycle_table").observe(time.perf_counter() - parse_started)
+        if len(indicators_data) < self.EMBEDDED_MIN_INDICATORS:
+            logger.warning(f"⚠️ JSON embutido com só {len(indicators_data)} indicadores conhecidos")
+            return None
+        
+        if self.http_cache is not None and indicators_data:
+            self.http_cache.store(cache_key, response_headers, digest, indicators_data)
+        return indicators_data
+    
+    def indicator_entry(self, indicators_data, indicator_name, current_value, reference_value, source="coinmarketcap"):
+        """Grava o indicador com o nome canônico; direção e descrição vêm do registro de indicadores"""
+        definition = indicator_registry.resolve(indicator_name)
+        name = definition.name if definition is not None else indicator_name
+        indicators_data[name] = {
+            "current": current_value,
+            "reference": reference_value,
+            "compare": definition.compare if definition is not None else ">=",
+            "source": source,
+            "description": self.get_indicator_description(name)
+        }
+        return name
+    
+    def add_table_indicator(self, indicators_data, indicator_name, current_value, reference_value):
+        """Adiciona um indicador da tabela de ciclo se nome e valores forem válidos"""
+        if indicator_name and current_value is not None and reference_value is not None:
+            name = self.indicator_entry(indicators_data, indicator_name, current_value, reference_value)
+            logger.info(f"   ✅ {name}: {current_value} (ref: {reference_value})")
+    
+    def parse_cycle_table(self, content):
+        """Extrai os indicadores da tabela de ciclo do HTML"""
+        indicators_data = {}
+        
+        # Apenas as linhas da tabela de indicadores são extraídas
+        for indicator_name, current_text, reference_text in html_extract.extract_table_rows(content, self.html_backend):
+            try:
+                # Limpar e converter valores
+                current_value = self.parse_value(current_text)
+                reference_value = self.parse_value(reference_text)
+                
+                self.add_table_indicator(indicators_data, indicator_name, current_value, reference_value)
             
-            # Adicionar Fear & Greed Index
-            fear_greed = self.get_fear_greed_index()
-            if fear_greed is not None:
-                indicators_data["Fear & Greed Index"] = {
-                    "current": fear_greed,
-                    "reference": 90.0,
-                    "compare": ">=",
-                    "source": "api",
-                    "description": "Índice de medo e ganância do mercado"
-                }
+            except Exception as e:
+                logger.warning(f"⚠️ Erro ao processar linha da tabela: {e}")
+                continue
+        
+        return indicators_data
+    
+    def fetch_sources(self, names=None):
+        """Busca as fontes (todas, ou só `names`) em paralelo, cada uma no máximo uma vez por ciclo"""
+        fetchers = {
+            "cycle_table": self.get_cycle_table,
+            "fear_greed": self.get_fear_greed_index,
+            "dominance": self.get_bitcoin_dominance
+        }
+        if names is not None:
+            fetchers = {name: fetchers[name] for name in names}
+        started = time.monotonic()
+        futures = {
+            name: self.executor.submit(self._timed_fetch, name, fetch, self.SOURCE_TIMEOUTS[name])
+            for name, fetch in fetchers.items()
+        }
+        
+        results = {}
+        for name, future in futures.items():
+            # Cada fonte espera até o próprio prazo, sem ultrapassar o orçamento do ciclo
+            remaining = self.CYCLE_BUDGET - (time.monotonic() - started)
+            deadline = max(0, min(self.SOURCE_TIMEOUTS[name], remaining))
+            done, _ = wait([future], timeout=deadline)
+            if not done:
+                future.cancel()
+                logger.warning(f"⚠️ Fonte {name} excedeu o prazo de {deadline:.1f}s")
+                metrics.SOURCE_RESULTS.labels(name, "timeout").inc()
+                results[name] = None
+                continue
+            try:
+                results[name] = future.result()
+            except Exception as e:
+                logger.error(f"❌ Erro ao coletar {name}: {e}")
+                metrics.SOURCE_RESULTS.labels(name, "error").inc()
+                results[name] = None
+                continue
+            metrics.SOURCE_RESULTS.labels(name, "ok" if results[name] else "empty").inc()
+        
+        return results
+    
+    def _timed_fetch(self, name, fetch, timeout):
+        """Executa a coleta de uma fonte medindo rede + parse (inclusive além do prazo do ciclo)"""
+        started = time.perf_counter()
+        try:
+            return fetch(timeout)
+        finally:
+            metrics.SOURCE_SECONDS.labels(name).observe(time.perf_counter() - started)
+    
+    def scrape_indicators(self, force=False):
+        """Faz scraping dos indicadores da página da CoinMarketCap
+        
+        Só as fontes devidas pela agenda são consultadas (force consulta todas, exceto as de
+        circuito aberto); as demais entram com o último valor bom, marcado com age_seconds.
+        """
+        started = time.perf_counter()
+        result = "fallback"
+        fetched = set()
+        
+        try:
+            logger.info("🚀 Iniciando scraping da CoinMarketCap...")
+            due = self.schedule.due(force)
+            results = self.fetch_sources(due) if due else {}
+            for name, value in results.items():
+                self.record_source(name, value)
+                if value is not None and value != {}:
+                    fetched.add(name)
             
-            # Adicionar Bitcoin Dominance (com lógica inversa)
-            btc_dominance = self.get_bitcoin_dominance()
-            if btc_dominance is not None:
-                indicators_data["Bitcoin Dominance"] = {
-                    "current": btc_dominance,
-                    "reference": 40.0,  # Quando chega a 40%, indica fim de ciclo
-                    "compare": "<=",    # Lógica inversa: quanto menor, mais próximo do topo
-                    "source": "coinmarketcap",
-                    "description": "Dominância do Bitcoin no mercado (inverso: menor = mais próximo do topo)"
-                }
+            fear_greed, fear_greed_age = self.schedule.last_good("fear_greed")
+            btc_dominance, dominance_age = self.schedule.last_good("dominance")
+            table, table_age = self.schedule.last_good("cycle_table")
             
-            # Se não conseguiu fazer scraping da tabela, usar dados de fallback
-            if not indicators_data:
+            # Sem nenhum valor bom da tabela, usar dados de fallback
+            if not table:
                 logger.warning("⚠️ Não foi possível fazer scraping da tabela. Usando dados de fallback...")
-                indicators_data = self.get_fallback_data()
+                indicators_data = self.get_fallback_data(fear_greed=fear_greed, btc_dominance=btc_dominance)
+            else:
+                indicators_data = {name: dict(entry) for name, entry in table.items()}
+                self.add_api_indicators(indicators_data, fear_greed, btc_dominance)
+                if "cycle_table" not in fetched:
+                    for entry in indicators_data.values():
+                        entry["age_seconds"] = round(table_age, 1)
+                logger.info(f"✅ Scraping concluído! {len(indicators_data)} indicadores coletados.")
+                result = "success"
             
-            logger.info(f"✅ Scraping concluído! {len(indicators_data)} indicadores coletados.")
+            for name, source, age in (("Fear & Greed Index", "fear_greed", fear_greed_age),
+                                      ("Bitcoin Dominance", "dominance", dominance_age)):
+                if name in indicators_data and source not in fetched:
+                    indicators_data[name]["age_seconds"] = round(age, 1)
             return indicators_data
             
         except Exception as e:
             logger.error(f"❌ Erro durante o scraping: {e}")
-            return self.get_fallback_data()
+            return self.get_fallback_data(fear_greed=self.schedule.last_good("fear_greed")[0],
+                                          btc_dominance=self.schedule.last_good("dominance")[0])
+        
+        finally:
+            metrics.SCRAPE_CYCLE_SECONDS.observe(time.perf_counter() - started)
+            metrics.SCRAPE_CYCLES.labels(result).inc()
+            self.last_cycle_result = result
+            self.last_cycle_fetched = frozenset(fetched)
     
-    def parse_value(self, text):
-        """Converte texto em valor numérico"""
-        if not text:
-            return None
+    def seed_last_good(self, indicators, age):
+        """Usa valores já publicados (ex.: o snapshot persistido no warm start) como último valor
+        bom de cada fonte, com a idade que tinham; as fontes continuam devidas no próximo ciclo"""
+        table = {}
+        fear_greed = btc_dominance = None
+        for name, entry in indicators.items():
+            if name == "Fear & Greed Index":
+                fear_greed = entry["current"]
+            elif name == "Bitcoin Dominance":
+                btc_dominance = entry["current"]
+            else:
+                self.indicator_entry(table, name, entry["current"], entry["reference"])
+        for source, value in (("cycle_table", table), ("fear_greed", fear_greed), ("dominance", btc_dominance)):
+            if value is not None and value != {}:
+                self.schedule.seed(source, value, age)
+    
+    def record_source(self, name, value):
+        """Registra o resultado da fonte na agenda; mudanças do circuit breaker vão para log e métricas"""
+        transition = self.schedule.record(name, value)
+        if transition is None:
+            return
+        metrics.SOURCE_BREAKER_TRANSITIONS.labels(name, transition).inc()
+        if transition == OPEN:
+            logger.warning(f"🔌 Circuito da fonte {name} aberto; usando o último valor bom até a próxima tentativa")
+        else:
+            logger.info(f"🔌 Circuito da fonte {name} fechado")
+    
+    def add_api_indicators(self, indicators_data, fear_greed, btc_dominance):
+        """Adiciona Fear & Greed Index e Bitcoin Dominance quando coletados"""
+        if fear_greed is not None:
+            self.indicator_entry(indicators_data, "Fear & Greed Index", fear_greed, 90.0, source="api")
         
-        # Remover símbolos e espaços
-        clean_text = re.sub(r'[^\d.,%-]', '', text)
-        clean_text = clean_text.replace('%', '').replace(',', '')
+        # Bitcoin Dominance usa lógica inversa (definida no registro): quando chega a 40%, indica fim de ciclo
+        if btc_dominance is not None:
+            self.indicator_entry(indicators_data, "Bitcoin Dominance", btc_dominance, 40.0)
         
-        try:
-            # Tentar converter para float
-            if '.' in clean_text:
-                return float(clean_text)
-            else:
-                return int(clean_text)
-        except (ValueError, TypeError):
-            return None
+        return indicators_data
+    
+    def parse_value(self, text):
+        """Converte texto em valor numérico"""
+        return html_extract.parse_value(text)
     
     def get_indicator_description(self, name):
         """Retorna descrição do indicador"""
-        descriptions = {
-            "Bitcoin Ahr999 Index": "Indica sobrecompra quando >= 4.0",
-            "Pi Cycle Top Indicator": "Sinal de topo quando 111DMA cruza 350DMA x2",
-            "Puell Multiple": "Receita dos mineradores vs média histórica",
-            "Bitcoin Rainbow Chart": "Nível de preço no gráfico arco-íris",
-            "Days of ETF Net Outflows": "Dias consecutivos de saída de ETFs",
-            "ETF-to-BTC Ratio": "Proporção de ETFs vs BTC total",
-            "2-Year MA Multiplier": "Preço vs média móvel de 2 anos",
-            "MVRV Z-Score": "Valor de mercado vs valor realizado",
-            "Bitcoin Bubble Index": "Índice de bolha especulativa",
-            "USDT Flexible Savings": "Taxa de poupança flexível USDT",
-            "RSI - 22 Day": "Índice de força relativa 22 dias",
-            "CMC Altcoin Season Index": "Índice de temporada de altcoins",
-            "Bitcoin Dominance": "Dominância do Bitcoin no mercado (inverso)",
-            "Bitcoin Long Term Holder Supply": "Oferta de holders de longo prazo",
-            "Bitcoin Short Term Holder Supply (%)": "Oferta de holders de curto prazo",
-            "Bitcoin Reserve Risk": "Risco de reserva dos holders",
-            "Bitcoin Net Unrealized P&L (NUPL)": "Lucro/prejuízo não realizado líquido",
-            "Bitcoin RHODL Ratio": "Ratio RHODL para timing de ciclo",
-            "Bitcoin Macro Oscillator (BMO)": "Oscilador macro do Bitcoin",
-            "Bitcoin MVRV Ratio": "Market Value to Realized Value",
-            "Bitcoin 4-Year Moving Average": "Média móvel de 4 anos",
-            "Crypto Bitcoin Bull Run Index (CBBI)": "Índice de bull run do Bitcoin",
-            "Mayer Multiple": "Preço vs média móvel de 200 dias",
-            "Bitcoin AHR999x Top Escape Indicator": "Indicador de escape do topo",
-            "MicroStrategy's Avg Bitcoin Cost": "Custo médio do Bitcoin da MicroStrategy",
-            "Bitcoin Trend Indicator": "Indicador de tendência do Bitcoin",
-            "3-Month Annualized Ratio": "Ratio anualizado de 3 meses",
-            "Bitcoin Terminal Price": "Preço terminal projetado",
-            "Golden Ratio Multiplier": "Multiplicador da proporção áurea",
-            "Smithson's Bitcoin Price Forecast": "Previsão de preço do Smithson",
-            "Fear & Greed Index": "Índice de medo e ganância do mercado"
-        }
-        return descriptions.get(name, f"Indicador de fim de ciclo: {name}")
+        definition = indicator_registry.resolve(name)
+        if definition is not None and definition.description:
+            return definition.description
+        return f"Indicador de fim de ciclo: {name}"
     
-    def get_fallback_data(self):
+    def get_fallback_data(self, fear_greed=_NOT_FETCHED, btc_dominance=_NOT_FETCHED):
         """Dados de fallback caso o scraping falhe"""
         logger.info("📊 Usando dados de fallback...")
         
-        # Tentar pelo menos coletar Fear & Greed e Bitcoin Dominance
-        fear_greed = self.get_fear_greed_index()
-        btc_dominance = self.get_bitcoin_dominance()
+        # Tentar pelo menos coletar Fear & Greed e Bitcoin Dominance, reaproveitando o que o ciclo já buscou
+        if fear_greed is _NOT_FETCHED:
+            fear_greed = self.get_fear_greed_index()
+        if btc_dominance is _NOT_FETCHED:
+            btc_dominance = self.get_bitcoin_dominance()
         
-        fallback_data = {
-            "Bitcoin Ahr999 Index": {
-                "current": 1.06,
-                "reference": 4.0,
-                "compare": ">=",
-                "source": "coinmarketcap",
-                "description": "Indica sobrecompra quando >= 4.0"
-            },
-            "Pi Cycle Top Indicator": {
-                "current": 110165.49,
-                "reference": 186976.0,
-                "compare": ">=",
-                "source": "coinmarketcap",
-                "description": "Sinal de topo quando 111DMA cruza 350DMA x2"
-            },
-            "Puell Multiple": {
-                "current": 1.39,
-                "reference": 2.2,
-                "compare": ">=",
-                "source": "coinmarketcap",
-                "description": "Receita dos mineradores vs média histórica"
-            },
-            "Bitcoin Rainbow Chart": {
-                "current": 3.0,
-                "reference": 5.0,
-                "compare": ">=",
-                "source": "coinmarketcap",
-                "description": "Nível de preço no gráfico arco-íris"
-            },
-            "Days of ETF Net Outflows": {
-                "current": 7.0,
-                "reference": 10.0,
-                "compare": ">=",
-                "source": "coinmarketcap",
-                "description": "Dias consecutivos de saída de ETFs"
-            },
-            "ETF-to-BTC Ratio": {
-                "current": 5.09,
-                "reference": 3.5,
-                "compare": "<=",
-                "source": "coinmarketcap",
-                "description": "Proporção de ETFs vs BTC total"
-            },
-            "2-Year MA Multiplier": {
-                "current": 112654.42,
-                "reference": 356781.0,
-                "compare": ">=",
-                "source": "coinmarketcap",
-                "description": "Preço vs média móvel de 2 anos"
-            },
-            "MVRV Z-Score": {
-                "current": 2.30,
-                "reference": 5.0,
-                "compare": ">=",
-                "source": "coinmarketcap",
-                "description": "Valor de mercado vs valor realizado"
-            },
-            "Bitcoin Bubble Index": {
-                "current": 13.48,
-                "reference": 80.0,
-                "compare": ">=",
-                "source": "coinmarketcap",
-                "description": "Índice de bolha especulativa"
-            },
-            "USDT Flexible Savings": {
-                "current": 8.41,
-                "reference": 29.0,
-                "compare": ">=",
-                "source": "coinmarketcap",
-                "description": "Taxa de poupança flexível USDT"
-            },
-            "RSI - 22 Day": {
-                "current": 44.289,
-                "reference": 80.0,
-                "compare": ">=",
-                "source": "coinmarketcap",
-                "description": "Índice de força relativa 22 dias"
-            },
-            "CMC Altcoin Season Index": {
-                "current": 47.0,
-                "reference": 75.0,
-                "compare": ">=",
-                "source": "coinmarketcap",
-                "description": "Índice de temporada de altcoins"
-            },
-            "Bitcoin Long Term Holder Supply": {
-                "current": 15.59,
-                "reference": 13.5,
-                "compare": "<=",
-                "source": "coinmarketcap",
-                "description": "Oferta de holders de longo prazo"
-            },
-            "Bitcoin Short Term Holder Supply (%)": {
-                "current": 21.71,
-                "reference": 30.0,
-                "compare": ">=",
-                "source": "coinmarketcap",
-                "description": "Oferta de holders de curto prazo"
-            },
-            "Bitcoin Reserve Risk": {
-                "current": 0.0025,
-                "reference": 0.005,
-                "compare": ">=",
-                "source": "coinmarketcap",
-                "description": "Risco de reserva dos holders"
-            },
-            "Bitcoin Net Unrealized P&L (NUPL)": {
-                "current": 54.91,
-                "reference": 70.0,
-                "compare": ">=",
-                "source": "coinmarketcap",
-                "description": "Lucro/prejuízo não realizado líquido"
-            },
-            "Bitcoin RHODL Ratio": {
-                "current": 3006.0,
-                "reference": 10000.0,
-                "compare": ">=",
-                "source": "coinmarketcap",
-                "description": "Ratio RHODL para timing de ciclo"
-            },
-            "Bitcoin Macro Oscillator (BMO)": {
-                "current": 0.91,
-                "reference": 1.4,
-                "compare": ">=",
-                "source": "coinmarketcap",
-                "description": "Oscilador macro do Bitcoin"
-            },
-            "Bitcoin MVRV Ratio": {
-                "current": 2.17,
-                "reference": 3.0,
-                "compare": ">=",
-                "source": "coinmarketcap",
-                "description": "Market Value to Realized Value"
-            },
-            "Bitcoin 4-Year Moving Average": {
-                "current": 2.20,
-                "reference": 3.5,
-                "compare": ">=",
-                "source": "coinmarketcap",
-                "description": "Média móvel de 4 anos"
-            },
-            "Crypto Bitcoin Bull Run Index (CBBI)": {
-                "current": 77.0,
-                "reference": 90.0,
-                "compare": ">=",
-                "source": "coinmarketcap",
-                "description": "Índice de bull run do Bitcoin"
-            },
-            "Mayer Multiple": {
-                "current": 1.13,
-                "reference": 2.2,
-                "compare": ">=",
-                "source": "coinmarketcap",
-                "description": "Preço vs média móvel de 200 dias"
-            },
-            "Bitcoin AHR999x Top Escape Indicator": {
-                "current": 2.85,
-                "reference": 0.45,
-                "compare": "<=",
-                "source": "coinmarketcap",
-                "description": "Indicador de escape do topo"
-            },
-            "MicroStrategy's Avg Bitcoin Cost": {
-                "current": 73271.0,
-                "reference": 155655.0,
-                "compare": ">=",
-                "source": "coinmarketcap",
-                "description": "Custo médio do Bitcoin da MicroStrategy"
-            },
-            "Bitcoin Trend Indicator": {
-                "current": 6.14,
-                "reference": 7.0,
-                "compare": ">=",
-                "source": "coinmarketcap",
-                "description": "Indicador de tendência do Bitcoin"
-            },
-            "3-Month Annualized Ratio": {
-                "current": 9.95,
-                "reference": 30.0,
-                "compare": ">=",
-                "source": "coinmarketcap",
-                "description": "Ratio anualizado de 3 meses"
-            },
-            "Bitcoin Terminal Price": {
-                "current": 112654.42,
-                "reference": 187702.0,
-                "compare": ">=",
-                "source": "coinmarketcap",
-                "description": "Preço terminal projetado"
-            },
-            "Golden Ratio Multiplier": {
-                "current": 112654.42,
-                "reference": 135522.0,
-                "compare": ">=",
-                "source": "coinmarketcap",
-                "description": "Multiplicador da proporção áurea"
-            },
-            "Smithson's Bitcoin Price Forecast": {
-                "current": 112654.42,
-                "reference": 175000.0,
-                "compare": ">=",
-                "source": "coinmarketcap",
-                "description": "Previsão de preço do Smithson"
-            }
-        }
+        fallback_data = {}
+        for name, current, reference in self.FALLBACK_VALUES:
+            self.indicator_entry(fallback_data, name, current, reference)
         
-        # Adicionar Fear & Greed Index se coletado
-        if fear_greed is not None:
-            fallback_data["Fear & Greed Index"] = {
-                "current": fear_greed,
-                "reference": 90.0,
-                "compare": ">=",
-                "source": "api",
-                "description": "Índice de medo e ganância do mercado"
-            }
-        
-        # Adicionar Bitcoin Dominance se coletado (com lógica inversa)
-        if btc_dominance is not None:
-            fallback_data["Bitcoin Dominance"] = {
-                "current": btc_dominance,
-                "reference": 40.0,  # Quando chega a 40%, indica fim de ciclo
-                "compare": "<=",    # Lógica inversa: quanto menor, mais próximo do topo
-                "source": "coinmarketcap",
-                "description": "Dominância do Bitcoin no mercado (inverso: menor = mais próximo do topo)"
-            }
+        self.add_api_indicators(fallback_data, fear_greed, btc_dominance)
         
         return fallback_data
     
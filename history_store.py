@@ -0,0 +1,216 @@
+"""
+Histórico em disco dos snapshots de indicadores
+Armazenamento colunar append-only: cada indicador tem arrays float64 de largura fixa
+(current e reference) alinhados a um array int64 de timestamps, lidos via memory-map.
+O numpy só é importado nas consultas: o append e a inicialização da API não dependem dele.
+"""
+
+import fcntl
+import json
+import os
+import struct
+import threading
+from contextlib import contextmanager
+
+
+# Resoluções aceitas na consulta
+RESOLUTIONS = ("raw", "last", "ohlc")
+
+_NAN = float("nan")
+
+class HistoryLimitError(ValueError):
+    """A consulta devolveria mais pontos que o limite pedido"""
+    
+    def __init__(self, points, max_points):
+        super().__init__(f"A consulta devolveria {points} pontos (máximo {max_points})")
+        self.points = points
+        self.max_points = max_points
+
+class HistoryStore:
+    """Séries temporais dos indicadores com consultas por intervalo e downsampling"""
+    
+    TIMESTAMPS_FILE = "timestamps.i8"
+    COLUMNS_FILE = "columns.json"
+    LOCK_FILE = "append.lock"
+    
+    def __init__(self, directory="history"):
+        self.directory = directory
+        self._lock = threading.Lock()
+    
+    def _path(self, filename):
+        return os.path.join(self.directory, filename)
+    
+    def _column_files(self, column_id):
+        prefix = f"col_{column_id:04d}"
+        return self._path(prefix + ".current.f8"), self._path(prefix + ".reference.f8")
+    
+    def _load_columns(self):
+        try:
+            with open(self._path(self.COLUMNS_FILE), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+    
+    def _save_columns(self, columns):
+        path = self._path(self.COLUMNS_FILE)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(columns, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, path)
+    
+    @contextmanager
+    def _locked(self):
+        """Exclusão entre processos (flock: cada worker com atualização em segundo plano grava
+        nos mesmos arquivos) e entre threads do mesmo processo"""
+        with self._lock:
+            os.makedirs(self.directory, exist_ok=True)
+            fd = os.open(self._path(self.LOCK_FILE), os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX)
+                yield
+            finally:
+                os.close(fd)
+    
+    @staticmethod
+    def _write_row(path, rows, data):
+        """Grava a linha na posição `rows`, descartando bytes de uma gravação interrompida:
+        as colunas são posicionais, e um append solto deslocaria todas as linhas seguintes"""
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            offset = rows * len(data)
+            os.ftruncate(fd, offset)
+            os.pwrite(fd, data, offset)
+        finally:
+            os.close(fd)
+    
+    def row_count(self):
+        try:
+            return os.path.getsize(self._path(self.TIMESTAMPS_FILE)) // 8
+        except OSError:
+            return 0
+    
+    def append(self, timestamp, data):
+        """Acrescenta uma linha com os valores current/reference de cada indicador"""
+        with self._locked():
+            columns = self._load_columns()
+            rows = self.row_count()
+            
+            # Indicadores novos ganham colunas preenchidas com NaN nas linhas anteriores
+            new_columns = [name for name in data if name not in columns]
+            for name in new_columns:
+                columns[name] = len(columns)
+                padding = struct.pack(f"<{rows}d", *([_NAN] * rows))
+                for path in self._column_files(columns[name]):
+                    with open(path, 'wb') as f:
+                        f.write(padding)
+            if new_columns:
+                self._save_columns(columns)
+            
+            for name, column_id in columns.items():
+                entry = data.get(name) or {}
+                current_path, reference_path = self._column_files(column_id)
+                for path, value in ((current_path, entry.get("current")), (reference_path, entry.get("reference"))):
+                    self._write_row(path, rows, struct.pack("<d", _NAN if value is None else float(value)))
+            
+            # O timestamp é gravado por último: é ele que torna a linha visível para leitura
+            self._write_row(self._path(self.TIMESTAMPS_FILE), rows, struct.pack("<q", int(timestamp)))
+    
+    def _map(self, path, dtype, rows):
+        import numpy as np
+        return np.memmap(path, dtype=dtype, mode='r', shape=(rows,))
+    
+    def query(self, start=None, end=None, names=None, resolution="raw", interval=86400, utc_offset=0,
+              max_points=None):
+        """Retorna (timestamps, séries) de [start, end] (epoch em segundos), opcionalmente reamostradas
+        por intervalo; os timestamps são comuns a todas as séries
+
+        Com max_points, uma consulta que devolveria mais pontos levanta HistoryLimitError antes de
+        converter qualquer coluna.
+        """
+        import numpy as np
+        if resolution not in RESOLUTIONS:
+            raise ValueError(f"Resolução inválida: {resolution} (opções: {', '.join(RESOLUTIONS)})")
+        if interval <= 0:
+            raise ValueError("O intervalo de reamostragem deve ser positivo")
+        
+        rows = self.row_count()
+        columns = self._load_columns()
+        if names:
+            columns = {name: columns[name] for name in names if name in columns}
+        if rows == 0 or not columns:
+            return [], {}
+        
+        timestamps = self._map(self._path(self.TIMESTAMPS_FILE), "<i8", rows)
+        first = 0 if start is None else int(np.searchsorted(timestamps, start, side="left"))
+        last = rows if end is None else int(np.searchsorted(timestamps, end, side="right"))
+        if first >= last:
+            return [], {}
+        
+        window = timestamps[first:last]
+        if resolution == "raw":
+            starts = ends = None
+            if max_points is not None and len(window) > max_points:
+                raise HistoryLimitError(len(window), max_points)
+            times = window.tolist()
+        else:
+            # Limites dos buckets: posições onde o índice do intervalo muda
+            buckets = (window + utc_offset) // interval
+            starts = np.concatenate(([0], np.flatnonzero(np.diff(buckets)) + 1))
+            ends = np.concatenate((starts[1:], [len(window)])) - 1
+            if max_points is not None and len(starts) > max_points:
+                raise HistoryLimitError(len(starts), max_points)
+            times = (buckets[starts] * interval - utc_offset).tolist()
+        
+        series = {}
+        for name, column_id in columns.items():
+            current_path, reference_path = self._column_files(column_id)
+            current = self._map(current_path, "<f8", rows)[first:last]
+            reference = self._map(reference_path, "<f8", rows)[first:last]
+            
+            if resolution == "raw":
+                series[name] = {
+                    "current": _to_list(current),
+                    "reference": _to_list(reference)
+                }
+            elif resolution == "last":
+                series[name] = {
+                    "current": _to_list(current[ends]),
+                    "reference": _to_list(reference[ends])
+                }
+            else:
+                series[name] = {
+                    "open": _to_list(current[starts]),
+                    "high": _to_list(np.fmax.reduceat(current, starts)),
+                    "low": _to_list(np.fmin.reduceat(current, starts)),
+                    "close": _to_list(current[ends]),
+                    "reference": _to_list(reference[ends])
+                }
+        
+        return times, series
+
+    def load_matrix(self, start=None, end=None, names=None):
+        """Retorna (timestamps, nomes, current, reference) como matrizes (indicadores, timestamps) para cálculo em lote"""
+        import numpy as np
+        rows = self.row_count()
+        columns = self._load_columns()
+        if names:
+            columns = {name: columns[name] for name in names if name in columns}
+        if rows == 0 or not columns:
+            return np.empty(0, dtype="<i8"), [], np.empty((0, 0)), np.empty((0, 0))
+        
+        timestamps = self._map(self._path(self.TIMESTAMPS_FILE), "<i8", rows)
+        first = 0 if start is None else int(np.searchsorted(timestamps, start, side="left"))
+        last = rows if end is None else int(np.searchsorted(timestamps, end, side="right"))
+        
+        current = np.empty((len(columns), max(0, last - first)))
+        reference = np.empty_like(current)
+        for row, column_id in enumerate(columns.values()):
+            current_path, reference_path = self._column_files(column_id)
+            current[row] = self._map(current_path, "<f8", rows)[first:last]
+            reference[row] = self._map(reference_path, "<f8", rows)[first:last]
+        
+        return np.array(timestamps[first:last]), list(columns), current, reference
+
+def _to_list(values):
+    """Converte um array em lista JSON, trocando NaN por None"""
+    return [None if value != value else value for value in values.tolist()]
@@ -0,0 +1,217 @@
+"""
+Extração direcionada do HTML da CoinMarketCap
+Parseia apenas a tabela de indicadores e o bloco de dominância, com backend selecionável.
+O BeautifulSoup só é importado quando um backend baseado nele é usado.
+"""
+
+import html
+import os
+import re
+
+import indicator_registry
+
+try:
+    import lxml.html  # opcional: backend "lxml"
+    _LXML_PARSER = lxml.html.HTMLParser(encoding='utf-8')
+except ImportError:
+    lxml = None
+
+# Backends disponíveis:
+#   html.parser - BeautifulSoup com o parser da biblioteca padrão (árvore completa)
+#   lxml        - lxml.html direto, sem montar a árvore do BeautifulSoup
+#   strainer    - BeautifulSoup montando apenas as linhas <tr> (SoupStrainer)
+BACKENDS = ("html.parser", "lxml", "strainer")
+DEFAULT_BACKEND = os.environ.get("HTML_BACKEND", "lxml")
+
+# Parsers de valor pré-compilados, compartilhados por todos os backends
+_VALUE_CLEAN_RE = re.compile(r'[^\d.,%-]')
+_DOMINANCE_TEXT_RE = re.compile(r'Bitcoin.*%|BTC.*%')
+_PERCENT_RE = re.compile(r'(\d+\.?\d*)%')
+# Nós de texto do documento, sem montar DOM (usado pelo modo strainer)
+_TEXT_NODE_RE = re.compile(r'>([^<]+)<')
+
+# Payload JSON que o Next.js embute nas páginas da CMC
+EMBEDDED_JSON_MARKER = b'id="__NEXT_DATA__"'
+_SCRIPT_END = b'</script'
+
+# Chaves aceitas para nome, valor atual e referência nos objetos do JSON embutido
+_NAME_KEYS = ("indicatorName", "name", "title")
+_CURRENT_KEYS = ("currentValue", "current", "value")
+_REFERENCE_KEYS = ("targetValue", "referenceValue", "reference", "target", "threshold")
+
+def parse_value(text):
+    """Converte texto em valor numérico"""
+    if not text:
+        return None
+    
+    # Remover símbolos e espaços
+    clean_text = _VALUE_CLEAN_RE.sub('', text).replace('%', '').replace(',', '')
+    
+    try:
+        # Tentar converter para float
+        if '.' in clean_text:
+            return float(clean_text)
+        else:
+            return int(clean_text)
+    except (ValueError, TypeError):
+        return None
+
+def parse_percent(text):
+    """Extrai o primeiro percentual (ex.: '57.3%') de um texto"""
+    match = _PERCENT_RE.search(text)
+    return float(match.group(1)) if match else None
+
+def resolve_backend(backend=None):
+    """Valida o backend pedido, caindo para strainer quando lxml não está instalado"""
+    backend = backend or DEFAULT_BACKEND
+    if backend not in BACKENDS:
+        raise ValueError(f"Backend de HTML desconhecido: {backend} (opções: {', '.join(BACKENDS)})")
+    if backend == "lxml" and lxml is None:
+        return "strainer"
+    return backend
+
+def _soup(content, table_only=False):
+    """Árvore do BeautifulSoup (html.parser); table_only monta só as linhas <tr>"""
+    from bs4 import BeautifulSoup, SoupStrainer
+    return BeautifulSoup(content, 'html.parser', parse_only=SoupStrainer('tr') if table_only else None)
+
+def _lxml_document(content):
+    if isinstance(content, bytes):
+        return lxml.html.document_fromstring(content, parser=_LXML_PARSER)
+    return lxml.html.document_fromstring(content)
+
+def _lxml_text(element):
+    """Equivalente a get_text(strip=True) do BeautifulSoup para elementos lxml"""
+    return "".join(part.strip() for part in element.itertext())
+
+def parse_table_document(content, backend=None):
+    """Monta a árvore usada na extração da tabela (lxml ou BeautifulSoup, conforme o backend)"""
+    backend = resolve_backend(backend)
+    if backend == "lxml":
+        return _lxml_document(content)
+    return _soup(content, table_only=backend == "strainer")
+
+def table_rows(document, backend=None):
+    """Retorna (nome, texto atual, texto de referência) de cada linha com 4+ células da árvore"""
+    backend = resolve_backend(backend)
+    rows = []
+    
+    if backend == "lxml":
+        for row in document.iter('tr'):
+            cells = list(row.iter('td', 'th'))
+            if len(cells) >= 4:  # Número, Indicador, Current, Reference
+                rows.append((_lxml_text(cells[1]), _lxml_text(cells[2]), _lxml_text(cells[3])))
+        return rows
+    
+    for row in document.find_all('tr'):
+        cells = row.find_all(['td', 'th'])
+        if len(cells) >= 4:  # Número, Indicador, Current, Reference
+            rows.append((
+                cells[1].get_text(strip=True),
+                cells[2].get_text(strip=True),
+                cells[3].get_text(strip=True)
+            ))
+    return rows
+
+def extract_table_rows(content, backend=None):
+    """Retorna (nome, texto atual, texto de referência) de cada linha com 4+ células"""
+    backend = resolve_backend(backend)
+    return table_rows(parse_table_document(content, backend), backend)
+
+def extract_dominance(content, backend=None):
+    """Retorna a dominância do Bitcoin (%) encontrada no HTML, ou None"""
+    backend = resolve_backend(backend)
+    
+    if backend == "strainer":
+        # Varre só os nós de texto e decodifica entidades apenas dos candidatos
+        if isinstance(content, bytes):
+            content = content.decode('utf-8', errors='replace')
+        for match in _TEXT_NODE_RE.finditer(content):
+            text = match.group(1)
+            if '%' in text and _DOMINANCE_TEXT_RE.search(html.unescape(text)):
+                value = parse_percent(html.unescape(text))
+                if value is not None:
+                    return value
+        return None
+    
+    if backend == "lxml":
+        texts = _lxml_document(content).itertext()
+    else:
+        texts = _soup(content).find_all(string=_DOMINANCE_TEXT_RE)
+    
+    for text in texts:
+        if _DOMINANCE_TEXT_RE.search(text):
+            value = parse_percent(text)
+            if value is not None:
+                return value
+    return None
+
+def read_embedded_json(chunks, marker=EMBEDDED_JSON_MARKER):
+    """Consome chunks de bytes até o fim do <script> marcado e retorna só o payload (ou None)"""
+    buffer = bytearray()
+    in_payload = False
+    
+    for chunk in chunks:
+        buffer += chunk
+        
+        if not in_payload:
+            position = buffer.find(marker)
+            if position < 0:
+                # Guardar só o suficiente para achar um marcador partido entre chunks
+                del buffer[:max(0, len(buffer) - len(marker))]
+                continue
+            tag_end = buffer.find(b'>', position)
+            if tag_end < 0:
+                del buffer[:position]
+                continue
+            del buffer[:tag_end + 1]
+            in_payload = True
+        
+        # Procurar o fim apenas na região nova (mais a sobreposição do terminador)
+        search_from = max(0, len(buffer) - len(chunk) - len(_SCRIPT_END))
+        end = buffer.find(_SCRIPT_END, search_from)
+        if end >= 0:
+            return bytes(buffer[:end])
+    
+    return None
+
+def _first_key(node, keys):
+    for key in keys:
+        if key in node:
+            return node[key]
+    return None
+
+def _embedded_number(value):
+    """Números do JSON são usados como vieram; textos passam pelo parse_value"""
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return value
+    if isinstance(value, str):
+        return parse_value(value)
+    return None
+
+def map_embedded_indicators(payload):
+    """Percorre o JSON embutido e retorna (nome, atual, referência) de cada indicador encontrado
+    
+    Só objetos com nome conhecido pelo registro de indicadores contam: o payload do Next.js tem
+    outros objetos com name/value/target (SEO, gráficos) que não são linhas da tabela.
+    """
+    rows = []
+    stack = [payload]
+    
+    while stack:
+        node = stack.pop()
+        if isinstance(node, dict):
+            name = _first_key(node, _NAME_KEYS)
+            current = _embedded_number(_first_key(node, _CURRENT_KEYS))
+            reference = _embedded_number(_first_key(node, _REFERENCE_KEYS))
+            if (isinstance(name, str) and current is not None and reference is not None
+                    and indicator_registry.resolve(name.strip()) is not None):
+                rows.append((name.strip(), current, reference))
+                continue
+            stack.extend(reversed(list(node.values())))
+        elif isinstance(node, list):
+            stack.extend(reversed(node))
+    
+    return rows
@@ -0,0 +1,105 @@
+"""
+Cache HTTP em disco para o scraper
+Guarda validadores (ETag/Last-Modified), o hash do corpo e o resultado já parseado de cada URL.
+O corpo em si não é guardado: um 304 ou um corpo com o mesmo hash reaproveitam o resultado parseado.
+"""
+
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+class HttpCache:
+    """Cache persistente de respostas com requisições condicionais e limite de tamanho (LRU)"""
+    
+    INDEX_FILE = "index.json"
+    
+    def __init__(self, directory=".http_cache", max_bytes=2 * 1024 * 1024):
+        self.directory = directory
+        # Limite do índice (resultados parseados serializados), que é regravado a cada mudança
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        self._entries = self._load_index()
+    
+    def _load_index(self):
+        path = os.path.join(self.directory, self.INDEX_FILE)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+    
+    def _save_index(self):
+        path = os.path.join(self.directory, self.INDEX_FILE)
+        # Nome temporário único: processos que compartilham o diretório não gravam no mesmo arquivo
+        fd, tmp_path = tempfile.mkstemp(prefix=self.INDEX_FILE + ".", suffix=".tmp", dir=self.directory)
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(self._entries, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+    
+    def lookup(self, url):
+        """Retorna a entrada em cache da URL (ou None)"""
+        with self._lock:
+            entry = self._entries.get(url)
+            if entry is not None:
+                entry["last_access"] = time.time()
+            return entry
+    
+    def conditional_headers(self, url):
+        """Cabeçalhos If-None-Match / If-Modified-Since para revalidar a URL"""
+        entry = self.lookup(url)
+        headers = {}
+        if entry is not None:
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+    
+    def revalidate(self, url, response_headers):
+        """Atualiza os validadores de uma entrada cujo conteúdo não mudou"""
+        with self._lock:
+            entry = self._entries.get(url)
+            if entry is None:
+                return
+            entry["etag"] = response_headers.get("ETag") or entry.get("etag")
+            entry["last_modified"] = response_headers.get("Last-Modified") or entry.get("last_modified")
+            entry["last_access"] = time.time()
+            self._save_index()
+    
+    def store(self, url, response_headers, digest, parsed):
+        """Grava validadores, hash do corpo e resultado parseado; depois aplica o limite de tamanho"""
+        size = len(json.dumps(parsed, ensure_ascii=False).encode('utf-8'))
+        with self._lock:
+            self._entries[url] = {
+                "etag": response_headers.get("ETag"),
+                "last_modified": response_headers.get("Last-Modified"),
+                "sha256": digest,
+                "size": size,
+                "parsed": parsed,
+                "last_access": time.time()
+            }
+            self._evict()
+            self._save_index()
+    
+    def _evict(self):
+        """Remove as entradas menos usadas até o índice caber em max_bytes"""
+        total = sum(entry["size"] for entry in self._entries.values())
+        if total <= self.max_bytes:
+            return
+        
+        for url, entry in sorted(self._entries.items(), key=lambda item: item[1]["last_access"]):
+            if total <= self.max_bytes:
+                break
+            total -= entry["size"]
+            del self._entries[url]
+            logger.info(f"🧹 Cache HTTP: removido {url}")
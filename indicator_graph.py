@@ -0,0 +1,124 @@
+"""
+Grafo de dependências dos indicadores
+Entradas compartilhadas (preço do BTC, médias móveis, RSI) são nós declarados, e cada indicador
+declara quais campos derivam de quais entradas. Quando uma entrada ou o valor coletado de um
+indicador muda, só os indicadores afetados são recalculados; os agregados do resumo são
+atualizados pela diferença, sem percorrer todos os indicadores.
+"""
+
+import threading
+
+class IndicatorGraph:
+    """Estado incremental dos indicadores processados
+    
+    evaluate(name, entry) -> (registro processado, proximidade sem arredondamento)
+    summarize(total_proximity, count, in_risk_zone, risk_distribution) -> resumo
+    metadata(name) -> descrição e unidade de indicadores que só existem via entradas
+    bindings: {indicador: {campo: (entradas, função)}}
+    """
+    
+    def __init__(self, evaluate, summarize, bindings=None, metadata=None, risk_levels=()):
+        self._evaluate = evaluate
+        self._summarize = summarize
+        self._metadata = metadata or (lambda name: {})
+        self._bindings = bindings or {}
+        self._dependents = {}
+        for name, fields in self._bindings.items():
+            for inputs, _ in fields.values():
+                for input_name in inputs:
+                    self._dependents.setdefault(input_name, set()).add(name)
+        
+        self.lock = threading.Lock()
+        self.inputs = {}
+        self.sources = {}
+        # Entrada efetiva (já com os campos derivados) e registro processado de cada indicador
+        self.data = {}
+        self.records = {}
+        self._proximities = {}
+        self.total_proximity = 0.0
+        self.in_risk_zone = 0
+        self.risk_distribution = dict.fromkeys(risk_levels, 0)
+        # Indicadores recalculados desde a criação (para medições)
+        self.evaluations = 0
+    
+    def set_sources(self, data):
+        """Substitui os valores coletados; recalcula só os indicadores novos, alterados ou removidos"""
+        # Na ordem dos dados, para que a ordem dos registros (e da soma) seja determinística
+        dirty = [name for name, entry in data.items() if self.sources.get(name) != entry]
+        dirty.extend(name for name in self.sources if name not in data)
+        self.sources = dict(data)
+        changed = self._recompute(dirty)
+        # A cada coleta completa a soma é refeita a partir das proximidades guardadas, sem
+        # reavaliar indicadores: o erro de arredondamento das atualizações por diferença não acumula
+        self.total_proximity = sum(self._proximities.values(), 0.0)
+        return changed
+    
+    def set_inputs(self, values):
+        """Atualiza nós de entrada (None = indisponível); recalcula só os dependentes dos que mudaram"""
+        dirty = set()
+        for name, value in values.items():
+            if self.inputs.get(name) != value:
+                if value is None:
+                    self.inputs.pop(name, None)
+                else:
+                    self.inputs[name] = value
+                dirty.update(self._dependents.get(name, ()))
+        return self._recompute(dirty)
+    
+    def summary(self):
+        return self._summarize(self.total_proximity, len(self.records), self.in_risk_zone, dict(self.risk_distribution))
+    
+    def results(self):
+        """(indicadores, resumo) no formato do process_indicators; os registros nunca são alterados
+        depois de criados, então a cópia rasa pode ir para um snapshot imutável"""
+        return dict(self.records), self.summary()
+    
+    def _effective(self, name):
+        entry = self.sources.get(name)
+        derived = {}
+        for field, (inputs, compute) in self._bindings.get(name, {}).items():
+            if all(input_name in self.inputs for input_name in inputs):
+                derived[field] = compute(*(self.inputs[input_name] for input_name in inputs))
+        if not derived:
+            return entry
+        if entry is None:
+            # Indicador sem valor coletado: só existe se as entradas definem os dois campos
+            if "current" not in derived or "reference" not in derived:
+                return None
+            metadata = self._metadata(name)
+            entry = {"description": metadata.get("description", ""), "unit": metadata.get("unit", "")}
+        return dict(entry, **derived)
+    
+    def _recompute(self, names):
+        changed = set()
+        for name in names:
+            previous = self.records.get(name)
+            entry = self._effective(name)
+            if previous is not None and entry == self.data[name]:
+                # Entrada mudou, mas não um campo usado por este indicador (ex.: falta outra entrada)
+                continue
+            if previous is not None:
+                self._account(previous, self._proximities[name], -1)
+            
+            if entry is None:
+                if previous is not None:
+                    del self.records[name]
+                    del self.data[name]
+                    del self._proximities[name]
+                    changed.add(name)
+                continue
+            
+            record, proximity = self._evaluate(name, entry)
+            self.evaluations += 1
+            self.records[name] = record
+            self.data[name] = entry
+            self._proximities[name] = proximity
+            self._account(record, proximity, 1)
+            if record != previous:
+                changed.add(name)
+        return changed
+    
+    def _account(self, record, proximity, sign):
+        self.total_proximity += sign * proximity
+        self.in_risk_zone += sign * record["in_risk_zone"]
+        self.risk_distribution[record["risk_level"]] += sign
@@ -0,0 +1,291 @@
+"""
+Registro canônico dos indicadores
+Cada indicador tem um ID inteiro, nome canônico (o usado pela API), apelidos (os nomes da
+tabela da CoinMarketCap e de versões antigas), direção, unidade e descrição. Scraper e API
+resolvem qualquer nome por aqui, e os valores de cada snapshot ficam em arrays indexados
+pelo ID em vez de um dicionário por indicador.
+"""
+
+import math
+import threading
+from array import array
+
+class IndicatorDef:
+    """Metadados de um indicador; o ID é a posição no registro e nunca muda no processo"""
+    __slots__ = ("id", "name", "aliases", "inverse", "unit", "description")
+    
+    def __init__(self, id, name, aliases=(), inverse=False, unit="", description=""):
+        self.id = id
+        self.name = name
+        self.aliases = tuple(aliases)
+        # True: menor valor = mais próximo do fim de ciclo
+        self.inverse = inverse
+        self.unit = unit
+        self.description = description
+    
+    @property
+    def compare(self):
+        """Comparação com a referência no formato do scraper (">=" ou "<=")"""
+        return "<=" if self.inverse else ">="
+    
+    def metadata(self):
+        return {"description": self.description, "unit": self.unit}
+
+def _key(name):
+    """Chave de busca: sem diferença de maiúsculas nem de espaços repetidos"""
+    return " ".join(name.casefold().split())
+
+class IndicatorRegistry:
+    """Nomes e apelidos → IndicatorDef; nomes desconhecidos ganham um ID novo na primeira vez"""
+    
+    def __init__(self):
+        self._defs = []
+        self._by_name = {}
+        self._by_key = {}
+        self._lock = threading.Lock()
+    
+    def define(self, name, description="", unit="", inverse=False, aliases=()):
+        with self._lock:
+            return self._define(name, description, unit, inverse, aliases)
+    
+    def _define(self, name, description, unit, inverse, aliases):
+        definition = IndicatorDef(len(self._defs), name, aliases, inverse, unit, description)
+        for alias in (name,) + definition.aliases:
+            if _key(alias) in self._by_key:
+                raise ValueError(f"Nome de indicador duplicado no registro: {alias}")
+            self._by_key[_key(alias)] = definition
+            self._by_name[alias] = definition
+        # Lista nova a cada inclusão: leitores sem lock sempre veem uma lista completa
+        self._defs = self._defs + [definition]
+        return definition
+    
+    def resolve(self, name):
+        """IndicatorDef do nome canônico ou de um apelido; None se desconhecido"""
+        definition = self._by_name.get(name)
+        if definition is None:
+            definition = self._by_key.get(_key(name))
+        return definition
+    
+    def intern(self, name, description=""):
+        """Como resolve, mas registra nomes desconhecidos (direção normal, sem unidade)"""
+        definition = self.resolve(name)
+        if definition is not None:
+            return definition
+        with self._lock:
+            definition = self.resolve(name)
+            if definition is None:
+                definition = self._define(name, description, "", False, ())
+        return definition
+    
+    def canonical_name(self, name):
+        definition = self.resolve(name)
+        return definition.name if definition is not None else name
+    
+    def inverse_names(self):
+        """Nomes canônicos e apelidos dos indicadores de lógica inversa"""
+        return frozenset(alias for definition in self._defs if definition.inverse
+                         for alias in (definition.name,) + definition.aliases)
+    
+    def __getitem__(self, id):
+        return self._defs[id]
+    
+    def __len__(self):
+        return len(self._defs)
+    
+    def __iter__(self):
+        return iter(self._defs)
+
+REGISTRY = IndicatorRegistry()
+define = REGISTRY.define
+resolve = REGISTRY.resolve
+intern = REGISTRY.intern
+canonical_name = REGISTRY.canonical_name
+
+def metadata(name):
+    """Descrição e unidade de um indicador; {} se desconhecido"""
+    definition = resolve(name)
+    return definition.metadata() if definition is not None else {}
+
+# Níveis de risco (na ordem do risk_distribution) e status geral do resumo, do menor ao maior
+# risco; usados pelo api_server e pelo batch_engine
+RISK_LEVELS = ("BAIXO", "MÉDIO", "ALTO", "CRÍTICO")
+
+STATUS_LABELS = (
+    "🟢 BAIXO RISCO - Início do ciclo",
+    "🟠 BAIXO-MÉDIO RISCO - Meio do ciclo",
+    "🟡 MÉDIO RISCO - Monitorar de perto",
+    "🔴 ALTO RISCO - Possível fim de ciclo"
+)
+
+# Nomes canônicos = nomes servidos pela API; apelidos = nomes da tabela da CoinMarketCap
+define("Bitcoin Ahr999 Index",
+       description="Índice que combina preço e média móvel de 200 dias. Valores acima de 4 indicam possível topo de mercado.")
+define("Pi Cycle Top Indicator", unit="$",
+       description="Cruzamento de médias móveis de 111 e 350 dias. Quando a 111DMA cruza a 350DMA x2, indica possível topo.")
+define("Puell Multiple",
+       description="Receita diária dos mineradores vs média de 365 dias. Valores acima de 2.2 sugerem fim de ciclo.")
+define("Bitcoin Rainbow Chart",
+       description="Gráfico logarítmico com bandas de preço. Banda 5 (vermelha) indica possível topo de mercado.")
+define("2-Year MA Multiplier", unit="$",
+       description="Multiplicador da média móvel de 2 anos. Valores próximos a $364k indicam topo histórico.")
+define("MVRV Z-Score",
+       description="Z-Score do MVRV (Market Value to Realized Value). Valores acima de 5 indicam possível topo.")
+define("Bitcoin Bubble Index",
+       description="Índice de bolha baseado em desvios de preço. Valores acima de 80 indicam bolha extrema.")
+define("Bitcoin Dominance", unit="%", inverse=True,
+       description="Dominância do Bitcoin no mercado cripto. Quando cai para 40%, indica possível fim de ciclo.")
+define("Bitcoin MVRV Ratio",
+       description="Market Value to Realized Value Ratio. Valores acima de 3 indicam sobrevalorização.")
+define("Mayer Multiple",
+       description="Preço atual vs média móvel de 200 dias. Valores acima de 2.2 indicam sobrevalorização.")
+define("Fear & Greed Index",
+       description="Índice de medo e ganância do mercado. Valores acima de 80 indicam ganância extrema.")
+define("Bitcoin Net Unrealized P&L", unit="%", aliases=("Bitcoin Net Unrealized P&L (NUPL)",),
+       description="P&L não realizado líquido (NUPL). Valores acima de 70% indicam euforia extrema.")
+define("Bitcoin RHODL Ratio",
+       description="Ratio RHODL (Realized HODL). Valores acima de 10000 indicam possível topo.")
+define("Bitcoin Macro Oscillator", aliases=("Bitcoin Macro Oscillator (BMO)",),
+       description="Oscilador macro baseado em ciclos. Valores acima de 1.4 indicam fim de ciclo.")
+define("Bitcoin 4-Year Moving Average",
+       description="Média móvel de 4 anos. Valores acima de 3.5 indicam possível topo de ciclo.")
+define("Crypto Bitcoin Bull Run Index", aliases=("Crypto Bitcoin Bull Run Index (CBBI)",),
+       description="Índice de bull run cripto (CBBI). Valores acima de 90 indicam fim de bull run.")
+define("Bitcoin Reserve Risk",
+       description="Risco de reserva baseado em HODL waves. Valores acima de 0.005 indicam alto risco.")
+define("Golden Ratio Multiplier", unit="$",
+       description="Multiplicador da proporção áurea. Valores próximos a $135k indicam resistência forte.")
+define("Bitcoin Terminal Price", unit="$",
+       description="Preço terminal baseado em modelos. Valores próximos a $187k indicam topo teórico.")
+define("Smithson Bitcoin Price Forecast", unit="$", aliases=("Smithson's Bitcoin Price Forecast",),
+       description="Previsão de preço Smithson. Modelo baseado em análise técnica e fundamentalista.")
+define("Bitcoin Long Term Holder Supply", unit="M", inverse=True,
+       description="Suprimento de holders de longo prazo. Valores abaixo de 13.5M indicam distribuição.")
+define("Bitcoin Short Term Holder Supply", unit="%", aliases=("Bitcoin Short Term Holder Supply (%)",),
+       description="Suprimento de holders de curto prazo (%). Valores acima de 30% indicam especulação.")
+define("Bitcoin AHR999x Top Escape", inverse=True, aliases=("Bitcoin AHR999x Top Escape Indicator",),
+       description="Indicador de escape do topo AHR999x. Valores abaixo de 0.45 indicam momento de venda.")
+define("MicroStrategy Avg Bitcoin Cost", unit="$", aliases=("MicroStrategy's Avg Bitcoin Cost",),
+       description="Custo médio do Bitcoin da MicroStrategy. Referência baseada em compras históricas.")
+define("Bitcoin Trend Indicator",
+       description="Indicador de tendência baseado em momentum. Valores acima de 7 indicam possível reversão.")
+define("3-Month Annualized Ratio", unit="%",
+       description="Ratio anualizado de 3 meses. Valores acima de 30% indicam crescimento insustentável.")
+define("Days of ETF Net Outflows", unit=" dias",
+       description="Dias consecutivos de saídas líquidas de ETFs. Mais de 10 dias pode indicar fim de ciclo.")
+define("ETF-to-BTC Ratio", inverse=True,
+       description="Relação entre ETFs de Bitcoin e Bitcoin. Valores baixos indicam possível fim de ciclo.")
+define("USDT Flexible Savings", unit="%",
+       description="Taxa de poupança flexível USDT. Taxas acima de 29% indicam alta demanda por stablecoins.")
+define("RSI - 22 Day",
+       description="Índice de Força Relativa de 22 dias. Valores acima de 80 indicam sobrecompra extrema.")
+define("CMC Altcoin Season Index",
+       description="Índice de temporada de altcoins. Valores acima de 75 indicam altseason extrema.")
+
+# Flags de IndicatorValues: presença, tipos originais (int ou float, para o JSON não mudar) e zona de risco
+PRESENT = 1
+CURRENT_INT = 2
+REFERENCE_INT = 4
+PROXIMITY_INT = 8
+IN_RISK = 16
+LEVEL_SHIFT = 5
+
+_NAN = math.nan
+
+def _number(value, flag):
+    return int(value) if flag else value
+
+class IndicatorValues:
+    """Indicadores processados de um snapshot em arrays indexados pelo ID do registro
+    
+    current/reference/proximity são float64 (NaN = ausente) e flags guarda presença, tipos e
+    zona/nível de risco; descrição e unidade vêm do registro. Busca por nome ou ID é O(1) e um
+    snapshot ocupa alguns bytes por indicador em vez de um dicionário por indicador.
+    """
+    __slots__ = ("ids", "current", "reference", "proximity", "flags", "risk_levels")
+    
+    def __init__(self, ids, current, reference, proximity, flags, risk_levels):
+        self.ids = ids
+        self.current = current
+        self.reference = reference
+        self.proximity = proximity
+        self.flags = flags
+        self.risk_levels = risk_levels
+    
+    @classmethod
+    def from_records(cls, records, risk_levels):
+        """Converte {nome: registro do evaluate_indicator} (nomes já canônicos ou apelidos)"""
+        definitions = [intern(name, record.get("description", "")) for name, record in records.items()]
+        size = max((definition.id for definition in definitions), default=-1) + 1
+        current = array("d", [_NAN]) * size
+        reference = array("d", [_NAN]) * size
+        proximity = array("d", [_NAN]) * size
+        flags = array("B", bytes(size))
+        ids = array("H")
+        
+        for definition, record in zip(definitions, records.values()):
+            id = definition.id
+            if not flags[id]:
+                ids.append(id)
+            current[id] = record["current"]
+            reference[id] = record["reference"]
+            proximity[id] = record["proximity"]
+            flags[id] = (PRESENT
+                         | (CURRENT_INT if type(record["current"]) is int else 0)
+                         | (REFERENCE_INT if type(record["reference"]) is int else 0)
+                         | (PROXIMITY_INT if type(record["proximity"]) is int else 0)
+                         | (IN_RISK if record["in_risk_zone"] else 0)
+                         | (risk_levels.index(record["risk_level"]) << LEVEL_SHIFT))
+        return cls(ids, current, reference, proximity, flags, risk_levels)
+    
+    def __len__(self):
+        return len(self.ids)
+    
+    def lookup(self, name):
+        """ID do indicador neste snapshot, ou None"""
+        definition = resolve(name)
+        if definition is None or definition.id >= len(self.flags) or not self.flags[definition.id]:
+            return None
+        return definition.id
+    
+    def __contains__(self, name):
+        return self.lookup(name) is not None
+    
+    def names(self):
+        return [REGISTRY[id].name for id in self.ids]
+    
+    def in_risk_zone(self, id):
+        return bool(self.flags[id] & IN_RISK)
+    
+    def risk_level(self, id):
+        return self.risk_levels[self.flags[id] >> LEVEL_SHIFT]
+    
+    def record(self, id):
+        """Registro no formato do evaluate_indicator (dicionário novo a cada chamada)"""
+        definition = REGISTRY[id]
+        flags = self.flags[id]
+        return {
+            "current": _number(self.current[id], flags & CURRENT_INT),
+            "reference": _number(self.reference[id], flags & REFERENCE_INT),
+            "proximity": _number(self.proximity[id], flags & PROXIMITY_INT),
+            "in_risk_zone": bool(flags & IN_RISK),
+            "risk_level": self.risk_levels[flags >> LEVEL_SHIFT],
+            "description": definition.description,
+            "unit": definition.unit
+        }
+    
+    def records(self):
+        return {REGISTRY[id].name: self.record(id) for id in self.ids}
+    
+    def source_data(self):
+        """Valores de entrada ({nome: current, reference, description, unit}), como no SIMULATED_DATA"""
+        data = {}
+        for id in self.ids:
+            definition = REGISTRY[id]
+            flags = self.flags[id]
+            data[definition.name] = {
+                "current": _number(self.current[id], flags & CURRENT_INT),
+                "reference": _number(self.reference[id], flags & REFERENCE_INT),
+                "description": definition.description,
+                "unit": definition.unit
+            }
+        return data
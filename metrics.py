@@ -0,0 +1,240 @@
+"""
+Métricas no formato texto do Prometheus
+Contadores e histogramas com shards por thread: cada thread escreve só nos seus próprios
+arrays, sem lock no caminho da requisição; a soma dos shards é feita apenas na coleta.
+O shard de uma thread encerrada é somado a um total acumulado e descartado, então threads
+por requisição não fazem a série crescer.
+"""
+
+import math
+import threading
+import weakref
+from bisect import bisect_left
+
+# Segundos: de 0.5 ms (respostas pré-serializadas) a 30 s (ciclos de scraping lentos)
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576)
+
+def _format_value(value):
+    if value == math.inf:
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _label_text(names, values, extra=()):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    pairs.extend(f'{name}="{_escape(value)}"' for name, value in extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+class _ShardOwner:
+    """Marcador guardado no threading.local: é coletado quando a thread termina"""
+    __slots__ = ("__weakref__",)
+
+class _ShardedChild:
+    """Série de uma combinação de labels; cada thread acumula em um shard próprio"""
+    
+    def __init__(self, size):
+        self._size = size
+        self._local = threading.local()
+        self._shards = {}
+        # Soma dos shards de threads que já terminaram
+        self._retired = [0] * size
+        self._lock = threading.Lock()
+    
+    def _shard(self):
+        shard = getattr(self._local, "values", None)
+        if shard is None:
+            # Só na primeira observação de cada thread
+            shard = self._local.values = [0] * self._size
+            owner = self._local.owner = _ShardOwner()
+            with self._lock:
+                self._shards[id(shard)] = shard
+            weakref.finalize(owner, self._retire, id(shard))
+        return shard
+    
+    def _retire(self, key):
+        """A thread terminou: seus valores passam para o total acumulado"""
+        with self._lock:
+            shard = self._shards.pop(key, None)
+            if shard is not None:
+                for index, value in enumerate(shard):
+                    self._retired[index] += value
+    
+    def totals(self):
+        with self._lock:
+            shards = list(self._shards.values())
+            totals = list(self._retired)
+        for shard in shards:
+            for index, value in enumerate(shard):
+                totals[index] += value
+        return totals
+
+class _CounterChild(_ShardedChild):
+    def __init__(self):
+        super().__init__(1)
+    
+    def inc(self, amount=1):
+        self._shard()[0] += amount
+
+class _HistogramChild(_ShardedChild):
+    def __init__(self, buckets):
+        # Contagem por faixa (+Inf no fim) e a soma das observações
+        super().__init__(len(buckets) + 2)
+        self._buckets = buckets
+    
+    def observe(self, value):
+        shard = self._shard()
+        shard[bisect_left(self._buckets, value)] += 1
+        shard[-1] += value
+
+class _Metric:
+    kind = None
+    
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children = {}
+        self._lock = threading.Lock()
+    
+    def labels(self, *values):
+        child = self._children.get(values)
+        if child is None:
+            with self._lock:
+                child = self._children.get(values)
+                if child is None:
+                    child = self._children[values] = self._new_child()
+        return child
+    
+    def _items(self):
+        with self._lock:
+            return list(self._children.items())
+    
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self._samples())
+        return lines
+
+class Counter(_Metric):
+    kind = "counter"
+    
+    def _new_child(self):
+        return _CounterChild()
+    
+    def inc(self, amount=1):
+        self.labels().inc(amount)
+    
+    def _samples(self):
+        for values, child in self._items():
+            yield f"{self.name}{_label_text(self.labelnames, values)} {_format_value(child.totals()[0])}"
+
+class Histogram(_Metric):
+    kind = "histogram"
+    
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+    
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+    
+    def observe(self, value):
+        self.labels().observe(value)
+    
+    def _samples(self):
+        for values, child in self._items():
+            totals = child.totals()
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), totals[:-1]):
+                cumulative += count
+                labels = _label_text(self.labelnames, values, [("le", _format_value(float(bound)))])
+                yield f"{self.name}_bucket{labels} {cumulative}"
+            labels = _label_text(self.labelnames, values)
+            yield f"{self.name}_sum{labels} {_format_value(float(totals[-1]))}"
+            yield f"{self.name}_count{labels} {cumulative}"
+
+class GaugeFunction(_Metric):
+    """Gauge calculado na coleta (ex.: idade do snapshot); nada acontece no caminho das requisições
+    
+    Com labelnames, a função retorna {valores dos labels: valor}.
+    """
+    kind = "gauge"
+    
+    def __init__(self, name, documentation, function, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self.function = function
+    
+    def _samples(self):
+        values = self.function()
+        if not self.labelnames:
+            values = {(): values}
+        for labels, value in (values or {}).items():
+            if value is not None:
+                yield f"{self.name}{_label_text(self.labelnames, labels)} {_format_value(float(value))}"
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+    
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+    
+    def render(self):
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return ("\n".join(lines) + "\n").encode("utf-8")
+
+REGISTRY = Registry()
+
+def counter(name, documentation, labelnames=()):
+    return REGISTRY.register(Counter(name, documentation, labelnames))
+
+def histogram(name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+    return REGISTRY.register(Histogram(name, documentation, labelnames, buckets))
+
+def gauge_function(name, documentation, function, labelnames=()):
+    return REGISTRY.register(GaugeFunction(name, documentation, function, labelnames))
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Métricas do scraper (preenchidas pelo CoinMarketCapScraper no processo que faz a coleta)
+SCRAPE_CYCLE_SECONDS = histogram(
+    "btc_scraper_cycle_duration_seconds", "Duração de um ciclo completo de scraping")
+SCRAPE_CYCLES = counter(
+    "btc_scraper_cycles_total", "Ciclos de scraping por resultado (success, fallback)", ("result",))
+SOURCE_SECONDS = histogram(
+    "btc_scraper_source_duration_seconds", "Duração da coleta de cada fonte (rede + parse)", ("source",))
+SOURCE_PARSE_SECONDS = histogram(
+    "btc_scraper_parse_duration_seconds", "Tempo de parse da resposta de cada fonte", ("source",))
+SOURCE_RESULTS = counter(
+    "btc_scraper_source_results_total", "Resultado da coleta de cada fonte (ok, empty, error, timeout)",
+    ("source", "result"))
+SOURCE_BREAKER_TRANSITIONS = counter(
+    "btc_scraper_breaker_transitions_total", "Mudanças de estado do circuit breaker de cada fonte (open, closed)",
+    ("source", "state"))
+
+# Métricas das requisições HTTP (Flask e ASGI); `route` é o padrão da rota, nunca o caminho bruto
+REQUESTS = counter(
+    "btc_api_requests_total", "Requisições atendidas por rota e status", ("route", "status"))
+REQUEST_SECONDS = histogram(
+    "btc_api_request_duration_seconds", "Latência das requisições por rota", ("route",))
+RESPONSE_BYTES = histogram(
+    "btc_api_response_bytes", "Tamanho do corpo das respostas por rota", ("route",), SIZE_BUCKETS)
+
+def observe_request(route, status, elapsed, size=None):
+    """Registra uma requisição; streams (sem duração nem tamanho definidos) só entram na contagem"""
+    REQUESTS.labels(route, status).inc()
+    if elapsed is not None:
+        REQUEST_SECONDS.labels(route).observe(elapsed)
+    if size is not None:
+        RESPONSE_BYTES.labels(route).observe(size)
+
+# Ciclos da atualização em segundo plano (published, empty, error)
+REFRESH_CYCLES = counter(
+    "btc_refresher_cycles_total", "Ciclos da atualização em segundo plano por resultado", ("result",))
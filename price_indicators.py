@@ -0,0 +1,295 @@
+"""
+Indicadores derivados apenas do histórico de preço do BTC
+Calcula Mayer Multiple, Pi Cycle Top, 2-Year MA Multiplier, Golden Ratio Multiplier e RSI 22
+a partir de um arquivo local de fechamentos diários, sem depender de scraping.
+O numpy só é importado nos cálculos: a API importa PRICE_BINDINGS sem carregá-lo.
+"""
+
+import csv
+import io
+import logging
+import os
+from collections import deque
+
+
+logger = logging.getLogger(__name__)
+
+# Janelas das médias móveis (dias) e do RSI
+SMA_WINDOWS = (111, 200, 350, 730)
+RSI_PERIOD = 22
+
+# Multiplicadores das referências
+PI_CYCLE_MULTIPLIER = 2        # 350DMA x2
+TWO_YEAR_MULTIPLIER = 5        # 2-Year MA x5
+GOLDEN_RATIO_MULTIPLIER = 1.6  # 350DMA x1.6
+
+MAYER_REFERENCE = 2.2
+RSI_REFERENCE = 80
+
+def indicator_values(price, sma, rsi):
+    """Monta os indicadores no formato current/reference a partir das médias e do RSI"""
+    indicators = {}
+    
+    if sma.get(200):
+        indicators["Mayer Multiple"] = {"current": price / sma[200], "reference": MAYER_REFERENCE}
+    if sma.get(111) and sma.get(350):
+        indicators["Pi Cycle Top Indicator"] = {"current": sma[111], "reference": sma[350] * PI_CYCLE_MULTIPLIER}
+    if sma.get(730):
+        indicators["2-Year MA Multiplier"] = {"current": price, "reference": sma[730] * TWO_YEAR_MULTIPLIER}
+    if sma.get(350):
+        indicators["Golden Ratio Multiplier"] = {"current": price, "reference": sma[350] * GOLDEN_RATIO_MULTIPLIER}
+    if rsi is not None:
+        indicators["RSI - 22 Day"] = {"current": rsi, "reference": RSI_REFERENCE}
+    
+    return indicators
+
+# Nós de entrada compartilhados (indicator_graph): preço do último fechamento, médias e RSI
+PRICE_INPUT = "btc_price"
+RSI_INPUT = f"rsi_{RSI_PERIOD}"
+
+def sma_input(window):
+    return f"sma_{window}"
+
+# Campos de cada indicador derivados das entradas: (entradas, função). Um campo só é derivado
+# quando todas as suas entradas são conhecidas; senão vale o valor coletado pelo scraper.
+# O valor atual dos indicadores "preço" depende só do preço: um novo preço recalcula apenas eles.
+PRICE_BINDINGS = {
+    "Mayer Multiple": {
+        "current": ((PRICE_INPUT, sma_input(200)), lambda price, sma: price / sma),
+        "reference": ((sma_input(200),), lambda sma: MAYER_REFERENCE)
+    },
+    "Pi Cycle Top Indicator": {
+        "current": ((sma_input(111), sma_input(350)), lambda fast, slow: fast),
+        "reference": ((sma_input(111), sma_input(350)), lambda fast, slow: slow * PI_CYCLE_MULTIPLIER)
+    },
+    "2-Year MA Multiplier": {
+        "current": ((PRICE_INPUT,), lambda price: price),
+        "reference": ((sma_input(730),), lambda sma: sma * TWO_YEAR_MULTIPLIER)
+    },
+    "Golden Ratio Multiplier": {
+        "current": ((PRICE_INPUT,), lambda price: price),
+        "reference": ((sma_input(350),), lambda sma: sma * GOLDEN_RATIO_MULTIPLIER)
+    },
+    "Bitcoin Terminal Price": {
+        "current": ((PRICE_INPUT,), lambda price: price)
+    },
+    "Smithson Bitcoin Price Forecast": {
+        "current": ((PRICE_INPUT,), lambda price: price)
+    },
+    "RSI - 22 Day": {
+        "current": ((RSI_INPUT,), lambda rsi: rsi),
+        "reference": ((RSI_INPUT,), lambda rsi: RSI_REFERENCE)
+    }
+}
+
+def rolling_mean(closes, window):
+    """Média móvel simples vetorizada; NaN enquanto a janela não está completa"""
+    import numpy as np
+    result = np.full(len(closes), np.nan)
+    if len(closes) >= window:
+        sums = np.cumsum(np.concatenate(([0.0], closes)))
+        result[window - 1:] = (sums[window:] - sums[:-window]) / window
+    return result
+
+def _rsi_from_averages(avg_gain, avg_loss):
+    if avg_loss == 0:
+        return 100.0
+    return 100 - 100 / (1 + avg_gain / avg_loss)
+
+def wilder_rsi(closes, period=RSI_PERIOD):
+    """RSI com suavização de Wilder; retorna a série e o estado final (média de ganhos e perdas)"""
+    import numpy as np
+    result = np.full(len(closes), np.nan)
+    if len(closes) <= period:
+        return result, None, None
+    
+    changes = np.diff(closes)
+    gains = np.maximum(changes, 0)
+    losses = np.maximum(-changes, 0)
+    
+    avg_gain = gains[:period].mean()
+    avg_loss = losses[:period].mean()
+    result[period] = _rsi_from_averages(avg_gain, avg_loss)
+    
+    # A suavização é recursiva: um passe linear, O(1) por dia
+    for index in range(period, len(changes)):
+        avg_gain = (avg_gain * (period - 1) + gains[index]) / period
+        avg_loss = (avg_loss * (period - 1) + losses[index]) / period
+        result[index + 1] = _rsi_from_averages(avg_gain, avg_loss)
+    
+    return result, float(avg_gain), float(avg_loss)
+
+class RollingMean:
+    """Média móvel com soma corrente: O(1) por novo fechamento"""
+    
+    def __init__(self, window):
+        self.window = window
+        self.values = deque(maxlen=window)
+        self.total = 0.0
+    
+    def seed(self, closes):
+        self.values.clear()
+        self.values.extend(closes[-self.window:])
+        self.total = float(sum(self.values))
+    
+    def update(self, close):
+        if len(self.values) == self.window:
+            self.total -= self.values[0]
+        self.values.append(close)
+        self.total += close
+        return self.value
+    
+    @property
+    def value(self):
+        if len(self.values) < self.window:
+            return None
+        return self.total / self.window
+
+class PriceIndicatorEngine:
+    """Backfill vetorizado do histórico e atualização incremental a cada novo fechamento"""
+    
+    # Bytes finais já lidos do arquivo, conferidos a cada leitura para detectar reescritas no lugar
+    FILE_TAIL_BYTES = 64
+    
+    def __init__(self):
+        self.reset()
+    
+    def reset(self):
+        """Descarta todo o estado: o próximo sync_file relê o arquivo do início"""
+        self.means = {window: RollingMean(window) for window in SMA_WINDOWS}
+        # Últimos fechamentos para a primeira média simples do RSI
+        self.recent_closes = deque(maxlen=RSI_PERIOD + 1)
+        self.avg_gain = None
+        self.avg_loss = None
+        self.last_close = None
+        self.count = 0
+        self._file_offset = 0
+        self._file_identity = None
+        self._file_mtime = None
+        self._file_tail = b""
+    
+    def backfill(self, closes):
+        """Processa o histórico inteiro de uma vez e deixa o estado pronto para atualizações"""
+        import numpy as np
+        closes = np.asarray(closes, dtype=np.float64)
+        history = {window: rolling_mean(closes, window) for window in SMA_WINDOWS}
+        rsi, self.avg_gain, self.avg_loss = wilder_rsi(closes)
+        history["rsi"] = rsi
+        
+        for window, mean in self.means.items():
+            mean.seed(closes.tolist())
+        self.recent_closes.clear()
+        self.recent_closes.extend(closes[-(RSI_PERIOD + 1):].tolist())
+        self.last_close = float(closes[-1]) if len(closes) else None
+        self.count = len(closes)
+        return history
+    
+    def update(self, close):
+        """Incorpora um novo fechamento em O(1) e retorna os indicadores atuais"""
+        import numpy as np
+        close = float(close)
+        for mean in self.means.values():
+            mean.update(close)
+        self.recent_closes.append(close)
+        
+        if self.last_close is not None:
+            change = close - self.last_close
+            gain, loss = max(change, 0.0), max(-change, 0.0)
+            if self.avg_gain is not None:
+                self.avg_gain = (self.avg_gain * (RSI_PERIOD - 1) + gain) / RSI_PERIOD
+                self.avg_loss = (self.avg_loss * (RSI_PERIOD - 1) + loss) / RSI_PERIOD
+            elif self.count == RSI_PERIOD:
+                # Primeira média simples do RSI: as RSI_PERIOD variações até este fechamento
+                changes = np.diff(list(self.recent_closes))
+                self.avg_gain = float(np.maximum(changes, 0).mean())
+                self.avg_loss = float(np.maximum(-changes, 0).mean())
+        
+        self.last_close = close
+        self.count += 1
+        return self.current()
+    
+    def current(self):
+        """Indicadores do último fechamento processado"""
+        if self.last_close is None:
+            return {}
+        sma = {window: mean.value for window, mean in self.means.items()}
+        rsi = _rsi_from_averages(self.avg_gain, self.avg_loss) if self.avg_gain is not None else None
+        return indicator_values(self.last_close, sma, rsi)
+    
+    def inputs(self):
+        """Valores dos nós de entrada do grafo de indicadores (None enquanto indisponíveis)"""
+        values = {sma_input(window): mean.value for window, mean in self.means.items()}
+        values[PRICE_INPUT] = self.last_close
+        values[RSI_INPUT] = _rsi_from_averages(self.avg_gain, self.avg_loss) if self.avg_gain is not None else None
+        return values
+    
+    def sync_file(self, path):
+        """Lê apenas os fechamentos acrescentados ao arquivo desde a última leitura; um arquivo
+        substituído, truncado ou reescrito no lugar é relido do início"""
+        import numpy as np
+        stat = os.stat(path)
+        identity = (stat.st_dev, stat.st_ino)
+        if self._file_offset and (identity != self._file_identity or stat.st_size < self._file_offset):
+            self.reset()
+        if self._file_offset and stat.st_size == self._file_offset and stat.st_mtime_ns == self._file_mtime:
+            return 0
+        
+        with open(path, 'rb') as f:
+            if self._file_tail:
+                f.seek(self._file_offset - len(self._file_tail))
+                if f.read(len(self._file_tail)) != self._file_tail:
+                    # O trecho já lido mudou: o arquivo foi reescrito sem encolher
+                    self.reset()
+            first_read = self._file_offset == 0
+            f.seek(self._file_offset)
+            chunk = f.read()
+        self._file_identity = identity
+        self._file_mtime = stat.st_mtime_ns
+        
+        if path.endswith(".f8"):
+            usable = len(chunk) - len(chunk) % 8
+            closes = np.frombuffer(chunk[:usable], dtype="<f8")
+        else:
+            # Só linhas completas; uma linha parcial fica para a próxima leitura
+            usable = chunk.rfind(b"\n") + 1
+            closes = _parse_csv_closes(chunk[:usable].decode("utf-8"), has_header=first_read)
+        
+        self._file_offset += usable
+        self._file_tail = (self._file_tail + chunk[:usable])[-self.FILE_TAIL_BYTES:]
+        if first_read:
+            self.backfill(closes)
+        else:
+            for close in closes:
+                self.update(close)
+        
+        if len(closes):
+            logger.info(f"📈 {len(closes)} fechamentos processados de {path}")
+        return len(closes)
+
+def _parse_csv_closes(text, has_header):
+    """Extrai a coluna de fechamento (close) de um CSV data,close"""
+    import numpy as np
+    reader = csv.reader(io.StringIO(text))
+    close_column = 1
+    closes = []
+    
+    for index, row in enumerate(reader):
+        if not row:
+            continue
+        if index == 0 and has_header:
+            header = [column.strip().lower() for column in row]
+            if "close" in header:
+                close_column = header.index("close")
+                continue
+        try:
+            closes.append(float(row[close_column]))
+        except (ValueError, IndexError):
+            continue
+    
+    return np.array(closes, dtype=np.float64)
+
+def load_price_engine(path):
+    """Cria o engine e faz o backfill a partir do arquivo (CSV data,close ou binário float64 .f8)"""
+    engine = PriceIndicatorEngine()
+    engine.sync_file(path)
+    return engine
@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+"""
+Profiler opcional de requisições e ciclos de scraping
+Uma fração das requisições (ou as marcadas com o token de profiling) e dos ciclos do scraper
+é perfilada e gravada como pilhas colapsadas ("raiz;...;função microssegundos"), prontas para
+flamegraph.pl, speedscope ou inferno. Os arquivos rodam por tamanho, com limite de disco.
+
+- Requisições: rastreamento determinístico (sys.setprofile) só da thread da requisição.
+- Ciclos de scraping: amostragem periódica das pilhas da thread de atualização e das
+  threads do scraper, que buscam as fontes em paralelo.
+
+Uso:
+    python profiler.py merge profiles/ > todos.collapsed          # junta processos e arquivos rodados
+    python profiler.py merge profiles/ --root "scrape" | flamegraph.pl > scrape.svg
+"""
+
+import argparse
+import glob
+import hmac
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter
+
+_perf_counter = time.perf_counter
+
+def frame_name(code, module):
+    """Nome do frame nas pilhas: módulo:Classe.função (sem ';' nem espaços)"""
+    name = getattr(code, "co_qualname", code.co_name)
+    return f"{module}:{name}".replace(";", ":").replace(" ", "_")
+
+def builtin_name(function):
+    module = getattr(function, "__module__", None) or "builtins"
+    name = getattr(function, "__qualname__", None) or getattr(function, "__name__", "?")
+    return f"{module}:{name}".replace(";", ":").replace(" ", "_")
+
+class RequestTrace:
+    """Rastreia as chamadas de uma única thread e acumula o tempo próprio (µs) de cada pilha"""
+    
+    def __init__(self, root):
+        self.root = root
+        self.stacks = Counter()
+        # (pilha de nomes até aqui, início, tempo dos filhos)
+        self._frames = []
+        self._started = None
+    
+    def start(self):
+        self._started = _perf_counter()
+        sys.setprofile(self._event)
+    
+    def stop(self):
+        sys.setprofile(None)
+        now = _perf_counter()
+        # Frames ainda abertos (o próprio handler que chamou stop) fecham agora
+        while self._frames:
+            self._close(now)
+        total = (now - self._started) * 1e6
+        accounted = sum(self.stacks.values())
+        if total > accounted:
+            self.stacks[(self.root,)] += total - accounted
+        return self.stacks
+    
+    def _event(self, frame, event, arg):
+        if event == "call":
+            self._open(frame_name(frame.f_code, frame.f_globals.get("__name__", "?")))
+        elif event == "c_call":
+            self._open(builtin_name(arg))
+        elif event in ("return", "c_return", "c_exception") and self._frames:
+            self._close(_perf_counter())
+    
+    def _open(self, name):
+        parent = self._frames[-1][0] if self._frames else (self.root,)
+        self._frames.append([parent + (name,), _perf_counter(), 0.0])
+    
+    def _close(self, now):
+        stack, started, children = self._frames.pop()
+        elapsed = now - started
+        self.stacks[stack] += (elapsed - children) * 1e6
+        if self._frames:
+            self._frames[-1][2] += elapsed
+
+class StackSampler:
+    """Amostra periodicamente as pilhas das threads selecionadas enquanto uma seção está ativa"""
+    
+    def __init__(self, root, thread_prefixes, interval):
+        self.root = root
+        self.thread_prefixes = tuple(thread_prefixes)
+        self.interval = interval
+        self.stacks = Counter()
+        self._done = threading.Event()
+        self._thread = None
+        self._owner = None
+    
+    def start(self):
+        self._owner = threading.get_ident()
+        self._thread = threading.Thread(target=self._run, name="profiler-sampler", daemon=True)
+        self._thread.start()
+    
+    def stop(self):
+        self._done.set()
+        self._thread.join()
+        return self.stacks
+    
+    def _targets(self):
+        idents = {self._owner}
+        for thread in threading.enumerate():
+            if thread.name.startswith(self.thread_prefixes):
+                idents.add(thread.ident)
+        return idents
+    
+    def _run(self):
+        last = _perf_counter()
+        while not self._done.wait(self.interval):
+            now = _perf_counter()
+            # O peso é o tempo realmente decorrido: o sampler também disputa o GIL
+            weight = (now - last) * 1e6
+            last = now
+            targets = self._targets()
+            for ident, frame in sys._current_frames().items():
+                if ident not in targets:
+                    continue
+                names = []
+                while frame is not None:
+                    names.append(frame_name(frame.f_code, frame.f_globals.get("__name__", "?")))
+                    frame = frame.f_back
+                names.append(self.root)
+                self.stacks[tuple(reversed(names))] += weight
+
+def prune(directory, max_total_bytes):
+    """Remove os arquivos de pilhas mais antigos até o diretório caber no limite total"""
+    files = []
+    for path in glob.glob(os.path.join(directory, "stacks-*.collapsed*")):
+        try:
+            stat = os.stat(path)
+        except OSError:
+            continue
+        files.append((stat.st_mtime, stat.st_size, path))
+    total = sum(size for _, size, _ in files)
+    for _, size, path in sorted(files):
+        if total <= max_total_bytes:
+            break
+        try:
+            os.remove(path)
+            total -= size
+        except OSError:
+            pass
+
+class _RotatingWriter:
+    """Acrescenta blocos de linhas a um arquivo, rodando por tamanho (arquivo.1, arquivo.2, ...)
+    e respeitando o limite de disco do diretório inteiro. Não usa logging: logging.disable
+    (comum nos benchmarks) não pode silenciar o profiler."""
+    
+    def __init__(self, path, max_bytes, backup_count, max_total_bytes):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.max_total_bytes = max_total_bytes
+        self._lock = threading.Lock()
+    
+    def write(self, text):
+        data = (text + "\n").encode("utf-8")
+        with self._lock:
+            try:
+                size = os.path.getsize(self.path)
+            except OSError:
+                size = 0
+            if size and size + len(data) > self.max_bytes:
+                self._rotate()
+            with open(self.path, "ab") as f:
+                f.write(data)
+    
+    def _rotate(self):
+        for index in range(self.backup_count, 0, -1):
+            source = self.path if index == 1 else f"{self.path}.{index - 1}"
+            if os.path.exists(source):
+                os.replace(source, f"{self.path}.{index}")
+        if self.backup_count == 0:
+            os.remove(self.path)
+        # Vários processos, e arquivos de processos anteriores, dividem o mesmo diretório
+        prune(os.path.dirname(self.path), self.max_total_bytes)
+
+class Profiler:
+    """Decide o que perfilar e grava as pilhas colapsadas com rotação por tamanho"""
+    
+    def __init__(self, directory, sample_rate=0.0, token="", interval=0.005,
+                 max_bytes=5 * 1024 * 1024, backup_count=4, max_total_bytes=100 * 1024 * 1024):
+        self.sample_rate = sample_rate
+        self.token = token
+        self.interval = interval
+        os.makedirs(directory, exist_ok=True)
+        # Um arquivo por processo (workers do gunicorn não disputam a rotação), cada um com no
+        # máximo max_bytes * (backup_count + 1); o diretório inteiro fica abaixo de max_total_bytes
+        self.path = os.path.join(directory, f"stacks-{os.getpid()}.collapsed")
+        prune(directory, max_total_bytes)
+        self._output = _RotatingWriter(self.path, max_bytes, backup_count, max_total_bytes)
+    
+    def sampled(self):
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+    
+    def authorized(self, value):
+        """Profiling forçado por requisição (?profile=<token> ou X-Profile-Token)"""
+        return bool(self.token) and bool(value) and hmac.compare_digest(value, self.token)
+    
+    def trace_request(self, root):
+        trace = RequestTrace(root)
+        trace.start()
+        return trace
+    
+    def sample_section(self, root, thread_prefixes=()):
+        sampler = StackSampler(root, thread_prefixes, self.interval)
+        sampler.start()
+        return sampler
+    
+    def write(self, stacks):
+        lines = [f"{';'.join(stack)} {round(weight)}" for stack, weight in stacks.items() if weight >= 0.5]
+        if lines:
+            self._output.write("\n".join(lines))
+
+def from_environment():
+    """Profiler configurado pelas variáveis PROFILE_*; None quando desativado (custo zero)"""
+    sample_rate = float(os.environ.get("PROFILE_SAMPLE_RATE", "0"))
+    token = os.environ.get("PROFILE_TOKEN", "")
+    if sample_rate <= 0 and not token:
+        return None
+    return Profiler(
+        os.environ.get("PROFILE_DIR", "profiles"),
+        sample_rate=sample_rate,
+        token=token,
+        interval=float(os.environ.get("PROFILE_INTERVAL_MS", "5")) / 1000,
+        max_bytes=int(float(os.environ.get("PROFILE_MAX_MB", "5")) * 1024 * 1024),
+        backup_count=int(os.environ.get("PROFILE_BACKUPS", "4")),
+        max_total_bytes=int(float(os.environ.get("PROFILE_DISK_MB", "100")) * 1024 * 1024)
+    )
+
+def merge(directory, root=None):
+    """Soma as pilhas de todos os arquivos (processos e rotações) do diretório"""
+    stacks = Counter()
+    for path in sorted(glob.glob(os.path.join(directory, "stacks-*.collapsed*"))):
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                stack, _, weight = line.rstrip("\n").rpartition(" ")
+                if not stack or (root is not None and not stack.startswith(root)):
+                    continue
+                stacks[stack] += int(weight)
+    return stacks
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    subcommands = parser.add_subparsers(dest="command", required=True)
+    merge_parser = subcommands.add_parser("merge", help="Juntar as pilhas gravadas em um único arquivo colapsado")
+    merge_parser.add_argument("directory", nargs="?", default=os.environ.get("PROFILE_DIR", "profiles"))
+    merge_parser.add_argument("--root", help="Só pilhas com esta raiz (ex.: scrape ou GET_/api/indicators)")
+    args = parser.parse_args()
+    
+    for stack, weight in sorted(merge(args.directory, args.root).items()):
+        print(f"{stack} {weight}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
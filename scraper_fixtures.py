@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+Gravação e reprodução das respostas HTTP do CoinMarketCapScraper
+As respostas reais são gravadas em um corpus versionado de fixtures e reproduzidas pela própria
+sessão requests do scraper, exercitando o mesmo código de parsing sem acesso à rede.
+
+Uso:
+    python scraper_fixtures.py record                                   # grava em fixtures/scraper/<data-hora>/
+    python scraper_fixtures.py replay fixtures/scraper/20261017-120000  # compara com o resultado gravado
+"""
+
+import argparse
+import hashlib
+import io
+import json
+import os
+import sys
+from datetime import datetime, timezone
+
+from requests import Response
+from requests.adapters import BaseAdapter, HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+from coinmarketcap_scraper_v2 import CoinMarketCapScraper
+
+# Versão do formato do corpus; corpus de outra versão são recusados no replay
+CORPUS_FORMAT = 1
+MANIFEST_FILE = "manifest.json"
+EXPECTED_FILE = "expected.json"
+DEFAULT_CORPUS_ROOT = os.path.join("fixtures", "scraper")
+
+# O corpo é gravado já descomprimido: estes cabeçalhos deixam de valer
+_DROPPED_HEADERS = ("content-encoding", "content-length", "transfer-encoding")
+
+def save_corpus(directory, entries, expected=None, **meta):
+    """Grava as respostas (url, status, cabeçalhos, corpo), o manifest e o resultado esperado"""
+    os.makedirs(directory, exist_ok=True)
+    manifest = {
+        "format": CORPUS_FORMAT,
+        "recorded_at": datetime.now(timezone.utc).isoformat(),
+        **meta,
+        "responses": []
+    }
+    
+    for url, status, headers, body in entries:
+        digest = hashlib.sha256(body).hexdigest()
+        body_file = digest[:16] + ".body"
+        with open(os.path.join(directory, body_file), 'wb') as f:
+            f.write(body)
+        manifest["responses"].append({
+            "url": url,
+            "status": status,
+            "headers": {name: value for name, value in headers.items() if name.lower() not in _DROPPED_HEADERS},
+            "body": body_file,
+            "sha256": digest,
+            "size": len(body)
+        })
+    
+    with open(os.path.join(directory, MANIFEST_FILE), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    if expected is not None:
+        with open(os.path.join(directory, EXPECTED_FILE), 'w', encoding='utf-8') as f:
+            json.dump(expected, f, ensure_ascii=False, indent=2, sort_keys=True)
+    return manifest
+
+def load_corpus(directory):
+    """Lê o corpus; retorna {url: (status, cabeçalhos, corpo)}"""
+    with open(os.path.join(directory, MANIFEST_FILE), encoding='utf-8') as f:
+        manifest = json.load(f)
+    if manifest.get("format") != CORPUS_FORMAT:
+        raise ValueError(f"Corpus {directory} no formato {manifest.get('format')}, esperado {CORPUS_FORMAT}")
+    
+    responses = {}
+    for entry in manifest["responses"]:
+        with open(os.path.join(directory, entry["body"]), 'rb') as f:
+            body = f.read()
+        if hashlib.sha256(body).hexdigest() != entry["sha256"]:
+            raise ValueError(f"Corpo de {entry['url']} alterado no corpus {directory}")
+        responses[entry["url"]] = (entry["status"], entry["headers"], body)
+    return responses
+
+def load_expected(directory):
+    """Resultado do scrape_indicators gravado junto com o corpus (ou None)"""
+    path = os.path.join(directory, EXPECTED_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+def latest_corpus(root=DEFAULT_CORPUS_ROOT):
+    """Diretório do corpus mais recente (os nomes são data-hora), ou None"""
+    if not os.path.isdir(root):
+        return None
+    names = sorted(name for name in os.listdir(root) if os.path.exists(os.path.join(root, name, MANIFEST_FILE)))
+    return os.path.join(root, names[-1]) if names else None
+
+class RecordingAdapter(HTTPAdapter):
+    """Repassa as requisições à rede e guarda cada resposta completa"""
+    
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.entries = []
+    
+    def send(self, request, **kwargs):
+        response = super().send(request, **kwargs)
+        # Lê o corpo inteiro mesmo em stream=True; iter_content passa a servir o conteúdo já lido
+        body = response.content
+        self.entries.append((request.url, response.status_code, dict(response.headers), body))
+        return response
+
+class ReplayAdapter(BaseAdapter):
+    """Responde a partir do corpus, sem rede; URLs fora do corpus recebem 404"""
+    
+    def __init__(self, responses):
+        super().__init__()
+        self.responses = responses
+        self.requested = []
+    
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        self.requested.append(request.url)
+        status, headers, body = self.responses.get(request.url, (404, {}, b""))
+        
+        response = Response()
+        response.status_code = status
+        response.reason = "OK" if status == 200 else "Not Found" if status == 404 else ""
+        response.headers = CaseInsensitiveDict(headers)
+        response.encoding = get_encoding_from_headers(response.headers)
+        response.raw = io.BytesIO(body)
+        response.url = request.url
+        response.request = request
+        return response
+    
+    def close(self):
+        pass
+
+def _mount(scraper, adapter):
+    scraper.session.mount("https://", adapter)
+    scraper.session.mount("http://", adapter)
+
+def record(directory=None, **scraper_kwargs):
+    """Executa um scraping real gravando todas as respostas; retorna (diretório, resultado)"""
+    directory = directory or os.path.join(DEFAULT_CORPUS_ROOT, datetime.now().strftime("%Y%m%d-%H%M%S"))
+    # Sem cache HTTP: as respostas precisam vir completas (200), não 304
+    scraper = CoinMarketCapScraper(cache_dir=None, **scraper_kwargs)
+    adapter = RecordingAdapter()
+    _mount(scraper, adapter)
+    
+    result = scraper.scrape_indicators()
+    save_corpus(directory, adapter.entries, expected=result, html_backend=scraper.html_backend)
+    return directory, result
+
+def replay_scraper(directory, responses=None, **scraper_kwargs):
+    """Scraper ligado ao corpus, sem cache HTTP para que o parsing seja sempre exercitado"""
+    scraper = CoinMarketCapScraper(cache_dir=None, **scraper_kwargs)
+    _mount(scraper, ReplayAdapter(responses if responses is not None else load_corpus(directory)))
+    return scraper
+
+def diff_results(expected, actual):
+    """Descrição das diferenças entre dois resultados do scrape_indicators"""
+    differences = []
+    for name in sorted(set(expected) | set(actual)):
+        if name not in actual:
+            differences.append(f"- {name} ausente no replay")
+        elif name not in expected:
+            differences.append(f"+ {name} novo no replay")
+        elif expected[name] != actual[name]:
+            differences.append(f"~ {name}: {expected[name]} → {actual[name]}")
+    return differences
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    subcommands = parser.add_subparsers(dest="command", required=True)
+    record_parser = subcommands.add_parser("record", help="Gravar um novo corpus a partir das fontes reais")
+    record_parser.add_argument("directory", nargs="?")
+    replay_parser = subcommands.add_parser("replay", help="Reproduzir um corpus e comparar com o resultado gravado")
+    replay_parser.add_argument("directory", nargs="?")
+    for subparser in (record_parser, replay_parser):
+        subparser.add_argument("--backend", choices=("html.parser", "lxml", "strainer"))
+        subparser.add_argument("--no-embedded-json", action="store_true")
+    args = parser.parse_args()
+    
+    scraper_kwargs = {"html_backend": args.backend, "embedded_json": not args.no_embedded_json}
+    
+    if args.command == "record":
+        directory, result = record(args.directory, **scraper_kwargs)
+        print(f"💾 Corpus gravado em {directory} com {len(result or {})} indicadores")
+        return 0
+    
+    directory = args.directory or latest_corpus()
+    if directory is None:
+        print(f"❌ Nenhum corpus em {DEFAULT_CORPUS_ROOT}; grave um com: python scraper_fixtures.py record")
+        return 1
+    
+    result = replay_scraper(directory, **scraper_kwargs).scrape_indicators()
+    expected = load_expected(directory)
+    if expected is None:
+        print(json.dumps(result, ensure_ascii=False, indent=2))
+        return 0
+    
+    differences = diff_results(expected, result)
+    if differences:
+        print(f"❌ Replay de {directory} difere do resultado gravado:")
+        print("\n".join(differences))
+        return 1
+    print(f"✅ Replay de {directory}: {len(result)} indicadores idênticos ao resultado gravado")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
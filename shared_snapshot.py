@@ -0,0 +1,165 @@
+"""
+Snapshot compartilhado entre processos (workers do gunicorn) em um arquivo mapeado em memória
+Um único processo, eleito por flock, faz o scraping e publica cada versão; os demais leem o
+contador de versão direto do mapeamento e só copiam o conteúdo quando ele muda.
+"""
+
+import fcntl
+import json
+import mmap
+import os
+import struct
+import threading
+import time
+from contextlib import contextmanager
+
+MAGIC = b"BTCSNAP1"
+
+# Cabeçalho: magic, seq (seqlock, ímpar durante uma escrita), versão, tamanho do conteúdo,
+# contador de pedidos de atualização vindos dos workers leitores
+HEADER = struct.Struct("<8sQQQQ")
+SEQ_OFFSET = 8
+REQUESTS_OFFSET = 32
+DATA_OFFSET = 64
+
+# Espera máxima por um escritor em andamento antes de desistir da leitura
+WRITER_WAIT = 0.0005
+MAX_READ_RETRIES = 200
+
+def pack_blobs(meta, blobs):
+    """Metadados JSON e blocos binários concatenados em um único buffer"""
+    names = list(blobs)
+    header = json.dumps({"meta": meta, "blobs": [[name, len(blobs[name])] for name in names]}).encode("utf-8")
+    return b"".join([struct.pack("<I", len(header)), header] + [blobs[name] for name in names])
+
+def unpack_blobs(payload):
+    """Inverso de pack_blobs; retorna (meta, blobs)"""
+    (size,) = struct.unpack_from("<I", payload)
+    header = json.loads(bytes(payload[4:4 + size]))
+    blobs = {}
+    offset = 4 + size
+    for name, length in header["blobs"]:
+        blobs[name] = bytes(payload[offset:offset + length])
+        offset += length
+    return header["meta"], blobs
+
+class SharedSnapshot:
+    """Arquivo mapeado com uma versão publicada por vez, protegido por seqlock"""
+    
+    def __init__(self, path):
+        self.path = path
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        self._lock = threading.Lock()
+        self._producer_fd = None
+        
+        with self._locked():
+            if os.fstat(self._fd).st_size < DATA_OFFSET:
+                os.ftruncate(self._fd, mmap.PAGESIZE)
+            self._remap()
+            if self._mm[:len(MAGIC)] != MAGIC:
+                HEADER.pack_into(self._mm, 0, MAGIC, 0, 0, 0, 0)
+    
+    def _remap(self):
+        # O mapeamento anterior não é fechado: leituras em andamento em outras threads continuam válidas
+        self._mm = mmap.mmap(self._fd, os.fstat(self._fd).st_size)
+    
+    @contextmanager
+    def _locked(self):
+        """Exclusão entre processos (flock) e entre threads do mesmo processo"""
+        with self._lock:
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+    
+    def _seq(self):
+        return struct.unpack_from("<Q", self._mm, SEQ_OFFSET)[0]
+    
+    @property
+    def version(self):
+        """Versão publicada atual; None se um escritor não terminou a tempo"""
+        for _ in range(MAX_READ_RETRIES):
+            seq = self._seq()
+            if seq % 2 == 0:
+                version = HEADER.unpack_from(self._mm, 0)[2]
+                if self._seq() == seq:
+                    return version
+            time.sleep(WRITER_WAIT)
+        return None
+    
+    @property
+    def refresh_requests(self):
+        return struct.unpack_from("<Q", self._mm, REQUESTS_OFFSET)[0]
+    
+    def read(self):
+        """(versão, conteúdo) consistentes, ou None se um escritor não terminou a tempo"""
+        for _ in range(MAX_READ_RETRIES):
+            seq = self._seq()
+            if seq % 2 == 0:
+                _, _, version, length, _ = HEADER.unpack_from(self._mm, 0)
+                mm = self._mm
+                if DATA_OFFSET + length > len(mm):
+                    # O produtor aumentou o arquivo depois que este processo o mapeou
+                    self._remap()
+                    mm = self._mm
+                payload = mm[DATA_OFFSET:DATA_OFFSET + length]
+                if self._seq() == seq:
+                    return version, payload
+            time.sleep(WRITER_WAIT)
+        return None
+    
+    def publish(self, build):
+        """
+        Publica a próxima versão sob lock exclusivo
+        build(versão) retorna (resultado, conteúdo); o resultado é devolvido a quem chamou
+        """
+        with self._locked():
+            _, seq, version, _, _ = HEADER.unpack_from(self._mm, 0)
+            version += 1
+            result, payload = build(version)
+            
+            needed = DATA_OFFSET + len(payload)
+            if needed > len(self._mm):
+                # Cresce em potências de dois e nunca encolhe: leitores com mapeamento antigo seguem válidos
+                size = len(self._mm)
+                while size < needed:
+                    size *= 2
+                os.ftruncate(self._fd, size)
+                self._remap()
+            
+            # seq ímpar durante a escrita; se um escritor anterior morreu no meio, já está ímpar
+            if seq % 2 == 0:
+                seq += 1
+            struct.pack_into("<Q", self._mm, SEQ_OFFSET, seq)
+            self._mm[DATA_OFFSET:needed] = payload
+            HEADER.pack_into(self._mm, 0, MAGIC, seq, version, len(payload), self.refresh_requests)
+            struct.pack_into("<Q", self._mm, SEQ_OFFSET, seq + 1)
+        
+        return result
+    
+    def request_refresh(self):
+        """Pede ao produtor que antecipe o próximo ciclo de atualização"""
+        with self._locked():
+            struct.pack_into("<Q", self._mm, REQUESTS_OFFSET, self.refresh_requests + 1)
+    
+    @property
+    def is_producer(self):
+        return self._producer_fd is not None
+    
+    def try_become_producer(self):
+        """Tenta assumir o papel de produtor; o lock é liberado pelo sistema se o processo morrer"""
+        if self._producer_fd is not None:
+            return True
+        
+        fd = os.open(self.path + ".producer", os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(fd)
+            return False
+        
+        os.ftruncate(fd, 0)
+        os.write(fd, str(os.getpid()).encode())
+        self._producer_fd = fd
+        return True
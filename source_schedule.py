@@ -0,0 +1,156 @@
+"""
+Agenda de coleta por fonte
+Cada fonte tem intervalo próprio (com jitter), backoff exponencial após falhas e um circuit
+breaker: depois de algumas falhas seguidas a fonte deixa de ser consultada por um tempo e
+uma única tentativa (half-open) decide se ela volta. Enquanto isso, o último valor bom da
+fonte continua disponível, com a idade, em vez de dados fixos de fallback.
+"""
+
+import random
+import threading
+import time
+
+# Estados do circuit breaker
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+class SourcePolicy:
+    """Cadência e tolerância a falhas de uma fonte (tempos em segundos)"""
+    __slots__ = ("interval", "jitter", "backoff_base", "backoff_max", "failure_threshold", "open_seconds", "max_age")
+    
+    def __init__(self, interval, jitter=0.1, backoff_base=5.0, backoff_max=None, failure_threshold=3,
+                 open_seconds=300.0, max_age=None):
+        self.interval = interval
+        # Fração aleatória (±) aplicada a cada espera: workers e reinícios não sincronizam as coletas
+        self.jitter = jitter
+        self.backoff_base = backoff_base
+        self.backoff_max = interval if backoff_max is None else backoff_max
+        self.failure_threshold = failure_threshold
+        self.open_seconds = open_seconds
+        # Idade máxima do último valor bom; None = servir enquanto não houver outro
+        self.max_age = max_age
+
+def with_overrides(policies, overrides):
+    """Cópia das políticas com campos substituídos ({fonte: {campo: valor}}, ex.: vindo de JSON)"""
+    result = {}
+    for name, policy in policies.items():
+        fields = {field: getattr(policy, field) for field in SourcePolicy.__slots__}
+        unknown = set(overrides.get(name, {})) - set(fields)
+        if unknown:
+            raise ValueError(f"Campos desconhecidos na agenda da fonte {name}: {', '.join(sorted(unknown))}")
+        fields.update(overrides.get(name, {}))
+        result[name] = SourcePolicy(**fields)
+    return result
+
+class _SourceState:
+    __slots__ = ("policy", "state", "failures", "next_due", "value", "value_at", "value_time")
+    
+    def __init__(self, policy):
+        self.policy = policy
+        self.state = CLOSED
+        self.failures = 0
+        # Próxima consulta (relógio monotônico); com o circuito aberto, o fim do tempo aberto.
+        # Toda fonte é devida no primeiro ciclo
+        self.next_due = float("-inf")
+        self.value = None
+        self.value_at = None        # relógio monotônico, para a idade
+        self.value_time = None      # horário (epoch) da coleta, para exibição
+
+class SourceScheduler:
+    """Decide quais fontes consultar em cada ciclo e guarda o último valor bom de cada uma"""
+    
+    def __init__(self, policies, clock=time.monotonic, rng=None):
+        self._sources = {name: _SourceState(policy) for name, policy in policies.items()}
+        self._clock = clock
+        self._rng = rng or random.Random()
+        self._lock = threading.Lock()
+    
+    def _jittered(self, delay, jitter):
+        return delay * (1 + self._rng.uniform(-jitter, jitter)) if jitter else delay
+    
+    def due(self, force=False):
+        """Fontes a consultar agora; force antecipa as fechadas, mas nunca fura um circuito aberto"""
+        now = self._clock()
+        names = []
+        with self._lock:
+            for name, source in self._sources.items():
+                if source.state == OPEN:
+                    if now < source.next_due:
+                        continue
+                    # Passado o tempo aberto, uma única tentativa decide se o circuito fecha
+                    source.state = HALF_OPEN
+                elif not force and now < source.next_due:
+                    continue
+                names.append(name)
+        return names
+    
+    def record(self, name, value):
+        """Registra o resultado de uma consulta (None ou {} = falha); retorna o novo estado
+        quando o circuito muda de estado, senão None"""
+        now = self._clock()
+        with self._lock:
+            source = self._sources[name]
+            policy = source.policy
+            previous = source.state
+            if value is not None and value != {}:
+                source.value = value
+                source.value_at = now
+                source.value_time = time.time()
+                source.failures = 0
+                source.state = CLOSED
+                source.next_due = now + self._jittered(policy.interval, policy.jitter)
+            else:
+                source.failures += 1
+                if previous == HALF_OPEN or source.failures >= policy.failure_threshold:
+                    source.state = OPEN
+                    source.next_due = now + self._jittered(policy.open_seconds, policy.jitter)
+                else:
+                    backoff = min(policy.backoff_max, policy.backoff_base * 2 ** (source.failures - 1))
+                    source.next_due = now + self._jittered(backoff, policy.jitter)
+            return source.state if source.state != previous else None
+    
+    def seed(self, name, value, age):
+        """Último valor bom vindo de fora da agenda (ex.: dados persistidos), com `age` segundos;
+        não substitui um valor já coletado nem adia a próxima consulta"""
+        now = self._clock()
+        with self._lock:
+            source = self._sources[name]
+            if source.value is None:
+                source.value = value
+                source.value_at = now - age
+                source.value_time = time.time() - age
+    
+    def last_good(self, name):
+        """(último valor bom, idade em segundos) ou (None, None) se não houver ou se expirou"""
+        now = self._clock()
+        with self._lock:
+            source = self._sources[name]
+            if source.value is None:
+                return None, None
+            age = now - source.value_at
+            if source.policy.max_age is not None and age > source.policy.max_age:
+                return None, None
+            return source.value, age
+    
+    def seconds_until_due(self):
+        """Espera até a próxima fonte devida (inclui o fim do tempo aberto dos circuitos)"""
+        now = self._clock()
+        with self._lock:
+            next_due = min((source.next_due for source in self._sources.values()), default=now)
+        return max(0.0, next_due - now)
+    
+    def status(self):
+        """Estado de cada fonte para o health check e as métricas"""
+        now = self._clock()
+        with self._lock:
+            return {
+                name: {
+                    "state": source.state,
+                    "consecutive_failures": source.failures,
+                    "age_seconds": round(now - source.value_at, 1) if source.value_at is not None else None,
+                    "last_success": source.value_time,
+                    "next_fetch_in": round(max(0.0, source.next_due - now), 1)
+                }
+                for name, source in self._sources.items()
+            }
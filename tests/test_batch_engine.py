@@ -0,0 +1,67 @@
+"""
+Equivalência do batch_engine com o caminho escalar (process_indicators) do api_server
+"""
+
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import batch_engine
+from api_server import INVERSE_INDICATORS, SIMULATED_DATA, process_indicators
+from history_store import HistoryStore
+
+NAMES = list(SIMULATED_DATA)
+
+def _scalar(data):
+    indicators, summary = process_indicators(data)
+    summary = dict(summary)
+    del summary["last_update"]
+    return {name: {field: record[field] for field in ("proximity", "in_risk_zone", "risk_level")}
+            for name, record in indicators.items()}, summary
+
+def _random_data(rng):
+    """Subconjunto aleatório dos indicadores, com referências zero e valores dos dois lados da referência"""
+    data = {}
+    for name in NAMES:
+        if rng.random() < 0.2:
+            continue
+        reference = 0.0 if rng.random() < 0.05 else rng.uniform(0.1, 200)
+        current = rng.choice((reference, rng.uniform(0, 300), rng.uniform(0, 2) * reference))
+        data[name] = {"current": current, "reference": reference, "description": "", "unit": ""}
+    return data
+
+def _assert_matches(result, columns):
+    for column, data in enumerate(columns):
+        indicators, summary = _scalar(data)
+        assert result.summary(column) == summary
+        assert result.indicators(column, NAMES) == indicators
+
+def test_random_columns_match_process_indicators():
+    rng = random.Random(9)
+    columns = [_random_data(rng) for _ in range(5000)]
+    nan = float("nan")
+    current = [[column[name]["current"] if name in column else nan for column in columns] for name in NAMES]
+    reference = [[column[name]["reference"] if name in column else nan for column in columns] for name in NAMES]
+    inverse = batch_engine.direction_vector(NAMES, INVERSE_INDICATORS)
+    
+    _assert_matches(batch_engine.compute_batch(current, reference, inverse), columns)
+
+def test_history_rows_with_changing_indicator_set(tmp_path):
+    """Colunas criadas depois do início do histórico têm NaN nas linhas anteriores"""
+    store = HistoryStore(str(tmp_path))
+    rng = random.Random(21)
+    columns = [{name: entry for name, entry in _random_data(rng).items() if name in NAMES[:20]}]
+    columns += [_random_data(rng) for _ in range(50)]
+    for timestamp, data in enumerate(columns):
+        store.append(timestamp, data)
+    
+    _, names, current, reference = store.load_matrix()
+    assert sorted(names) == sorted({name for data in columns for name in data})
+    result = batch_engine.compute_batch(current, reference, batch_engine.direction_vector(names, INVERSE_INDICATORS))
+    for column, data in enumerate(columns):
+        # A soma das proximidades segue a ordem das colunas do histórico
+        indicators, summary = _scalar({name: data[name] for name in names if name in data})
+        assert result.summary(column) == summary
+        assert result.indicators(column, names) == indicators
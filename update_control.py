@@ -0,0 +1,107 @@
+"""
+Controle das atualizações forçadas (/api/update)
+Chamadas simultâneas compartilham uma única atualização em andamento (single-flight), com
+intervalo mínimo entre atualizações reais e limite por cliente (token bucket)
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+class _Flight:
+    __slots__ = ("done", "error", "finished_at")
+    
+    def __init__(self):
+        self.done = threading.Event()
+        self.error = None
+        self.finished_at = None
+
+class SingleFlight:
+    """Executa fn uma vez para todos os chamadores simultâneos e dispensa chamadas logo após a última
+
+    O retorno de fn não é guardado: quem chama lê o estado atual depois, que pode já ser mais novo
+    que o produzido pela última execução.
+    """
+    
+    def __init__(self, min_interval=0):
+        self.min_interval = min_interval
+        self._lock = threading.Lock()
+        self._current = None
+        self._last = None
+    
+    def run(self, fn):
+        """Retorna "started", "joined" ou "recent" conforme a chamada executou, aguardou ou dispensou fn"""
+        with self._lock:
+            flight = self._current
+            if flight is None:
+                last = self._last
+                if last is not None and time.monotonic() - last.finished_at < self.min_interval:
+                    return "recent"
+                flight = self._current = _Flight()
+                leader = True
+            else:
+                leader = False
+        
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return "joined"
+        
+        try:
+            fn()
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            flight.finished_at = time.monotonic()
+            with self._lock:
+                self._current = None
+                if flight.error is None:
+                    self._last = flight
+            flight.done.set()
+        
+        return "started"
+
+class ClientRateLimiter:
+    """Token bucket por cliente; acima de max_clients os clientes menos recentes são descartados"""
+    
+    def __init__(self, rate, burst, max_clients=10000):
+        self.rate = rate            # tokens por segundo; <= 0 desativa o limite
+        self.burst = burst
+        self.max_clients = max_clients
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def allow(self, client):
+        """Consome um token do cliente; retorna (permitido, segundos até o próximo token)"""
+        if self.rate <= 0:
+            return True, 0.0
+        
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.pop(client, (self.burst, now))
+            tokens = min(self.burst, tokens + (now - updated) * self.rate)
+            if tokens >= 1:
+                tokens -= 1
+                allowed, retry_after = True, 0.0
+            else:
+                allowed, retry_after = False, (1 - tokens) / self.rate
+            
+            self._buckets[client] = (tokens, now)
+            if len(self._buckets) > self.max_clients:
+                self._buckets.popitem(last=False)
+        
+        return allowed, retry_after
+
+def forwarded_client(peer, forwarded_for, hops):
+    """IP do cliente atrás de `hops` proxies confiáveis, como o ProxyFix(x_for=hops) do werkzeug
+
+    Cada proxy acrescenta o endereço de quem o chamou ao X-Forwarded-For: só o valor inserido
+    pelo proxy confiável mais distante é considerado; o que vem antes pode ter sido forjado.
+    Sem proxies configurados ou com o cabeçalho incompleto, vale o endereço da conexão.
+    """
+    if hops <= 0 or not forwarded_for:
+        return peer
+    values = [value.strip() for value in forwarded_for.split(",")]
+    return values[-hops] if len(values) >= hops else peer